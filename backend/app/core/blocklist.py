@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import redis
+
+from app.core import config
+from app.core.metrics import register_provider
+from app.database import SessionLocal
+import app.models as models
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a single blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class BlocklistIndex:
+    """
+    Per-worker index of revoked token JTIs: a Bloom filter in front of an exact set.
+
+    contains() returns False when the JTI is definitely not revoked, True when it is,
+    and None when the index cannot answer (not loaded yet, a Bloom false positive not
+    found in the exact set, or not synced with the database for `stale_after_seconds`,
+    so a revocation may be missing) and the caller falls back to the database.
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001, stale_after_seconds: float | None = None):
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self.stale_after_seconds = stale_after_seconds
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._jtis = set()
+        self._last_id = 0
+        self.ready = False
+        self.hits = {"negative": 0, "positive": 0, "fallback": 0, "stale": 0}
+
+    def load(self, db):
+        rows = db.query(models.TokenBlocklist.id, models.TokenBlocklist.jti).all()
+        bloom = BloomFilter(max(self._capacity, len(rows) * 2), self._error_rate)
+        jtis = set()
+        for _, jti in rows:
+            bloom.add(jti)
+            jtis.add(jti)
+        with self._lock:
+            self._bloom, self._jtis = bloom, jtis
+            self._last_id = max((row_id for row_id, _ in rows), default=0)
+            self._synced_at = time.monotonic()
+            self.ready = True
+        logger.info(f"Loaded {len(jtis)} blocklisted JTIs into the in-process index")
+
+    def prune(self, db, now: datetime | None = None) -> int:
+        """Delete rows whose token has expired anyway, then rebuild the index without them."""
+        now = now or datetime.utcnow()
+        # Rows written before expires_at existed are kept for the longest token lifetime
+        legacy_cutoff = now - timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS)
+        deleted = db.query(models.TokenBlocklist).filter(
+            (models.TokenBlocklist.expires_at < now)
+            | (models.TokenBlocklist.expires_at.is_(None) & (models.TokenBlocklist.created_at < legacy_cutoff))
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            logger.info(f"Pruned {deleted} expired rows from token_blocklist")
+        self.load(db)
+        # pick up revocations committed after load() took its snapshot
+        self.poll(db)
+        return deleted
+
+    def poll(self, db):
+        rows = db.query(models.TokenBlocklist.id, models.TokenBlocklist.jti).filter(
+            models.TokenBlocklist.id > self._last_id
+        ).all()
+        for row_id, jti in rows:
+            self.add(jti)
+            self._last_id = max(self._last_id, row_id)
+        self._synced_at = time.monotonic()
+
+    def add(self, jti: str):
+        with self._lock:
+            if jti in self._jtis:
+                return
+            self._jtis.add(jti)
+            self._bloom.add(jti)
+            if len(self._jtis) * 2 > self._capacity:
+                # keep the false positive rate bounded as the set grows
+                self._capacity *= 2
+                self._bloom = BloomFilter(self._capacity, self._error_rate)
+                for item in self._jtis:
+                    self._bloom.add(item)
+
+    def contains(self, jti: str) -> Optional[bool]:
+        if not self.ready:
+            return None
+        if jti not in self._bloom:
+            if self.stale_after_seconds is not None and time.monotonic() - self._synced_at > self.stale_after_seconds:
+                # Polling has been failing: a revocation may be missing, so only trust positives
+                self.hits["stale"] += 1
+                return None
+            self.hits["negative"] += 1
+            return False
+        if jti in self._jtis:
+            self.hits["positive"] += 1
+            return True
+        self.hits["fallback"] += 1
+        return None
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "size": len(self._jtis), "lookups": dict(self.hits)}
+
+class BlocklistSync:
+    """
+    Keeps every worker's BlocklistIndex in sync. token_blocklist is polled for new rows
+    every `poll_seconds`, also while subscribed, so a revocation whose broadcast was
+    missed (Redis down at publish time, a dropped subscription) still arrives.
+    Revocations broadcast on a Redis channel arrive at once; when Redis is unavailable
+    it is retried on the next interval.
+
+    Other auth caches can broadcast their own invalidations on the same channel by
+    registering a handler for a message type.
+    """
+
+    def __init__(self, index: BlocklistIndex, channel: str, poll_seconds: int):
+        self.index = index
+        self.channel = channel
+        self.poll_seconds = poll_seconds
+        self._redis = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._handlers = {"jti": index.add}
+
+    def add_handler(self, message_type: str, handler):
+        self._handlers[message_type] = handler
+
+    def _connect(self):
+        try:
+            client = redis.StrictRedis(
+                host=config.REDIS_HOST, port=config.REDIS_PORT, db=config.REDIS_DB,
+                decode_responses=True, socket_connect_timeout=1, socket_timeout=1,
+            )
+            client.ping()
+            return client
+        except redis.exceptions.RedisError as e:
+            logger.info(f"Blocklist sync falling back to polling, Redis unavailable: {e}")
+            return None
+
+    def start(self):
+        self._stop.clear()
+        self._redis = self._connect()
+        self._thread = threading.Thread(target=self._run, name="blocklist-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def publish(self, message_type: str, value):
+        if self._redis is None:
+            return
+        try:
+            self._redis.publish(self.channel, json.dumps({"type": message_type, "value": value}))
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Could not publish {message_type} invalidation: {e}")
+
+    def _handle(self, message: dict):
+        handler = self._handlers.get(message.get("type"))
+        if handler is not None:
+            handler(message["value"])
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        try:
+            # catch up on anything revoked while we were not subscribed
+            self._poll_once()
+            next_poll = time.monotonic() + self.poll_seconds
+            while not self._stop.is_set():
+                message = pubsub.get_message(timeout=min(self.poll_seconds, 1.0))
+                if message and message.get("type") == "message":
+                    self._handle(json.loads(message["data"]))
+                if time.monotonic() >= next_poll:
+                    # pub/sub is only the fast path: a missed broadcast is picked up here
+                    self._poll_once()
+                    next_poll = time.monotonic() + self.poll_seconds
+        finally:
+            pubsub.close()
+
+    def _poll_once(self):
+        try:
+            with SessionLocal() as db:
+                self.index.poll(db)
+        except Exception as e:
+            logger.warning(f"Blocklist poll failed: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._redis is not None:
+                try:
+                    self._listen()
+                    continue
+                except (redis.exceptions.RedisError, ValueError) as e:
+                    logger.warning(f"Blocklist subscription lost, polling instead: {e}")
+                    self._redis = None
+            self._poll_once()
+            if self._stop.wait(self.poll_seconds):
+                break
+            self._redis = self._connect()
+
+def _prune_once():
+    with SessionLocal() as db:
+        blocklist_index.prune(db)
+
+async def prune_periodically(interval_seconds: int):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(_prune_once)
+        except Exception as e:
+            logger.warning(f"Token blocklist pruning failed: {e}")
+
+# Without a successful poll for a few intervals, negative answers go to the database
+blocklist_index = BlocklistIndex(stale_after_seconds=3 * config.JTI_BLOCKLIST_POLL_SECONDS)
+blocklist_sync = BlocklistSync(blocklist_index, config.JTI_BLOCKLIST_CHANNEL, config.JTI_BLOCKLIST_POLL_SECONDS)
+
+register_provider("jti_blocklist", blocklist_index.stats)
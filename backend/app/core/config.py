@@ -13,6 +13,127 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost").split(",")
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
 EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS = int(os.getenv("EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS", 1))
+# Bearer token required by GET /metrics; the endpoint is disabled while it is unset
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Password hashing: bcrypt runs in a dedicated bounded pool; when more than
+# PASSWORD_HASH_MAX_PENDING calls are queued new ones are rejected with a 503.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+
+# Roadmaps cached for a goal are reused for other goals whose normalized text is at
+# least this similar (character trigram Jaccard). 0 disables near-duplicate reuse.
+ROADMAP_SIMILARITY_THRESHOLD = float(os.getenv("ROADMAP_SIMILARITY_THRESHOLD", 0.85))
+
+# Concurrent generations for the same goal wait on one in-flight LLM call
+SINGLEFLIGHT_LOCK_SECONDS = int(os.getenv("SINGLEFLIGHT_LOCK_SECONDS", 120))
+SINGLEFLIGHT_WAIT_SECONDS = int(os.getenv("SINGLEFLIGHT_WAIT_SECONDS", 90))
+
+# Background roadmap generation jobs (per worker process)
+ROADMAP_JOB_CONCURRENCY = int(os.getenv("ROADMAP_JOB_CONCURRENCY", 4))
+ROADMAP_JOB_MAX_QUEUED = int(os.getenv("ROADMAP_JOB_MAX_QUEUED", 100))
+ROADMAP_JOB_TTL_SECONDS = int(os.getenv("ROADMAP_JOB_TTL_SECONDS", 86400))
+
+# LLM provider behind _call_ai_model: "gemini", or "fake" for a deterministic local
+# model used in offline benchmarks and load tests (see FAKE_LLM_* below)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", 0.7))
+LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS", 8000))
+FAKE_LLM_LATENCY_SECONDS = float(os.getenv("FAKE_LLM_LATENCY_SECONDS", 0.5))
+FAKE_LLM_CHUNKS_PER_SECOND = float(os.getenv("FAKE_LLM_CHUNKS_PER_SECOND", 50))
+FAKE_LLM_CHUNK_CHARS = int(os.getenv("FAKE_LLM_CHUNK_CHARS", 40))
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", 0))
+FAKE_LLM_MALFORMED_RATE = float(os.getenv("FAKE_LLM_MALFORMED_RATE", 0))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", 0))
+
+# LLM gateway: concurrent model calls per worker process, and per-minute budgets shared
+# by all workers. Calls that would wait longer than LLM_MAX_QUEUE_WAIT_SECONDS are rejected.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 60))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 1000000))
+LLM_EXPECTED_COMPLETION_TOKENS = int(os.getenv("LLM_EXPECTED_COMPLETION_TOKENS", 2000))
+LLM_MAX_QUEUE_WAIT_SECONDS = float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", 30))
+# Retries after the first attempt for quota and transient errors
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+# "full" sends the roadmap prompt with its worked example, "compact" only the schema
+ROADMAP_PROMPT_VARIANT = os.getenv("ROADMAP_PROMPT_VARIANT", "full")
+# Request roadmaps in the model's JSON-schema mode instead of relying on the prompt alone
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "True").lower() in ("true", "1", "t")
+
+# Generated responses are kept in the database (evicting least recently used rows beyond
+# LLM_RESPONSE_STORE_MAX_BYTES) and in Redis for LLM_RESPONSE_HOT_TTL_SECONDS.
+LLM_RESPONSE_STORE_MAX_BYTES = int(os.getenv("LLM_RESPONSE_STORE_MAX_BYTES", 256 * 1024 * 1024))
+LLM_RESPONSE_HOT_TTL_SECONDS = int(os.getenv("LLM_RESPONSE_HOT_TTL_SECONDS", 3600))
+LLM_RESPONSE_WARMUP_LIMIT = int(os.getenv("LLM_RESPONSE_WARMUP_LIMIT", 5000))
+
+# Shared outbound HTTP client (keep-alive pool) for third-party APIs
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", 3))
+HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", 10))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 50))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+
+# YouTube search results are cached per normalized query for YOUTUBE_SEARCH_CACHE_TTL_SECONDS;
+# entries older than YOUTUBE_SEARCH_REFRESH_AFTER_SECONDS are served and refreshed in the background.
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+YOUTUBE_API_BASE_URL = os.getenv("YOUTUBE_API_BASE_URL", "https://www.googleapis.com/youtube/v3")
+YOUTUBE_SEARCH_CACHE_TTL_SECONDS = int(os.getenv("YOUTUBE_SEARCH_CACHE_TTL_SECONDS", 6 * 3600))
+YOUTUBE_SEARCH_REFRESH_AFTER_SECONDS = int(os.getenv("YOUTUBE_SEARCH_REFRESH_AFTER_SECONDS", 3600))
+YOUTUBE_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("YOUTUBE_SEARCH_CACHE_MAX_ENTRIES", 2000))
+
+# Video transcripts: fetched on a bounded thread pool, stored zlib-compressed in the
+# database (evicting least recently used rows beyond TRANSCRIPT_STORE_MAX_BYTES) and
+# kept decoded in a per-process LRU. Videos without a transcript are remembered for
+# TRANSCRIPT_UNAVAILABLE_TTL_SECONDS.
+TRANSCRIPT_FETCH_WORKERS = int(os.getenv("TRANSCRIPT_FETCH_WORKERS", 4))
+TRANSCRIPT_STORE_MAX_BYTES = int(os.getenv("TRANSCRIPT_STORE_MAX_BYTES", 256 * 1024 * 1024))
+TRANSCRIPT_MEMORY_CACHE_ENTRIES = int(os.getenv("TRANSCRIPT_MEMORY_CACHE_ENTRIES", 200))
+TRANSCRIPT_MEMORY_CACHE_TTL_SECONDS = int(os.getenv("TRANSCRIPT_MEMORY_CACHE_TTL_SECONDS", 3600))
+TRANSCRIPT_UNAVAILABLE_TTL_SECONDS = int(os.getenv("TRANSCRIPT_UNAVAILABLE_TTL_SECONDS", 600))
+
+# explain-video: transcripts longer than VIDEO_CHUNK_TOKENS are summarized in chunks
+# (VIDEO_SUMMARY_CONCURRENCY calls at a time per request) and the chunk summaries are
+# combined, in rounds when they exceed VIDEO_REDUCE_MAX_TOKENS
+VIDEO_CHUNK_TOKENS = int(os.getenv("VIDEO_CHUNK_TOKENS", 3000))
+VIDEO_SUMMARY_CONCURRENCY = int(os.getenv("VIDEO_SUMMARY_CONCURRENCY", 4))
+VIDEO_REDUCE_MAX_TOKENS = int(os.getenv("VIDEO_REDUCE_MAX_TOKENS", 6000))
+
+# Questions about long videos are answered from the VIDEO_INDEX_TOP_K transcript windows
+# (of about VIDEO_INDEX_WINDOW_TOKENS) that best match them; BM25 indexes for the last
+# VIDEO_INDEX_CACHE_ENTRIES videos are kept per process
+VIDEO_INDEX_WINDOW_TOKENS = int(os.getenv("VIDEO_INDEX_WINDOW_TOKENS", 300))
+VIDEO_INDEX_TOP_K = int(os.getenv("VIDEO_INDEX_TOP_K", 6))
+VIDEO_INDEX_CACHE_ENTRIES = int(os.getenv("VIDEO_INDEX_CACHE_ENTRIES", 100))
+
+# Finished explain-video answers are cached (Redis plus a per-process LRU) for
+# EXPLAIN_CACHE_TTL_SECONDS. Every EXPLAIN_PRECOMPUTE_INTERVAL_SECONDS the default summary
+# is generated for the EXPLAIN_PRECOMPUTE_TOP_VIDEOS most requested videos with at least
+# EXPLAIN_PRECOMPUTE_MIN_REQUESTS requests; 0 disables precomputing.
+EXPLAIN_CACHE_TTL_SECONDS = int(os.getenv("EXPLAIN_CACHE_TTL_SECONDS", 7 * 86400))
+EXPLAIN_CACHE_LOCAL_ENTRIES = int(os.getenv("EXPLAIN_CACHE_LOCAL_ENTRIES", 1000))
+EXPLAIN_PRECOMPUTE_INTERVAL_SECONDS = int(os.getenv("EXPLAIN_PRECOMPUTE_INTERVAL_SECONDS", 600))
+EXPLAIN_PRECOMPUTE_TOP_VIDEOS = int(os.getenv("EXPLAIN_PRECOMPUTE_TOP_VIDEOS", 20))
+EXPLAIN_PRECOMPUTE_MIN_REQUESTS = int(os.getenv("EXPLAIN_PRECOMPUTE_MIN_REQUESTS", 3))
+
+# Redis settings
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_DB = int(os.getenv("REDIS_DB", 0))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+REDIS_BREAKER_FAILURES = int(os.getenv("REDIS_BREAKER_FAILURES", 3))
+REDIS_BREAKER_RESET_SECONDS = float(os.getenv("REDIS_BREAKER_RESET_SECONDS", 30))
+
+# Token blocklist index: workers learn about new revocations over this Redis channel,
+# or by polling the token_blocklist table when Redis is unavailable.
+JTI_BLOCKLIST_CHANNEL = os.getenv("JTI_BLOCKLIST_CHANNEL", "token_blocklist")
+JTI_BLOCKLIST_POLL_SECONDS = int(os.getenv("JTI_BLOCKLIST_POLL_SECONDS", 5))
+JTI_BLOCKLIST_PRUNE_SECONDS = int(os.getenv("JTI_BLOCKLIST_PRUNE_SECONDS", 3600))
+
+# Authenticated user cache used by get_current_user
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 60))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", 10000))
 
 # Mail settings
 MAIL_USERNAME = os.getenv("MAIL_USERNAME")
@@ -23,3 +144,11 @@ MAIL_SERVER = os.getenv("MAIL_SERVER")
 MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "True").lower() in ("true", "1", "t")
 MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS", "False").lower() in ("true", "1", "t")
 USE_CREDENTIALS = os.getenv("USE_CREDENTIALS", "True").lower() in ("true", "1", "t")
+
+# Database connection pool settings (applied per worker process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() in ("true", "1", "t")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))
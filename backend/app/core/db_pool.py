@@ -0,0 +1,114 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core import config
+from app.core.metrics import LatencyStats, register_provider
+
+# ASGI scope of the request being served, set by the middleware in main.py so that
+# connection hold time can be attributed to the route that checked the connection out.
+current_request_scope: contextvars.ContextVar = contextvars.ContextVar("current_request_scope", default=None)
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self.checkout_wait = LatencyStats()
+        self._lock = threading.Lock()
+        self._hold_by_route = defaultdict(LatencyStats)
+
+    def observe_hold(self, route: str, seconds: float):
+        with self._lock:
+            stats = self._hold_by_route[route]
+        stats.observe(seconds)
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        data = {"checkout_wait": self.checkout_wait.summary()}
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        with self._lock:
+            routes = dict(self._hold_by_route)
+        data["hold_time_by_route"] = {route: stats.summary() for route, stats in routes.items()}
+        return data
+
+class _CheckoutTimingMixin:
+    metrics: PoolMetrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.checkout_wait.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same metrics
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _route_label(scope) -> str:
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "unknown")
+    return f"{scope.get('method', '')} {path}".strip()
+
+def engine_options(url, is_async: bool) -> dict:
+    """Keyword arguments for create_engine / create_async_engine built from app.core.config."""
+    if url.get_backend_name() != "postgresql":
+        # SQLite (tests, benchmarks) keeps SQLAlchemy's default pool for its driver
+        return {}
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+    if config.DB_STATEMENT_TIMEOUT_MS > 0:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(config.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def instrument(engine, name: str) -> PoolMetrics:
+    """Attach checkout/checkin listeners to a sync engine and expose its pool under /metrics."""
+    metrics = PoolMetrics(name)
+    metrics.engine = engine
+    if isinstance(engine.pool, _CheckoutTimingMixin):
+        engine.pool.metrics = metrics
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checkout_at"] = time.perf_counter()
+        connection_record.info["request_scope"] = current_request_scope.get()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checkout_at = connection_record.info.pop("checkout_at", None)
+        scope = connection_record.info.pop("request_scope", None)
+        if checkout_at is not None:
+            metrics.observe_hold(_route_label(scope), time.perf_counter() - checkout_at)
+
+    register_provider(f"db_pool_{name}", metrics.snapshot)
+    return metrics
@@ -0,0 +1,30 @@
+from typing import Optional
+
+import httpx
+
+from app.core import config
+
+class SharedHTTPClient:
+    """One pooled httpx.AsyncClient per process for outbound API calls, created on first use."""
+
+    def __init__(self, connect_timeout: float, read_timeout: float, max_connections: int, max_keepalive: int):
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+http_client = SharedHTTPClient(
+    config.HTTP_CONNECT_TIMEOUT_SECONDS,
+    config.HTTP_READ_TIMEOUT_SECONDS,
+    config.HTTP_MAX_CONNECTIONS,
+    config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+)
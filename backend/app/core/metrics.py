@@ -0,0 +1,50 @@
+import threading
+from collections import deque
+from typing import Callable, Dict
+
+# In-process metrics. Each subsystem registers a snapshot provider under a section
+# name and the /metrics endpoint returns all sections. Values are per worker.
+
+_providers: Dict[str, Callable[[], dict]] = {}
+
+def register_provider(name: str, provider: Callable[[], dict]):
+    _providers[name] = provider
+
+def snapshot() -> dict:
+    return {name: provider() for name, provider in _providers.items()}
+
+class LatencyStats:
+    """Thread-safe running latency summary with percentiles over a recent window."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self._recent.append(seconds)
+
+    def summary(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total, worst = self.count, self.total, self.max
+
+        def pct(p):
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))] * 1000, 3)
+
+        return {
+            "count": count,
+            "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(worst * 1000, 3),
+        }
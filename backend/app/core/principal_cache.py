@@ -0,0 +1,45 @@
+from typing import Optional
+
+from app.core import config
+from app.core.blocklist import blocklist_sync
+from app.core.cache import TTLCache
+from app.core.metrics import register_provider
+import app.schemas as schemas
+
+class PrincipalCache:
+    """
+    Short-lived cache of authenticated users for get_current_user.
+
+    Principals are keyed by user id. Legacy tokens without a "uid" claim are mapped
+    to the user id through their JTI. Invalidating a user drops it for every token
+    it holds with a single pop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._user_ids = TTLCache(maxsize, ttl)
+        self._principals = TTLCache(maxsize, ttl)
+
+    def get(self, jti: str, user_id: Optional[int] = None) -> Optional[schemas.AuthenticatedUser]:
+        if user_id is None:
+            user_id = self._user_ids.get(jti)
+            if user_id is None:
+                return None
+        return self._principals.get(user_id)
+
+    def put(self, principal: schemas.AuthenticatedUser, jti: Optional[str] = None):
+        if jti is not None:
+            self._user_ids.set(jti, principal.id)
+        self._principals.set(principal.id, principal)
+
+    def invalidate_user(self, user_id: int):
+        self._principals.pop(user_id)
+
+    def stats(self) -> dict:
+        return self._principals.stats()
+
+principal_cache = PrincipalCache(config.PRINCIPAL_CACHE_MAX_ENTRIES, config.PRINCIPAL_CACHE_TTL_SECONDS)
+
+# invalidations published by other workers (email verified, account deleted)
+blocklist_sync.add_handler("user", principal_cache.invalidate_user)
+
+register_provider("principal_cache", principal_cache.stats)
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core import config
+from app.core.metrics import register_provider
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and stays open for
+    `reset_seconds`; after that a single call is let through as a probe, and the
+    breaker closes or re-opens with its outcome. A probe that never reports back is
+    replaced by another after `reset_seconds`.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open":
+            return False
+        now = time.monotonic()
+        if self.probe_started_at is not None and now - self.probe_started_at < self.reset_seconds:
+            return False  # another caller's probe is still out
+        self.probe_started_at = now
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            # a failed half-open probe re-opens the breaker for another full period
+            self.opened_at = time.monotonic()
+        self.probe_started_at = None
+
+class AsyncRedisCache:
+    """
+    Shared async Redis client for caches. The connection pool is created lazily and
+    reconnects on demand, so a Redis outage at startup only disables caching until
+    Redis is back. Every call is bounded by a timeout and guarded by a circuit
+    breaker; failures degrade to a cache miss instead of raising.
+    """
+
+    def __init__(self):
+        self._client = None
+        self.breaker = CircuitBreaker(config.REDIS_BREAKER_FAILURES, config.REDIS_BREAKER_RESET_SECONDS)
+        self.counters = {"calls": 0, "errors": 0, "skipped": 0}
+
+    def client(self) -> Optional[aioredis.Redis]:
+        """The underlying client, or None while the breaker is open."""
+        if self.breaker.state == "open":
+            return None
+        if self._client is None:
+            pool = aioredis.ConnectionPool(
+                host=config.REDIS_HOST,
+                port=config.REDIS_PORT,
+                db=config.REDIS_DB,
+                max_connections=config.REDIS_MAX_CONNECTIONS,
+                socket_timeout=config.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=config.REDIS_SOCKET_TIMEOUT,
+                decode_responses=True,
+            )
+            self._client = aioredis.Redis(connection_pool=pool)
+        return self._client
+
+    async def call(self, method: str, *args, **kwargs):
+        client = self.client() if self.breaker.allow() else None
+        if client is None:
+            self.counters["skipped"] += 1
+            return None
+        self.counters["calls"] += 1
+        try:
+            result = await asyncio.wait_for(getattr(client, method)(*args, **kwargs), config.REDIS_SOCKET_TIMEOUT)
+        except (redis.exceptions.RedisError, asyncio.TimeoutError, OSError) as e:
+            self.counters["errors"] += 1
+            self.breaker.record_failure()
+            logger.warning(f"Redis {method} failed ({self.breaker.state}): {e}")
+            return None
+        self.breaker.record_success()
+        return result
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.call("get", key)
+
+    async def setex(self, key: str, ttl: int, value: str):
+        return await self.call("setex", key, ttl, value)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {"breaker": self.breaker.state, **self.counters}
+
+redis_cache = AsyncRedisCache()
+
+register_provider("redis_cache", redis_cache.stats)
@@ -1,12 +1,24 @@
 
+import asyncio
+import threading
+import time
 import uuid
 import re
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from app.core.config import SECRET_KEY, ALGORITHM, REFRESH_TOKEN_EXPIRE_DAYS, EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS
+from app.core.config import (
+    SECRET_KEY, ALGORITHM, REFRESH_TOKEN_EXPIRE_DAYS, EMAIL_VERIFICATION_TOKEN_EXPIRE_HOURS,
+    BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+)
+from app.core.metrics import LatencyStats, register_provider
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the password hashing queue is full; surfaced to clients as a 503."""
+    pass
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -14,6 +26,39 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# bcrypt is deliberately slow; run it on its own small pool so a login burst can
+# neither block the event loop nor take over the shared request threadpool.
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_lock = threading.Lock()
+_hash_stats = {"pending": 0, "rejected": 0}
+_hash_wait = LatencyStats()
+
+async def _run_in_hash_pool(fn, *args):
+    with _hash_lock:
+        if _hash_stats["pending"] >= PASSWORD_HASH_MAX_PENDING:
+            _hash_stats["rejected"] += 1
+            raise PasswordHasherBusyError("Too many password hashing requests in progress")
+        _hash_stats["pending"] += 1
+    queued_at = time.perf_counter()
+
+    def run():
+        _hash_wait.observe(time.perf_counter() - queued_at)
+        return fn(*args)
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, run)
+    finally:
+        with _hash_lock:
+            _hash_stats["pending"] -= 1
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_in_hash_pool(get_password_hash, password)
+
+register_provider("password_hashing", lambda: {**_hash_stats, "queue_wait": _hash_wait.summary()})
+
 def is_password_strong_enough(password: str) -> bool:
     if len(password) < 8:
         return False
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+import uuid
+from collections import Counter
+from typing import Any, Awaitable, Callable, Optional
+
+import redis
+
+from app.core import config
+from app.core.metrics import register_provider
+from app.core.redis_client import redis_cache
+
+logger = logging.getLogger(__name__)
+
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+class SingleFlightError(Exception):
+    """Raised to callers that waited for another worker's call when that call failed."""
+    pass
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key onto one in-flight call.
+
+    Within a worker, callers share an asyncio task, so a caller that disconnects does
+    not cancel the work for the others; the call is only cancelled with its last
+    caller. Across workers, the first caller takes a Redis lock and publishes its
+    JSON-serializable result on a per-key channel; the others wait for it, and after
+    `wait_seconds` fall back to running the call themselves. When the leader fails,
+    its waiters raise SingleFlightError rather than all retrying at once; when it is
+    cancelled, the next waiter to take the lock runs the call.
+    """
+
+    def __init__(self, name: str, lock_seconds: int, wait_seconds: int):
+        self.name = name
+        self.lock_seconds = lock_seconds
+        self.wait_seconds = wait_seconds
+        self._inflight = {}
+        self._waiters = Counter()
+        self.counters = {"leaders": 0, "coalesced_local": 0, "coalesced_remote": 0, "wait_timeouts": 0,
+                         "abandoned": 0, "leader_errors": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], load_cached: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._distributed(key, fn, load_cached))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.counters["coalesced_local"] += 1
+        self._waiters[task] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                # Nobody is left to use the result
+                self.counters["abandoned"] += 1
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    async def _distributed(self, key, fn, load_cached):
+        lock_key = f"singleflight:{self.name}:lock:{key}"
+        channel = f"singleflight:{self.name}:done:{key}"
+        while True:
+            client = redis_cache.client()
+            if client is None:
+                break
+            token = uuid.uuid4().hex
+            if await redis_cache.call("set", lock_key, token, nx=True, ex=self.lock_seconds):
+                return await self._lead(fn, lock_key, channel, token)
+            outcome = await self._wait_for_leader(client, lock_key, channel, load_cached)
+            if outcome is None:
+                break
+            if "retry" in outcome:
+                continue  # the lock is free: try to take it rather than run the call unlocked
+            if "result" in outcome:
+                self.counters["coalesced_remote"] += 1
+                return outcome["result"]
+            if "error" in outcome:
+                self.counters["leader_errors"] += 1
+                raise SingleFlightError(f"In-flight {self.name} call failed with {outcome['error']}")
+            # The leader was cancelled: whoever takes the lock next runs the call
+        self.counters["leaders"] += 1
+        return await fn()
+
+    async def _lead(self, fn, lock_key, channel, token):
+        self.counters["leaders"] += 1
+        outcome = {"cancelled": True}
+        try:
+            result = await fn()
+            outcome = {"result": result}
+            return result
+        except Exception as e:
+            outcome = {"error": type(e).__name__}
+            raise
+        finally:
+            # Released first, so waiters retrying after a cancellation find the lock free
+            await redis_cache.call("eval", _RELEASE_LOCK, 1, lock_key, token)
+            await redis_cache.call("publish", channel, json.dumps(outcome))
+
+    async def _wait_for_leader(self, client, lock_key, channel, load_cached):
+        """
+        The leader's outcome ({"result"}, {"error"} or {"cancelled"}), {"retry"} when there
+        is no leader (anymore) to wait for, or None to run the call locally.
+        """
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(channel)
+            # The leader may have finished between our lock attempt and the subscribe
+            if load_cached is not None:
+                cached = await load_cached()
+                if cached is not None:
+                    return {"result": cached}
+            if not await redis_cache.call("exists", lock_key):
+                return {"retry": True}
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.wait_seconds
+            while (remaining := deadline - loop.time()) > 0:
+                message = await pubsub.get_message(timeout=min(remaining, 1.0))
+                if message and message.get("type") == "message":
+                    return json.loads(message["data"])
+            self.counters["wait_timeouts"] += 1
+            logger.warning(f"Timed out waiting for in-flight {self.name} call, running it locally")
+        except (redis.exceptions.RedisError, OSError, ValueError) as e:
+            logger.warning(f"Single-flight wait for {self.name} failed: {e}")
+        finally:
+            try:
+                await pubsub.aclose()
+            except (redis.exceptions.RedisError, OSError):
+                pass
+        if load_cached is not None:
+            cached = await load_cached()
+            if cached is not None:
+                return {"result": cached}
+        return None
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._inflight), **self.counters}
+
+roadmap_flights = SingleFlight("roadmap", config.SINGLEFLIGHT_LOCK_SECONDS, config.SINGLEFLIGHT_WAIT_SECONDS)
+
+register_provider("singleflight_roadmap", roadmap_flights.stats)
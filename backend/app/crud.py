@@ -1,7 +1,12 @@
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session, load_only, selectinload
 import app.models as models
 import app.schemas as schemas
 from app.core.security import get_password_hash
+from app.core.blocklist import blocklist_index, blocklist_sync
+from app.core.principal_cache import principal_cache
+from collections import defaultdict
+from datetime import datetime
 import hashlib
 import logging
 
@@ -11,6 +16,12 @@ def get_user_by_email(db: Session, email: str):
     email_hash = hashlib.sha256(email.encode()).hexdigest()
     return db.query(models.User).filter(models.User.email_hash == email_hash).first()
 
+def get_user_for_auth(db: Session, user_id: int):
+    # Skips the encrypted email column so no decrypt happens on load
+    return db.query(models.User).options(
+        load_only(models.User.id, models.User.username, models.User.is_email_verified)
+    ).filter(models.User.id == user_id).first()
+
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
 
@@ -23,10 +34,15 @@ def create_user(db: Session, user: schemas.UserCreate):
     logger.info(f"User created: {db_user.email} (ID: {db_user.id})")
     return db_user
 
+def invalidate_cached_user(user_id: int):
+    principal_cache.invalidate_user(user_id)
+    blocklist_sync.publish("user", user_id)
+
 def set_user_email_verified(db: Session, user: models.User):
     user.is_email_verified = True
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user.id)
     logger.info(f"User email verified: {user.email} (ID: {user.id})")
     return user
 
@@ -40,6 +56,7 @@ def delete_user_data(db: Session, user_id: int):
     if user:
         db.delete(user)
         db.commit()
+        invalidate_cached_user(user_id)
         logger.info(f"User and associated data deleted for user ID: {user_id}")
         return True
     return False
@@ -96,9 +113,32 @@ def get_subtopic(db: Session, subtopic_id: int):
 def get_subtopics_by_topic(db: Session, topic_id: int):
     return db.query(models.Subtopic).filter(models.Subtopic.topic_id == topic_id).all()
 
+def _roadmap_id_for_subtopic(db: Session, subtopic_id: int):
+    return db.scalar(select(models.Topic.roadmap_id).join(models.Subtopic).where(models.Subtopic.id == subtopic_id))
+
+def _adjust_skill_counts(db: Session, subtopic_id: int, total: int = 0, status: str | None = None, old_status: str | None = None):
+    # Counts are changed with SQL increments in the caller's transaction, so concurrent
+    # updates to skills of the same roadmap cannot lose each other's changes
+    completed = (status == "completed") - (old_status == "completed")
+    in_progress = (status == "in_progress") - (old_status == "in_progress")
+    if not (total or completed or in_progress):
+        return
+    roadmap_id = _roadmap_id_for_subtopic(db, subtopic_id)
+    if roadmap_id is None:
+        return
+    db.execute(
+        update(models.Roadmap).where(models.Roadmap.id == roadmap_id).values(
+            total_skills=models.Roadmap.total_skills + total,
+            completed_skills=models.Roadmap.completed_skills + completed,
+            in_progress_skills=models.Roadmap.in_progress_skills + in_progress,
+        )
+    )
+
 def create_skill(db: Session, skill: schemas.SkillCreate, subtopic_id: int):
     db_skill = models.Skill(**skill.dict(), subtopic_id=subtopic_id)
     db.add(db_skill)
+    db.flush()
+    _adjust_skill_counts(db, subtopic_id, total=1, status=db_skill.status)
     db.commit()
     db.refresh(db_skill)
     return db_skill
@@ -121,75 +161,130 @@ def update_skill(db: Session, skill_id: int, skill: schemas.SkillCreate):
     return db_skill
 
 def update_skill_status(db: Session, skill_id: int, status: str):
-    db_skill = get_skill(db, skill_id)
-    if db_skill:
-        db_skill.status = status
-        db.commit()
-        db.refresh(db_skill)
-    return db_skill
+    # Compare-and-set on the status that was read: when two requests change the same
+    # skill at once, only the one whose UPDATE matches a row moves the counters, and the
+    # other reads the skill again
+    while True:
+        db_skill = get_skill(db, skill_id)
+        if db_skill is None or db_skill.status == status:
+            return db_skill
+        old_status = db_skill.status
+        changed = db.execute(
+            update(models.Skill)
+            .where(models.Skill.id == skill_id, models.Skill.status == old_status)
+            .values(status=status)
+        ).rowcount
+        if changed:
+            _adjust_skill_counts(db, db_skill.subtopic_id, status=status, old_status=old_status)
+            db.commit()
+            db.refresh(db_skill)
+            return db_skill
+        db.rollback()
 
 def delete_skill(db: Session, skill_id: int):
+    # Only the request whose DELETE removes the row moves the counters, with the status
+    # the row had when it was deleted; a concurrent delete of the same skill gets None
     db_skill = get_skill(db, skill_id)
-    if db_skill:
-        db.delete(db_skill)
-        db.commit()
+    if db_skill is None:
+        return None
+    deleted = db.execute(
+        delete(models.Skill)
+        .where(models.Skill.id == skill_id)
+        .returning(models.Skill.status, models.Skill.subtopic_id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if deleted is None:
+        db.rollback()
+        return None
+    _adjust_skill_counts(db, deleted.subtopic_id, total=-1, old_status=deleted.status)
+    db.expunge(db_skill)
+    db.commit()
     return db_skill
 
 def create_full_roadmap_from_ai(db: Session, ai_roadmap_data: schemas.AIGeneratedRoadmap, user_id: int, goal: str, ai_generated_content: str):
-    # Create Roadmap
-    db_roadmap = models.Roadmap(
-        title=ai_roadmap_data.title,
-        description=ai_roadmap_data.description,
-        owner_id=user_id,
-        goal=goal,
-        ai_generated_content=ai_generated_content
+    # Writes the whole Roadmap -> Topic -> Subtopic -> Skill tree with one multi-row
+    # INSERT ... VALUES statement per level, so the number of statements does not grow
+    # with the size of the roadmap (until a level exceeds INSERT_ROWS_PER_STATEMENT rows).
+    # New skills all start as not_started, so the progress counters start at the skill count.
+    topics = ai_roadmap_data.topics
+    roadmap_id = db.scalar(
+        insert(models.Roadmap).returning(models.Roadmap.id),
+        {
+            "title": ai_roadmap_data.title,
+            "description": ai_roadmap_data.description,
+            "owner_id": user_id,
+            "goal": goal,
+            "ai_generated_content": ai_generated_content,
+            "total_skills": sum(len(subtopic.skills) for topic in topics for subtopic in topic.subtopics),
+            "completed_skills": 0,
+            "in_progress_skills": 0,
+        },
     )
-    db.add(db_roadmap)
-    db.flush() # Flush to get db_roadmap.id
-
-    for topic_data in ai_roadmap_data.topics:
-        # Create Topic
-        db_topic = models.Topic(
-            name=topic_data.name,
-            description=topic_data.description,
-            roadmap_id=db_roadmap.id
-        )
-        db.add(db_topic)
-        db.flush() # Flush to get db_topic.id
 
+    topic_ids = _bulk_insert_returning_ids(db, models.Topic, models.Topic.roadmap_id, [
+        {"name": topic_data.name, "description": topic_data.description, "roadmap_id": roadmap_id}
+        for topic_data in topics
+    ])
+
+    subtopics = []
+    subtopic_rows = []
+    for topic_id, topic_data in zip(topic_ids, topics):
         for subtopic_data in topic_data.subtopics:
-            # Create Subtopic
-            db_subtopic = models.Subtopic(
-                name=subtopic_data.name,
-                description=subtopic_data.description,
-                topic_id=db_topic.id
-            )
-            db.add(db_subtopic)
-            db.flush() # Flush to get db_subtopic.id
-
-            for skill_data in subtopic_data.skills:
-                # Create Skill
-                db_skill = models.Skill(
-                    name=skill_data.name,
-                    category=skill_data.description,  # Use description as category
-                    estimated_hours=skill_data.estimated_hours,
-                    difficulty=skill_data.difficulty,
-                    subtopic_id=db_subtopic.id,
-                    status="not_started"  # Default status
-                )
-                db.add(db_skill)
-    
+            subtopics.append(subtopic_data)
+            subtopic_rows.append({"name": subtopic_data.name, "description": subtopic_data.description, "topic_id": topic_id})
+    subtopic_ids = _bulk_insert_returning_ids(db, models.Subtopic, models.Subtopic.topic_id, subtopic_rows)
+
+    skill_rows = [
+        {
+            "name": skill_data.name,
+            "category": skill_data.description,  # Use description as category
+            "estimated_hours": skill_data.estimated_hours,
+            "difficulty": skill_data.difficulty,
+            "subtopic_id": subtopic_id,
+            "status": "not_started",  # Default status
+        }
+        for subtopic_id, subtopic_data in zip(subtopic_ids, subtopics)
+        for skill_data in subtopic_data.skills
+    ]
+    for i in range(0, len(skill_rows), INSERT_ROWS_PER_STATEMENT):
+        db.execute(insert(models.Skill).values(skill_rows[i:i + INSERT_ROWS_PER_STATEMENT]))
+
     db.commit()
-    # After committing, the db_roadmap object is expired. 
-    # We need to query it again to get the fully loaded object with relationships.
-    return get_roadmap(db, db_roadmap.id)
+    return get_roadmap(db, roadmap_id)
+
+INSERT_ROWS_PER_STATEMENT = 1000  # keeps each statement under SQLite's and Postgres' bind parameter limits
+
+def _bulk_insert_returning_ids(db: Session, model, parent_column, rows: list):
+    """
+    Inserts rows with multi-row INSERT ... VALUES ... RETURNING statements and returns
+    their ids in the order of `rows`. RETURNING rows carry no guaranteed order, so ids
+    are matched back to the input by (parent id, name); rows sharing both take their
+    ids in ascending order.
+    """
+    ids_by_row = defaultdict(list)
+    for i in range(0, len(rows), INSERT_ROWS_PER_STATEMENT):
+        returned = db.execute(
+            insert(model).values(rows[i:i + INSERT_ROWS_PER_STATEMENT]).returning(model.id, parent_column, model.name)
+        )
+        for row_id, parent_id, name in returned:
+            ids_by_row[(parent_id, name)].append(row_id)
+    for ids in ids_by_row.values():
+        ids.sort(reverse=True)
+    return [ids_by_row[(row[parent_column.key], row["name"])].pop() for row in rows]
 
-def add_jti_to_blocklist(db: Session, jti: str):
-    db_jti = models.TokenBlocklist(jti=jti)
+def add_jti_to_blocklist(db: Session, jti: str, expires_at: datetime | None = None):
+    db_jti = models.TokenBlocklist(jti=jti, expires_at=expires_at)
     db.add(db_jti)
     db.commit()
     db.refresh(db_jti)
+    blocklist_index.add(jti)
+    blocklist_sync.publish("jti", jti)
     return db_jti
 
 def is_jti_blocklisted(db: Session, jti: str):
+    # The in-process index answers almost every lookup; the query only runs
+    # before it is loaded or on a Bloom filter false positive.
+    cached = blocklist_index.contains(jti)
+    if cached is not None:
+        return cached
     return db.query(models.TokenBlocklist).filter(models.TokenBlocklist.jti == jti).first() is not None
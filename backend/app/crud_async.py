@@ -0,0 +1,86 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+import app.crud as crud
+import app.models as models
+import app.schemas as schemas
+from app.core.security import get_password_hash_async
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# AsyncSession counterparts of the crud.py functions used by the async routers.
+# They keep the same names and signatures so routers can switch by module.
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    email_hash = hashlib.sha256(email.encode()).hexdigest()
+    result = await db.execute(select(models.User).filter(models.User.email_hash == email_hash))
+    return result.scalars().first()
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    hashed_password = await get_password_hash_async(user.password)
+    db_user = models.User(email=user.email, username=user.username, hashed_password=hashed_password, is_email_verified=False)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user, attribute_names=["roadmaps"])
+    logger.info(f"User created: {db_user.email} (ID: {db_user.id})")
+    return db_user
+
+async def get_roadmap(db: AsyncSession, roadmap_id: int):
+    result = await db.execute(
+        select(models.Roadmap).options(
+            selectinload(models.Roadmap.topics).selectinload(models.Topic.subtopics).selectinload(models.Subtopic.skills)
+        ).filter(models.Roadmap.id == roadmap_id)
+    )
+    return result.scalars().first()
+
+async def get_roadmaps_by_user(db: AsyncSession, user_id: int):
+    result = await db.execute(
+        select(models.Roadmap).options(
+            selectinload(models.Roadmap.topics).selectinload(models.Topic.subtopics).selectinload(models.Subtopic.skills)
+        ).filter(models.Roadmap.owner_id == user_id)
+    )
+    return result.scalars().all()
+
+async def get_roadmap_progress_by_user(db: AsyncSession, user_id: int):
+    # Served from the per-roadmap counters, without loading any skills
+    result = await db.execute(
+        select(
+            models.Roadmap.id, models.Roadmap.title, models.Roadmap.total_skills,
+            models.Roadmap.completed_skills, models.Roadmap.in_progress_skills,
+        ).filter(models.Roadmap.owner_id == user_id).order_by(models.Roadmap.id)
+    )
+    return result.all()
+
+async def get_skill_rows_by_user(db: AsyncSession, user_id: int, status: str | None = None, difficulty: str | None = None,
+                                 roadmap_id: int | None = None, after_id: int | None = None, limit: int | None = None):
+    # Only the columns the dashboard shows, as plain rows rather than ORM objects.
+    # Pages are keyed on skill id (rows after `after_id`), so deep pages cost the same as the first.
+    query = (
+        select(
+            models.Skill.id, models.Skill.name, models.Skill.category,
+            models.Skill.difficulty, models.Skill.status,
+        )
+        .join(models.Subtopic, models.Skill.subtopic_id == models.Subtopic.id)
+        .join(models.Topic, models.Subtopic.topic_id == models.Topic.id)
+        .join(models.Roadmap, models.Topic.roadmap_id == models.Roadmap.id)
+        .filter(models.Roadmap.owner_id == user_id)
+    )
+    if status is not None:
+        query = query.filter(models.Skill.status == status)
+    if difficulty is not None:
+        query = query.filter(models.Skill.difficulty == difficulty)
+    if roadmap_id is not None:
+        query = query.filter(models.Roadmap.id == roadmap_id)
+    if after_id is not None:
+        query = query.filter(models.Skill.id > after_id)
+    query = query.order_by(models.Skill.id)
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return result.all()
+
+async def create_full_roadmap_from_ai(db: AsyncSession, ai_roadmap_data: schemas.AIGeneratedRoadmap, user_id: int, goal: str, ai_generated_content: str):
+    # The bulk insert logic lives in crud; run it on the async connection rather than duplicating it.
+    return await db.run_sync(crud.create_full_roadmap_from_ai, ai_roadmap_data, user_id, goal, ai_generated_content)
@@ -1,15 +1,46 @@
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
+from app.core.db_pool import engine_options, instrument
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# DATABASE_URL may name either a sync or an async driver; derive the matching
+# URL for each engine so both can be configured from the same setting.
+_SYNC_DRIVERS = {"postgresql": "postgresql+psycopg2", "sqlite": "sqlite"}
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def _with_driver(url: str, drivers: dict) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in drivers:
+        return url
+    parsed = parsed.set(drivername=drivers[backend])
+    # psycopg2 spells the TLS option "sslmode", asyncpg spells it "ssl"
+    query = dict(parsed.query)
+    if parsed.drivername == "postgresql+asyncpg" and "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    elif parsed.drivername == "postgresql+psycopg2" and "ssl" in query:
+        query["sslmode"] = query.pop("ssl")
+    return parsed.set(query=query).render_as_string(hide_password=False)
+
+SYNC_DATABASE_URL = _with_driver(SQLALCHEMY_DATABASE_URL, _SYNC_DRIVERS)
+ASYNC_DATABASE_URL = _with_driver(SQLALCHEMY_DATABASE_URL, _ASYNC_DRIVERS)
+
+engine = create_engine(SYNC_DATABASE_URL, **engine_options(make_url(SYNC_DATABASE_URL), is_async=False))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(make_url(ASYNC_DATABASE_URL), is_async=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+instrument(engine, "sync")
+instrument(async_engine.sync_engine, "async")
+
 Base = declarative_base()
@@ -1,14 +1,20 @@
+import secrets
+
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.database import SessionLocal, AsyncSessionLocal
+from app.core import config
 from app.core.config import SECRET_KEY, ALGORITHM
+from app.core.principal_cache import principal_cache
 import app.crud as crud
 import app.schemas as schemas
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
+metrics_scheme = HTTPBearer(auto_error=False)
 
 def get_db():
     db = SessionLocal()
@@ -17,7 +23,26 @@ def get_db():
     finally:
         db.close()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> schemas.User:
+async def get_async_db() -> AsyncSession:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _resolve_principal(db: Session, payload: dict) -> schemas.AuthenticatedUser | None:
+    email = payload["sub"]
+    user_id = payload.get("uid")
+    if user_id is not None:
+        # Primary key lookup without the encrypted email column; the email comes from the token
+        user = crud.get_user_for_auth(db, user_id=user_id)
+        if user is None:
+            return None
+        return schemas.AuthenticatedUser(id=user.id, username=user.username, email=email, is_email_verified=bool(user.is_email_verified))
+    # Tokens issued before "uid" was added are resolved through the email hash
+    user = crud.get_user_by_email(db, email=email)
+    if user is None:
+        return None
+    return schemas.AuthenticatedUser.model_validate(user)
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> schemas.AuthenticatedUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -35,12 +60,17 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_email(db, email=email)
-    if user is None:
+    # Served from the principal cache when possible: no query and no email decrypt
+    principal = principal_cache.get(jti, user_id=payload.get("uid"))
+    if principal is not None:
+        return principal
+    principal = _resolve_principal(db, payload)
+    if principal is None:
         raise credentials_exception
-    return user
+    principal_cache.put(principal, jti=None if "uid" in payload else jti)
+    return principal
 
-def get_current_active_user(current_user: schemas.User = Depends(get_current_user)):
+def get_current_active_user(current_user: schemas.AuthenticatedUser = Depends(get_current_user)):
     if not current_user.is_email_verified:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Please verify your email address")
     return current_user
@@ -63,7 +93,18 @@ def get_current_user_from_refresh_token(token: str = Depends(oauth2_scheme), db:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_email(db, email=email)
+    user = _resolve_principal(db, payload)
     if user is None:
         raise credentials_exception
     return user
+
+def require_metrics_token(credentials: HTTPAuthorizationCredentials | None = Depends(metrics_scheme)):
+    # Metrics expose internals (pools, token spend, cache versions), so they are for operators only
+    if not config.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials, config.METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
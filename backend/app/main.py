@@ -1,30 +1,95 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 logging.basicConfig(level=logging.INFO)
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware # Added import
 from app.routers import auth, users, roadmaps, dashboard, ai
 from app.services import ai_learning
+from app.services.roadmap_jobs import roadmap_jobs
+from app.services.ai_service_updated import warm_up_response_store
+from app.services.explanation_cache import precompute_popular_summaries
 import app.models as models
-from app.database import engine
-from app.core.config import CORS_ORIGINS
+from app.database import engine, async_engine, SessionLocal
 from app.core.limiter import limiter # Import the shared limiter instance
+from app.core import metrics
+from app.dependencies import require_metrics_token
+from app.core.db_pool import current_request_scope
+from app.core.security import PasswordHasherBusyError
+from app.core.redis_client import redis_cache
+from app.core.http_client import http_client
+from app.services.llm_gateway import LLMCapacityError
+from app.core.blocklist import blocklist_index, blocklist_sync, prune_periodically
+from app.core.config import (
+    CORS_ORIGINS, JTI_BLOCKLIST_PRUNE_SECONDS,
+    EXPLAIN_PRECOMPUTE_INTERVAL_SECONDS, EXPLAIN_PRECOMPUTE_TOP_VIDEOS, EXPLAIN_PRECOMPUTE_MIN_REQUESTS
+)
 
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with SessionLocal() as db:
+        blocklist_index.load(db)
+    blocklist_sync.start()
+    prune_task = asyncio.create_task(prune_periodically(JTI_BLOCKLIST_PRUNE_SECONDS))
+    roadmap_jobs.start()
+    warm_up_task = asyncio.create_task(warm_up_response_store())
+    precompute_task = None
+    if EXPLAIN_PRECOMPUTE_INTERVAL_SECONDS > 0:
+        precompute_task = asyncio.create_task(precompute_popular_summaries(
+            EXPLAIN_PRECOMPUTE_INTERVAL_SECONDS, EXPLAIN_PRECOMPUTE_TOP_VIDEOS, EXPLAIN_PRECOMPUTE_MIN_REQUESTS
+        ))
+    yield
+    await roadmap_jobs.stop()
+    warm_up_task.cancel()
+    if precompute_task is not None:
+        precompute_task.cancel()
+    prune_task.cancel()
+    blocklist_sync.stop()
+    await redis_cache.close()
+    await http_client.close()
+    await async_engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication service is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.exception_handler(LLMCapacityError)
+async def llm_capacity_handler(request: Request, exc: LLMCapacityError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "5"},
+    )
+
 # Set default limits on the imported limiter instance
 limiter.default_limits = ["100/minute"]
 
 app.add_middleware(SlowAPIMiddleware)
 
+@app.middleware("http")
+async def track_request_scope(request: Request, call_next):
+    token = current_request_scope.set(request.scope)
+    try:
+        return await call_next(request)
+    finally:
+        current_request_scope.reset(token)
+
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
     response = await call_next(request)
@@ -58,4 +123,8 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)])
+def read_metrics():
+    return metrics.snapshot()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, CheckConstraint, DateTime, event
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, CheckConstraint, DateTime, LargeBinary, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -32,6 +32,10 @@ class Roadmap(Base):
     goal = Column(Text, index=True, nullable=True) # Add goal field
     owner_id = Column(Integer, ForeignKey("users.id"))
     ai_generated_content = Column(Text, nullable=True)
+    # Skill counts by status, kept up to date by the skill crud functions for the dashboard
+    total_skills = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_skills = Column(Integer, nullable=False, default=0, server_default="0")
+    in_progress_skills = Column(Integer, nullable=False, default=0, server_default="0")
 
     owner = relationship("User", back_populates="roadmaps")
     topics = relationship("Topic", back_populates="roadmap")
@@ -94,3 +98,26 @@ class TokenBlocklist(Base):
     id = Column(Integer, primary_key=True, index=True)
     jti = Column(String, nullable=False, index=True)
     created_at = Column(DateTime, server_default=func.now())
+    expires_at = Column(DateTime, nullable=True, index=True) # Row can be pruned once the token has expired
+
+class LLMResponse(Base):
+    __tablename__ = "llm_responses"
+
+    key = Column(String, primary_key=True) # Hash of normalized prompt, model and temperature
+    model = Column(String, nullable=False)
+    normalized_prompt = Column(Text, nullable=False)
+    response = Column(Text, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+    last_used_at = Column(DateTime, server_default=func.now(), index=True)
+
+class VideoTranscript(Base):
+    __tablename__ = "video_transcripts"
+
+    video_id = Column(String, primary_key=True)
+    data = Column(LargeBinary, nullable=False) # zlib-compressed JSON list of {text, start, duration} segments
+    size_bytes = Column(Integer, nullable=False) # Compressed size
+    segments = Column(Integer, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+    last_used_at = Column(DateTime, server_default=func.now(), index=True)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import timedelta
+from datetime import datetime, timedelta
 from jose import jwt
 import logging
  
@@ -10,10 +11,11 @@ from app.core.mail import conf
 
 import app.schemas as schemas
 import app.crud as crud
-from app.dependencies import get_db, get_current_user_from_refresh_token, get_current_active_user, get_current_user
+import app.crud_async as crud_async
+from app.dependencies import get_db, get_async_db, get_current_user_from_refresh_token, get_current_active_user, get_current_user
 from app.core.limiter import limiter # Import the shared limiter instance
 from app.core.security import (
-    create_access_token, create_refresh_token, verify_password,
+    create_access_token, create_refresh_token, verify_password_async,
     create_email_verification_token, verify_email_verification_token,
     is_password_strong_enough
 )
@@ -40,15 +42,15 @@ async def send_verification_email(email: str, token: str):
     await fm.send_message(message)
 
 @router.post("/register", response_model=schemas.TokenWithUser)
-async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user_by_email = crud.get_user_by_email(db, email=user.email)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user_by_email = await crud_async.get_user_by_email(db, email=user.email)
     if db_user_by_email:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     if not is_password_strong_enough(user.password):
         raise HTTPException(status_code=400, detail="Password is not strong enough. It must be at least 8 characters long and contain at least one uppercase letter, one lowercase letter, one digit, and one special character.")
 
-    new_user = crud.create_user(db=db, user=user)
+    new_user = await crud_async.create_user(db=db, user=user)
     
     # Send verification email
     verification_token = create_email_verification_token(email=new_user.email)
@@ -56,9 +58,9 @@ async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db))
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": new_user.email}, expires_delta=access_token_expires
+        data={"sub": new_user.email, "uid": new_user.id}, expires_delta=access_token_expires
     )
-    refresh_token = create_refresh_token(data={"sub": new_user.email})
+    refresh_token = create_refresh_token(data={"sub": new_user.email, "uid": new_user.id})
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -68,9 +70,9 @@ async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db))
 
 @router.post("/login", response_model=schemas.TokenWithUser)
 @limiter.limit("5/10minute")
-def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await crud_async.get_user_by_email(db, email=form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         logger.warning(f"Failed login attempt for user: {form_data.username} from IP: {request.client.host}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -79,21 +81,23 @@ def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestFor
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id}, expires_delta=access_token_expires
     )
-    refresh_token = create_refresh_token(data={"sub": user.email})
+    refresh_token = create_refresh_token(data={"sub": user.email, "uid": user.id})
+    # Relationships cannot lazy-load on an AsyncSession, so fetch the roadmap tree eagerly
+    roadmaps = await crud_async.get_roadmaps_by_user(db, user.id)
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
         "token_type": "bearer",
-        "user": user
+        "user": {**schemas.AuthenticatedUser.model_validate(user).model_dump(), "roadmaps": roadmaps}
     }
 
 @router.post("/refresh", response_model=schemas.Token)
-def refresh_access_token(current_user: schemas.User = Depends(get_current_user_from_refresh_token)):
+def refresh_access_token(current_user: schemas.AuthenticatedUser = Depends(get_current_user_from_refresh_token)):
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     new_access_token = create_access_token(
-        data={"sub": current_user.email}, expires_delta=access_token_expires
+        data={"sub": current_user.email, "uid": current_user.id}, expires_delta=access_token_expires
     )
     return {
         "access_token": new_access_token,
@@ -108,14 +112,16 @@ def logout(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
         jti = payload.get("jti")
         if not jti:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
-        crud.add_jti_to_blocklist(db, jti)
+        exp = payload.get("exp")
+        expires_at = datetime.utcfromtimestamp(exp) if exp else None
+        crud.add_jti_to_blocklist(db, jti, expires_at=expires_at)
         return {"message": "Successfully logged out"}
     except jwt.JWTError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
 
 @router.post("/request-verification-email")
 @limiter.limit("1/minute")
-async def request_verification_email(request: Request, current_user: schemas.User = Depends(get_current_user)):
+async def request_verification_email(request: Request, current_user: schemas.AuthenticatedUser = Depends(get_current_user)):
     if current_user.is_email_verified:
         logger.info(f"User {current_user.email} requested verification email, but email is already verified.")
         raise HTTPException(status_code=400, detail="Email is already verified")
@@ -148,5 +154,6 @@ def verify_email(request: Request, token: str, db: Session = Depends(get_db)):
     return {"message": "Email successfully verified"}
 
 @router.get("/me", response_model=schemas.User)
-def read_users_me(current_user: schemas.User = Depends(get_current_active_user)):
-    return current_user
+def read_users_me(current_user: schemas.AuthenticatedUser = Depends(get_current_active_user), db: Session = Depends(get_db)):
+    # The cached principal carries no relationships, so load the roadmaps explicitly
+    return {**current_user.model_dump(), "roadmaps": crud.get_roadmaps_by_user(db, current_user.id)}
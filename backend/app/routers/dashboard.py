@@ -1,57 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.dependencies import get_db, get_current_active_user
-from app.schemas import User, DashboardResponse
+from app.dependencies import get_db, get_async_db, get_current_active_user
+from app.schemas import User, DashboardResponse, DashboardSummary, SkillPage
 import app.models as models
-import app.crud as crud
+import app.crud_async as crud_async
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Dashboard"])
 
-@router.get("/dashboard", response_model=DashboardResponse)
-async def get_dashboard(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    print(f"Dashboard API called for user: {current_user.id} ({current_user.username})")
-    # Fetch all roadmaps for the user
-    roadmaps_from_db = crud.get_roadmaps_by_user(db, current_user.id)
-    print(f"Found {len(roadmaps_from_db)} roadmaps for user")
-    
+def _skill_response(skill) -> dict:
+    return {
+        "skill_id": skill.id,
+        "name": skill.name,
+        "category": skill.category,
+        "difficulty": skill.difficulty,
+        "status": skill.status,
+        "due_date": None, # Placeholder
+    }
+
+async def _dashboard_summary(current_user: User, db: AsyncSession) -> dict:
+    # Progress comes from the per-roadmap skill counters; no skill tree is loaded
+    roadmap_rows = await crud_async.get_roadmap_progress_by_user(db, current_user.id)
+
     roadmaps_progress = []
     total_skills = 0
     completed_skills = 0
-    all_skills = []
+    in_progress_skills = 0
 
-    for roadmap in roadmaps_from_db:
-        roadmap_total_skills = 0
-        roadmap_completed_skills = 0
-        for topic in roadmap.topics:
-            for subtopic in topic.subtopics:
-                roadmap_total_skills += len(subtopic.skills)
-                for skill in subtopic.skills:
-                    all_skills.append({
-                        "skill_id": skill.id,
-                        "name": skill.name,
-                        "category": skill.category,
-                        "difficulty": skill.difficulty,
-                        "status": skill.status,
-                        "due_date": None, # Placeholder
-                    })
-                    if skill.status == "completed":
-                        roadmap_completed_skills += 1
-        
-        progress = (roadmap_completed_skills / roadmap_total_skills * 100) if roadmap_total_skills > 0 else 0
+    for roadmap in roadmap_rows:
+        progress = (roadmap.completed_skills / roadmap.total_skills * 100) if roadmap.total_skills > 0 else 0
         roadmaps_progress.append({
             "id": roadmap.id,
             "title": roadmap.title,
             "progress": progress,
-            "total_skills": roadmap_total_skills,
-            "completed_skills": roadmap_completed_skills
+            "total_skills": roadmap.total_skills,
+            "completed_skills": roadmap.completed_skills
         })
-        total_skills += roadmap_total_skills
-        completed_skills += roadmap_completed_skills
+        total_skills += roadmap.total_skills
+        completed_skills += roadmap.completed_skills
+        in_progress_skills += roadmap.in_progress_skills
 
     overall_progress_percent = (completed_skills / total_skills * 100) if total_skills > 0 else 0
 
-    response_data = {
+    return {
         "user_id": current_user.id,
         "username": current_user.username,
         "roadmaps": roadmaps_progress,
@@ -59,15 +55,44 @@ async def get_dashboard(current_user: User = Depends(get_current_active_user), d
             "total_skills": total_skills,
             "completed_skills": completed_skills,
             "pending_skills": total_skills - completed_skills, # Simplified pending skills
-            "not_started_skills": 0, # This metric might need re-evaluation
+            "not_started_skills": total_skills - completed_skills - in_progress_skills,
             "progress_percent": overall_progress_percent
         },
-        "skills": all_skills
     }
 
-    print(f"Dashboard response: total_skills={total_skills}, completed_skills={completed_skills}, skills_count={len(all_skills)}")
+@router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard(current_user: User = Depends(get_current_active_user), db: AsyncSession = Depends(get_async_db)):
+    """Summary plus every skill in one payload; prefer /dashboard/summary and /dashboard/skills."""
+    response_data = await _dashboard_summary(current_user, db)
+    response_data["skills"] = [
+        _skill_response(skill) for skill in await crud_async.get_skill_rows_by_user(db, current_user.id)
+    ]
+    stats = response_data["dashboard_stats"]
+    logger.debug(f"Dashboard for user {current_user.id}: total_skills={stats['total_skills']}, completed_skills={stats['completed_skills']}, skills_count={len(response_data['skills'])}")
     return response_data
 
+@router.get("/dashboard/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(current_user: User = Depends(get_current_active_user), db: AsyncSession = Depends(get_async_db)):
+    return await _dashboard_summary(current_user, db)
+
+@router.get("/dashboard/skills", response_model=SkillPage)
+async def get_dashboard_skills(
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    skill_status: Optional[str] = Query(None, alias="status"),
+    difficulty: Optional[str] = None,
+    roadmap_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Fetch one extra row to learn whether another page exists
+    rows = await crud_async.get_skill_rows_by_user(
+        db, current_user.id, status=skill_status, difficulty=difficulty, roadmap_id=roadmap_id,
+        after_id=cursor, limit=limit + 1,
+    )
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return {"items": [_skill_response(skill) for skill in rows[:limit]], "next_cursor": next_cursor}
+
 @router.get("/dashboard/stats")
 def get_dashboard_stats(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
     # Placeholder for aggregated statistics
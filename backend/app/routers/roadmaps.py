@@ -1,12 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 import json # Added import 
+import logging
 import app.schemas as schemas
 import app.crud as crud
-from app.dependencies import get_db, get_current_active_user
+import app.crud_async as crud_async
+from app.database import AsyncSessionLocal
+from app.dependencies import get_db, get_async_db, get_current_active_user
 from app.models import User, AIResponse # Added AIResponse import
-from app.services.ai_service_updated import generate_roadmap_from_goal # Import the AI service
+from app.services.ai_service_updated import generate_roadmap_from_goal, stream_roadmap_from_goal # Import the AI service
+from app.services.roadmap_jobs import roadmap_jobs, JobQueueFullError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/roadmaps",
@@ -16,7 +24,7 @@ router = APIRouter(
 @router.post("/generate", response_model=schemas.Roadmap)
 async def generate_roadmap(
     roadmap_generate: schemas.RoadmapGenerate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     # Call AI service to generate roadmap content
@@ -26,7 +34,7 @@ async def generate_roadmap(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to generate roadmap from AI.")
 
     # Create roadmap and its hierarchy in the database
-    db_roadmap = crud.create_full_roadmap_from_ai(
+    db_roadmap = await crud_async.create_full_roadmap_from_ai(
         db=db,
         ai_roadmap_data=schemas.AIGeneratedRoadmap(**ai_generated_roadmap_data),
         user_id=current_user.id,
@@ -36,6 +44,82 @@ async def generate_roadmap(
 
     return db_roadmap
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/generate/stream")
+async def generate_roadmap_stream(
+    roadmap_generate: schemas.RoadmapGenerate,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Server-Sent Events variant of /generate: emits a "topic" event for each topic as soon
+    as the model has finished writing it, then a "roadmap" event with the saved roadmap.
+    A "reset" event means the topics sent so far are replaced by the ones that follow.
+    """
+    async def event_stream():
+        ai_generated_roadmap_data = None
+        try:
+            async for event, data in stream_roadmap_from_goal(roadmap_generate.goal):
+                if event in ("topic", "reset"):
+                    yield _sse(event, data)
+                else:
+                    ai_generated_roadmap_data = data
+
+            if not ai_generated_roadmap_data or "title" not in ai_generated_roadmap_data:
+                yield _sse("error", {"detail": "Failed to generate roadmap from AI."})
+                return
+
+            # Request-scoped sessions are closed before a streamed body is sent, so use our own
+            async with AsyncSessionLocal() as db:
+                db_roadmap = await crud_async.create_full_roadmap_from_ai(
+                    db=db,
+                    ai_roadmap_data=schemas.AIGeneratedRoadmap(**ai_generated_roadmap_data),
+                    user_id=current_user.id,
+                    goal=roadmap_generate.goal,
+                    ai_generated_content=json.dumps(ai_generated_roadmap_data)
+                )
+                yield _sse("roadmap", schemas.Roadmap.model_validate(db_roadmap).model_dump())
+        except Exception as e:
+            logger.error(f"Streaming roadmap generation failed for user {current_user.id}: {e}", exc_info=True)
+            yield _sse("error", {"detail": "Failed to generate roadmap from AI."})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/jobs", response_model=schemas.RoadmapJob, status_code=status.HTTP_202_ACCEPTED)
+async def submit_roadmap_job(
+    job_create: schemas.RoadmapJobCreate,
+    current_user: User = Depends(get_current_active_user)
+):
+    try:
+        return await roadmap_jobs.submit(current_user.id, job_create.goal, job_create.priority)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "5"})
+
+@router.get("/jobs/{job_id}", response_model=schemas.RoadmapJob)
+async def read_roadmap_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    job = await roadmap_jobs.get(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.delete("/jobs/{job_id}", response_model=schemas.RoadmapJob)
+async def cancel_roadmap_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    job = await roadmap_jobs.cancel(job_id, current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
 @router.post("/", response_model=schemas.Roadmap)
 def create_roadmap(
     roadmap: schemas.RoadmapCreate,
@@ -85,7 +169,11 @@ def delete_skill(
     db_skill = crud.get_skill_for_user(db, skill_id=skill_id, user_id=current_user.id)
     if db_skill is None:
         raise HTTPException(status_code=404, detail="Skill not found or not authorized")
-    return crud.delete_skill(db=db, skill_id=skill_id)
+    deleted_skill = crud.delete_skill(db=db, skill_id=skill_id)
+    if deleted_skill is None:
+        # Deleted by a concurrent request since the check above
+        raise HTTPException(status_code=404, detail="Skill not found or not authorized")
+    return deleted_skill
 
 @router.put("/{skill_id}/status", response_model=schemas.Skill)
 def update_skill_status(
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 
 class SkillBase(BaseModel):
@@ -82,6 +82,15 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class AuthenticatedUser(BaseModel):
+    id: int
+    username: str
+    email: str
+    is_email_verified: bool
+
+    class Config:
+        from_attributes = True
+
 class Token(BaseModel):
     access_token: str
     refresh_token: str
@@ -93,6 +102,20 @@ class TokenData(BaseModel):
 class RoadmapGenerate(BaseModel):
     goal: str
 
+class RoadmapJobCreate(RoadmapGenerate):
+    priority: int = Field(default=0, ge=0, le=10)
+
+class RoadmapJob(BaseModel):
+    id: str
+    goal: str
+    priority: int
+    status: str
+    roadmap_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
 # Schema for AI-generated roadmap input
 class AIGeneratedSkill(BaseModel):
     name: str
@@ -154,13 +177,19 @@ class RoadmapProgress(BaseModel):
     total_skills: int
     completed_skills: int
 
-class DashboardResponse(BaseModel):
+class DashboardSummary(BaseModel):
     user_id: int
     username: str
     roadmaps: List[RoadmapProgress]
     dashboard_stats: DashboardStats
+
+class DashboardResponse(DashboardSummary):
     skills: List[SkillResponse]
 
+class SkillPage(BaseModel):
+    items: List[SkillResponse]
+    next_cursor: Optional[int] = None # Pass back as ?cursor= for the next page; None on the last page
+
 class RoadmapRequest(BaseModel):
     prompt: str
     context: Optional[str] = None
@@ -189,9 +218,12 @@ __all__ = [
     "RoadmapCreate",
     "User",
     "UserCreate",
+    "AuthenticatedUser",
     "Token",
     "TokenData",
     "RoadmapGenerate",
+    "RoadmapJobCreate",
+    "RoadmapJob",
     "AIGeneratedSkill",
     "AIGeneratedSubtopic",
     "AIGeneratedTopic",
@@ -201,6 +233,8 @@ __all__ = [
     "SkillResponse",
     "DashboardStats",
     "DashboardResponse",
+    "DashboardSummary",
+    "SkillPage",
     "RoadmapRequest",
     "RoadmapResponse",
     "TokenWithUser",
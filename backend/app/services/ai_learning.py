@@ -1,66 +1,38 @@
 from fastapi import APIRouter, HTTPException, status
-import requests
-from youtube_transcript_api import YouTubeTranscriptApi
-import os
-from app.services.ai_service_updated import _call_ai_model
+import httpx
+import logging
+from app.core import config
+from app.services.explanation_cache import explain_video_cached
+from app.services.youtube_search import youtube_search
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# TODO: Replace "YOUR_API_KEY" with your actual YouTube Data API key.
-YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "YOUR_API_KEY")
+router = APIRouter()
 
 @router.get("/search-video")
 async def search_video(query: str):
-    if YOUTUBE_API_KEY == "YOUR_API_KEY":
+    if not config.YOUTUBE_API_KEY or config.YOUTUBE_API_KEY == "YOUR_API_KEY":
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="YouTube API key is not configured."
         )
-        
-    url = (
-        f"https://www.googleapis.com/youtube/v3/search"
-        f"?part=snippet&type=video&order=relevance&videoDuration=long&maxResults=5"
-        f"&q={query}&key={YOUTUBE_API_KEY}"
-    )
-    try:
-        res = requests.get(url)
-        res.raise_for_status()
-        data = res.json()
 
-        if "items" not in data or not data["items"]:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No videos found")
+    try:
+        best_video = await youtube_search.search(query)
+    except httpx.HTTPError as e:
+        # The error text holds the request URL, API key included: log it redacted, never return it
+        logger.warning(f"YouTube search failed: {youtube_search.describe_error(e)}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Could not connect to YouTube API.")
 
-        # Basic ranking: pick first result
-        best_video = data["items"][0]
-        return {
-            "videoId": best_video["id"]["videoId"],
-            "title": best_video["snippet"]["title"],
-            "description": best_video["snippet"]["description"],
-        }
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Could not connect to YouTube API: {e}")
+    if best_video is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No videos found")
+    return best_video
 
 
 @router.post("/explain-video")
 async def explain_video(videoId: str, user_query: str = None):
     try:
-        transcript_list = YouTubeTranscriptApi.get_transcript(videoId)
-        transcript_text = " ".join([t["text"] for t in transcript_list])
-    except Exception:
-        transcript_text = "Transcript not available."
-
-    prompt_messages = [
-        {"role": "system", "content": "You are an AI assistant that explains educational videos. Summarize the provided transcript and answer any specific user questions."},
-        {"role": "user", "content": f"""
-        Summarize this YouTube video tutorial transcript:
-        {transcript_text}
-
-        User asked: {user_query or "Summarize the key points."}
-        """}
-    ]
-
-    try:
-        explanation = await _call_ai_model(prompt_messages)
+        explanation = await explain_video_cached(videoId, user_query)
         return {"explanation": explanation}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to get explanation from AI model: {e}")
@@ -1,85 +1,35 @@
-import os
 import json
 import logging
 import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-import redis
+import re
+from pydantic import ValidationError
+from sqlalchemy import select
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 from app.core import config
-
-# Langchain imports
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage
+from app.database import AsyncSessionLocal
+from app.models import Roadmap
+import app.schemas as schemas
+from app.core.singleflight import roadmap_flights
+from app.services.incremental_json import TopicStreamParser
+from app.services.llm_providers import provider
+from app.services.structured_output import response_schema, loads_tolerant
+from app.services.response_store import response_store
+from app.services.token_usage import token_usage
+from app.services.llm_gateway import llm_gateway, estimate_tokens, is_retryable, retry_after_seconds
+from app.services.roadmap_cache import normalize_goal, roadmap_cache_key, goal_index, cache_metrics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Redis configuration
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
-REDIS_DB = int(os.getenv("REDIS_DB", 0))
-
-# Initialize Redis client
-try:
-    redis_client = redis.StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
-    redis_client.ping()
-    logging.info("Successfully connected to Redis.")
-except redis.exceptions.ConnectionError as e:
-    logging.error(f"Could not connect to Redis: {e}")
-    redis_client = None
-
-# Initialize Langchain ChatGoogleGenerativeAI model
-# Ensure GOOGLE_API_KEY is set in your .env file
-if not config.GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY not set in environment variables.")
-
-llm = ChatGoogleGenerativeAI(
-    google_api_key=config.GOOGLE_API_KEY,
-    model="gemini-1.5-flash",  # You can change this to another Gemini model
-    temperature=0.7,
-    max_output_tokens=8000
-)
-
-class AIResponseMalformedError(Exception):
-    """Custom exception for malformed AI responses."""
-    pass
-
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type(Exception) # Catch generic exceptions for retry
-)
-async def _call_ai_model(messages: list) -> str:
-    """
-    Internal function to call the AI model with retry logic using Langchain.
-    """
-    try:
-        # Convert dict messages to Langchain message objects
-        langchain_messages = []
-        for msg in messages:
-            if msg["role"] == "system":
-                langchain_messages.append(SystemMessage(content=msg["content"]))
-            elif msg["role"] == "user":
-                langchain_messages.append(HumanMessage(content=msg["content"]))
-            # Add other roles if necessary (e.g., AIMessage for assistant)
-
-        response = await llm.ainvoke(langchain_messages)
-        return response.content
-    except Exception as e:
-        logging.error(f"Error calling AI model: {e}", exc_info=True)
-        raise
+# The model is chosen with LLM_PROVIDER; clients are created on first use, so the app
+# imports without credentials and fails only when a model call is made
+LLM_MODEL = provider.model_name
+LLM_TEMPERATURE = config.LLM_TEMPERATURE
 
-async def generate_roadmap_from_goal(career_goal: str) -> dict:
-    """
-    Generates a roadmap (topics, subtopics, skills) from a career goal using Langchain AI.
-    Includes caching, retry, and self-healing for malformed responses.
-    """
-    # Sanitize input
-    career_goal = career_goal.strip()
+# Roadmap generation asks for JSON matching AIGeneratedRoadmap directly (Gemini JSON mode)
+ROADMAP_RESPONSE_SCHEMA = response_schema(schemas.AIGeneratedRoadmap) if config.LLM_STRUCTURED_OUTPUT else None
 
-    prompt_messages = [
-        {
-            "role": "system",
-            "content": """You are an expert technical instructor and AI assistant.  
+ROADMAP_SYSTEM_PROMPT_FULL = """You are an expert technical instructor and AI assistant.  
 Your task is to generate a structured **learning roadmap** for any career goal.  
 
 ⚠️ Important rules:
@@ -180,6 +130,57 @@ Example (for Python Developer):
     }
   ]
 }"""
+
+# Same contract without the worked example, for roughly a fifth of the input tokens.
+# The schema is spelled out inline; with structured output the API enforces it anyway.
+ROADMAP_SYSTEM_PROMPT_COMPACT = """You generate technical learning roadmaps for career goals.
+Return only a JSON object, no markdown or text around it, in this shape:
+{"title": str, "description": str, "topics": [{"name": str, "subtopics": [{"name": str, "skills": [{"name": str, "description": str, "estimated_hours": int, "difficulty": "Beginner" | "Intermediate" | "Advanced"}]}]}]}
+Cover technical topics only (concepts, languages, tools, frameworks, libraries), ordered from fundamentals to advanced. No job titles, career progression or soft skills."""
+
+ROADMAP_SYSTEM_PROMPTS = {
+    "full": ROADMAP_SYSTEM_PROMPT_FULL,
+    "compact": ROADMAP_SYSTEM_PROMPT_COMPACT,
+}
+ROADMAP_SYSTEM_PROMPT = ROADMAP_SYSTEM_PROMPTS[config.ROADMAP_PROMPT_VARIANT]
+
+class AIResponseMalformedError(ValueError):
+    """Custom exception for malformed AI responses."""
+    pass
+
+_exponential_wait = wait_exponential(multiplier=1, min=4, max=10)
+
+def _retry_wait(retry_state) -> float:
+    # Wait at least as long as the provider asked us to
+    hint = retry_after_seconds(retry_state.outcome.exception())
+    return max(hint or 0, _exponential_wait(retry_state))
+
+@retry(
+    stop=stop_after_attempt(config.LLM_MAX_RETRIES + 1),  # counts the first attempt too
+    wait=_retry_wait,
+    retry=retry_if_exception(is_retryable),
+    reraise=True
+)
+async def _call_ai_model(messages: list, structured: bool = False, purpose: str = "chat", is_retry: bool = False) -> str:
+    """
+    Internal function to call the AI model through the LLM gateway, retrying quota
+    and transient errors only. `structured` asks for JSON matching the roadmap schema;
+    token usage is recorded under `purpose`.
+    """
+    try:
+        async with llm_gateway.slot(estimate_tokens(messages)):
+            response = await provider.ainvoke(messages, ROADMAP_RESPONSE_SCHEMA if structured else None)
+        token_usage.record_response(purpose, messages, response, retry=is_retry)
+        return response.content
+    except Exception as e:
+        logging.error(f"Error calling AI model: {e}", exc_info=True)
+        raise
+
+def _roadmap_prompt_messages(career_goal: str, system_prompt: str = ROADMAP_SYSTEM_PROMPT) -> list:
+    return [
+        {
+            "role": "system",
+            "content": system_prompt
         },
         {
             "role": "user",
@@ -187,41 +188,196 @@ Example (for Python Developer):
         }
     ]
 
-    cache_key = f"roadmap_goal:{career_goal}"
+# "3", "3 hours", "3h" and "2-4 hrs" are hours; "2 weeks" or "a few" are not
+_HOURS = re.compile(r"\s*(\d+(?:\.\d+)?)(?:\s*(?:-|–|to)\s*\d+(?:\.\d+)?)?\s*(?:h|hrs?|hours?)?\.?\s*", re.IGNORECASE)
 
-    if redis_client:
-        cached_response = redis_client.get(cache_key)
-        if cached_response:
-            logging.info(f"Returning cached response for goal: '{career_goal}'")
-            return json.loads(cached_response)
+def _coerce_hours(value):
+    # Hour counts given as text or fractions become whole hours; anything with another
+    # unit is left as-is so schema validation rejects it
+    if isinstance(value, str):
+        match = _HOURS.fullmatch(value)
+        value = float(match.group(1)) if match else value
+    if isinstance(value, float):
+        value = max(1, round(value))
+    return value
+
+def _iter_skills(response_data: dict):
+    for topic in response_data.get("topics") or []:
+        if not isinstance(topic, dict):
+            continue
+        for subtopic in topic.get("subtopics") or []:
+            if not isinstance(subtopic, dict):
+                continue
+            for skill in subtopic.get("skills") or []:
+                if isinstance(skill, dict):
+                    yield skill
+
+def _validate_roadmap(response_data, career_goal: str) -> dict:
+    if not isinstance(response_data, dict) or "topics" not in response_data:
+        raise AIResponseMalformedError("AI response is not a dictionary or missing 'topics' key.")
+
+    # Ensure required fields are present
+    if not response_data.get("title"):
+        response_data["title"] = f"Roadmap for {career_goal}"
+    if not response_data.get("description"):
+        response_data["description"] = f"A comprehensive roadmap for {career_goal}"
+    for skill in _iter_skills(response_data):
+        if "estimated_hours" in skill:
+            skill["estimated_hours"] = _coerce_hours(skill["estimated_hours"])
+    try:
+        roadmap = schemas.AIGeneratedRoadmap.model_validate(response_data).model_dump()
+    except ValidationError as e:
+        raise AIResponseMalformedError(f"AI response does not match the roadmap schema: {e}")
+    _check_complete(roadmap)
+    return roadmap
+
+def _check_complete(roadmap: dict):
+    # A document cut short still parses once its brackets are closed, but leaves a
+    # topic or subtopic without children (or no topics at all)
+    if not roadmap.get("topics"):
+        raise AIResponseMalformedError("AI response has no topics.")
+    for topic in roadmap["topics"]:
+        if not topic.get("subtopics"):
+            raise AIResponseMalformedError(f"Topic '{topic.get('name')}' has no subtopics.")
+        for subtopic in topic["subtopics"]:
+            if not subtopic.get("skills"):
+                raise AIResponseMalformedError(f"Subtopic '{subtopic.get('name')}' has no skills.")
+
+def _parse_roadmap_content(ai_content: str, career_goal: str) -> tuple[dict, bool]:
+    """
+    Parses a model response into a validated roadmap dict. Trailing commas, stray prose
+    and code fences are repaired locally. Returns (roadmap, truncated): `truncated` is
+    set when the response was cut off and only parsed after closing its brackets, so
+    the roadmap may be missing topics and should be requested again. Raises
+    json.JSONDecodeError or AIResponseMalformedError when the response cannot be salvaged.
+    """
+    response_data, repair = loads_tolerant(ai_content, lambda data: _validate_roadmap(data, career_goal))
+    if repair == "syntax":
+        logging.info(f"Repaired malformed roadmap response locally for goal: '{career_goal}'")
+    return response_data, repair == "truncated"
+
+def _fallback_roadmap(career_goal: str) -> dict:
+    return {
+        "title": f"Roadmap for {career_goal}",
+        "description": "Could not generate a detailed roadmap. Please try again.",
+        "topics": []
+    }
+
+def _roadmap_key(normalized_goal: str) -> str:
+    return roadmap_cache_key(normalized_goal, LLM_MODEL, ROADMAP_SYSTEM_PROMPT, LLM_TEMPERATURE)
+
+async def _load_roadmap(cache_key: str) -> dict | None:
+    stored = await response_store.get(cache_key)
+    if not stored:
+        return None
+    roadmap = json.loads(stored)
+    try:
+        _check_complete(roadmap)
+    except AIResponseMalformedError as e:
+        logging.warning(f"Ignoring incomplete cached roadmap {cache_key}: {e}")
+        return None
+    return roadmap
+
+async def _get_cached_roadmap(career_goal: str, normalized_goal: str, cache_key: str) -> dict | None:
+    cached = await _load_roadmap(cache_key)
+    if cached is not None:
+        cache_metrics.record("exact_hits")
+        logging.info(f"Returning cached response for goal: '{career_goal}'")
+        return cached
+
+    similar_goal, score = await goal_index.most_similar(normalized_goal)
+    if similar_goal and 0 < config.ROADMAP_SIMILARITY_THRESHOLD <= score:
+        cached = await _load_roadmap(_roadmap_key(similar_goal))
+        if cached is not None:
+            await goal_index.add(similar_goal)  # keeps goals that serve near hits in the index
+            cache_metrics.record("near_hits", score)
+            logging.info(f"Returning cached response of similar goal '{similar_goal}' ({score:.2f}) for: '{career_goal}'")
+            return cached
+    cache_metrics.record("misses", score)
+    return None
+
+async def _cache_roadmap(career_goal: str, normalized_goal: str, cache_key: str, response_data: dict):
+    await response_store.put(cache_key, LLM_MODEL, normalized_goal, json.dumps(response_data))
+    await goal_index.add(normalized_goal)
+    logging.info(f"Cached roadmap for goal: '{career_goal}'")
+
+async def warm_up_response_store(limit: int = config.LLM_RESPONSE_WARMUP_LIMIT):
+    """
+    Seeds the response store from roadmaps already saved with their generated content,
+    so goals generated before the store existed are not sent to the model again.
+    """
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(Roadmap.goal, Roadmap.ai_generated_content)
+            .where(Roadmap.goal.isnot(None), Roadmap.ai_generated_content.isnot(None))
+            .order_by(Roadmap.id.desc())
+            .limit(limit)
+        )).all()
+
+    entries = {}
+    for goal, content in rows:
+        normalized_goal = normalize_goal(goal)
+        cache_key = _roadmap_key(normalized_goal)
+        if cache_key in entries:
+            continue
+        try:
+            response_data = json.loads(content)
+        except ValueError:
+            continue
+        if not isinstance(response_data, dict):
+            continue
+        try:
+            _check_complete(response_data)
+        except AIResponseMalformedError:
+            continue  # fallback and truncated roadmaps are not worth serving again
+        entries[cache_key] = {"key": cache_key, "model": LLM_MODEL, "normalized_prompt": normalized_goal, "response": content}
+
+    entries = list(entries.values())
+    stored = 0
+    for i in range(0, len(entries), 500):
+        stored += await response_store.put_many(entries[i:i + 500])
+    for entry in entries:
+        await goal_index.add(entry["normalized_prompt"])
+    logging.info(f"Response store warm-up: {len(rows)} roadmaps scanned, {stored} responses added")
+
+async def generate_roadmap_from_goal(career_goal: str) -> dict:
+    """
+    Generates a roadmap (topics, subtopics, skills) from a career goal using Langchain AI.
+    Includes caching, retry, and self-healing for malformed responses.
+    """
+    # Sanitize input
+    career_goal = career_goal.strip()
+
+    normalized_goal = normalize_goal(career_goal)
+    cache_key = _roadmap_key(normalized_goal)
+
+    cached = await _get_cached_roadmap(career_goal, normalized_goal, cache_key)
+    if cached is not None:
+        return cached
+
+    # Concurrent requests for the same goal, in this worker or others, share one generation
+    return await roadmap_flights.do(
+        cache_key,
+        lambda: _generate_roadmap(career_goal, normalized_goal, cache_key),
+        lambda: _load_roadmap(cache_key),
+    )
+
+async def _generate_roadmap(career_goal: str, normalized_goal: str, cache_key: str, is_retry: bool = False) -> dict:
+    prompt_messages = _roadmap_prompt_messages(career_goal)
 
     response_data = None
+    truncated = False
     for attempt in range(3): # Max 3 attempts for self-healing
         try:
             logging.info(f"Attempt {attempt + 1} to generate roadmap for goal: '{career_goal}'")
-            ai_content = await _call_ai_model(prompt_messages)
-            
-            # Clean the response by removing markdown code fences
-            cleaned_content = ai_content.strip()
-            if cleaned_content.startswith('```json'):
-                cleaned_content = cleaned_content[7:]  # Remove ```json
-            if cleaned_content.endswith('```'):
-                cleaned_content = cleaned_content[:-3]  # Remove ```
-            cleaned_content = cleaned_content.strip()
-            
-            # Attempt to parse JSON
-            response_data = json.loads(cleaned_content)
-            
-            # Basic validation of the structure
-            if not isinstance(response_data, dict) or "topics" not in response_data:
-                raise AIResponseMalformedError("AI response is not a dictionary or missing 'topics' key.")
-            
-            # Ensure required fields are present
-            if "title" not in response_data:
-                response_data["title"] = f"Roadmap for {career_goal}"
-            if "description" not in response_data:
-                response_data["description"] = f"A comprehensive roadmap for {career_goal}"
-            
+            ai_content = await _call_ai_model(prompt_messages, structured=True, purpose="roadmap", is_retry=is_retry or attempt > 0)
+            response_data, truncated = _parse_roadmap_content(ai_content, career_goal)
+            if truncated and attempt < 2:
+                # The closed-up document may be missing topics; ask again rather than keep it
+                logging.warning(f"AI response was cut off (attempt {attempt + 1}), asking again for goal: '{career_goal}'")
+                prompt_messages.append({"role": "user", "content": "The previous response was cut off before the JSON was complete. Please provide the complete response again, keeping descriptions short."})
+                response_data = None
+                continue
             logging.info(f"Successfully generated roadmap for goal: '{career_goal}'")
             break # Exit loop if successful
         except json.JSONDecodeError as e:
@@ -234,16 +390,88 @@ Example (for Python Developer):
             logging.error(f"An unexpected error occurred during roadmap generation: {e}")
             raise # Re-raise other exceptions
 
-    if response_data and redis_client:
-        redis_client.setex(cache_key, 3600, json.dumps(response_data)) # Cache for 1 hour
-        logging.info(f"Cached roadmap for goal: '{career_goal}'")
-
     if not response_data:
         logging.error(f"Failed to generate valid roadmap after multiple attempts for goal: '{career_goal}'")
         # Fallback: Return a default or empty roadmap structure
-        return {
-            "title": f"Roadmap for {career_goal}",
-            "description": "Could not generate a detailed roadmap. Please try again.",
-            "topics": []
-        }
-    return response_data
\ No newline at end of file
+        return _fallback_roadmap(career_goal)
+
+    if truncated:
+        # Served for this request only; a truncated roadmap is never stored as complete
+        logging.warning(f"Returning roadmap repaired from a truncated response without caching it for goal: '{career_goal}'")
+        return response_data
+    await _cache_roadmap(career_goal, normalized_goal, cache_key, response_data)
+    return response_data
+
+async def stream_roadmap_from_goal(career_goal: str):
+    """
+    Streaming variant of generate_roadmap_from_goal. Yields ("topic", dict) as soon as
+    each element of "topics" is complete in the model output, then a final
+    ("roadmap", dict) with the whole roadmap. Cached roadmaps are replayed immediately.
+    The generation is shared through roadmap_flights with every other request for the
+    goal; a request that joins one already in flight gets its topics when it finishes.
+    If the roadmap ends up with other topics than the ones already sent (the streamed
+    document was invalid and had to be regenerated), ("reset", None) is yielded and all
+    topics are sent again.
+    """
+    career_goal = career_goal.strip()
+    normalized_goal = normalize_goal(career_goal)
+    cache_key = _roadmap_key(normalized_goal)
+
+    cached = await _get_cached_roadmap(career_goal, normalized_goal, cache_key)
+    if cached is not None:
+        for topic in cached.get("topics", []):
+            yield "topic", topic
+        yield "roadmap", cached
+        return
+
+    topics = asyncio.Queue()
+    flight = asyncio.ensure_future(roadmap_flights.do(
+        cache_key,
+        lambda: _stream_roadmap(career_goal, normalized_goal, cache_key, topics.put_nowait),
+        lambda: _load_roadmap(cache_key),
+    ))
+    sent = []
+    try:
+        while not flight.done():
+            next_topic = asyncio.ensure_future(topics.get())
+            await asyncio.wait({next_topic, flight}, return_when=asyncio.FIRST_COMPLETED)
+            if next_topic.done():
+                sent.append(next_topic.result())
+                yield "topic", sent[-1]
+            else:
+                next_topic.cancel()
+        response_data = flight.result()
+    finally:
+        flight.cancel()
+
+    # Topics still queued when the flight finished are sent from the final roadmap
+    final_topics = response_data.get("topics", [])
+    if final_topics[:len(sent)] != sent:
+        yield "reset", None
+        sent = []
+    for topic in final_topics[len(sent):]:
+        yield "topic", topic
+    yield "roadmap", response_data
+
+async def _stream_roadmap(career_goal: str, normalized_goal: str, cache_key: str, on_topic) -> dict:
+    parser = TopicStreamParser()
+    prompt_messages = _roadmap_prompt_messages(career_goal)
+    streamed = None
+    async with llm_gateway.slot(estimate_tokens(prompt_messages)):
+        async for chunk in provider.astream(prompt_messages, ROADMAP_RESPONSE_SCHEMA):
+            streamed = chunk if streamed is None else streamed + chunk  # merges usage metadata
+            for topic in parser.feed(chunk.content):
+                on_topic(topic)
+    if streamed is not None:
+        token_usage.record_response("roadmap_stream", prompt_messages, streamed)
+
+    try:
+        response_data, truncated = _parse_roadmap_content(parser.text, career_goal)
+        if truncated:
+            raise AIResponseMalformedError("streamed response was cut off")
+    except (json.JSONDecodeError, AIResponseMalformedError) as e:
+        logging.warning(f"Streamed roadmap was invalid ({e}), regenerating for goal: '{career_goal}'")
+        return await _generate_roadmap(career_goal, normalized_goal, cache_key, is_retry=True)
+
+    await _cache_roadmap(career_goal, normalized_goal, cache_key, response_data)
+    return response_data
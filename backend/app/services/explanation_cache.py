@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import logging
+import re
+import unicodedata
+from collections import Counter
+from typing import List, Optional
+
+from app.core import config
+from app.core.cache import TTLCache
+from app.core.metrics import register_provider
+from app.core.redis_client import redis_cache
+from app.core.singleflight import SingleFlight
+from app.services.ai_service_updated import LLM_MODEL
+from app.services.transcripts import transcript_store
+from app.services.video_summary import (
+    ANSWER_SYSTEM_PROMPT, CHUNK_SYSTEM_PROMPT, DEFAULT_QUESTION, EXPLAIN_SYSTEM_PROMPT, REDUCE_SYSTEM_PROMPT, video_summarizer
+)
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s+#]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_question(question: Optional[str]) -> str:
+    # "Summarize the key points." is what an empty question means
+    text = unicodedata.normalize("NFKC", question or DEFAULT_QUESTION).casefold()
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text)).strip() or normalize_question(None)
+
+def _prompt_version() -> str:
+    # A new model, prompt or chunking/retrieval setting starts a new key space
+    parts = [
+        LLM_MODEL, EXPLAIN_SYSTEM_PROMPT, CHUNK_SYSTEM_PROMPT, REDUCE_SYSTEM_PROMPT, ANSWER_SYSTEM_PROMPT,
+        str(config.VIDEO_CHUNK_TOKENS), str(config.VIDEO_INDEX_WINDOW_TOKENS), str(config.VIDEO_INDEX_TOP_K),
+    ]
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:12]
+
+class ExplanationCache:
+    """
+    Finished explain-video answers by (video, normalized question, model/prompt version).
+    Answers are kept in Redis for all workers and in a per-process LRU, which keeps
+    serving while Redis is unavailable. Requests per video are counted (in a Redis
+    sorted set, or in process without Redis) so the default summary of the most
+    requested videos can be generated ahead of time.
+    """
+
+    POPULARITY_KEY = "explain_video_popularity"
+    POPULARITY_MAX_VIDEOS = 1000
+
+    def __init__(self, ttl_seconds: int, local_entries: int, unavailable_ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.unavailable_ttl_seconds = unavailable_ttl_seconds
+        self.version = _prompt_version()
+        self._local = TTLCache(local_entries, ttl_seconds)
+        self._popularity = Counter()
+        self.counters = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stored": 0, "precomputed": 0}
+
+    def key(self, video_id: str, question: Optional[str]) -> str:
+        digest = hashlib.sha256(normalize_question(question).encode()).hexdigest()[:32]
+        return f"explain:{self.version}:{video_id}:{digest}"
+
+    async def get(self, key: str, record: bool = True) -> Optional[str]:
+        explanation = self._local.get(key)
+        if explanation is not None:
+            if record:
+                self.counters["local_hits"] += 1
+            return explanation
+        explanation = await redis_cache.get(key)
+        if explanation is not None:
+            self._local.set(key, explanation)
+            if record:
+                self.counters["redis_hits"] += 1
+            return explanation
+        if record:
+            self.counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, explanation: str, transcript_available: bool = True):
+        # An answer given without a transcript is only kept until the transcript is retried
+        ttl = self.ttl_seconds if transcript_available else self.unavailable_ttl_seconds
+        self._local.set(key, explanation, ttl)
+        await redis_cache.setex(key, ttl, explanation)
+        self.counters["stored"] += 1
+
+    async def record_request(self, video_id: str):
+        self._popularity[video_id] += 1
+        if len(self._popularity) > 2 * self.POPULARITY_MAX_VIDEOS:
+            self._popularity = Counter(dict(self._popularity.most_common(self.POPULARITY_MAX_VIDEOS)))
+        if await redis_cache.call("zincrby", self.POPULARITY_KEY, 1, video_id) is not None:
+            if self._popularity[video_id] == 1:
+                await redis_cache.call("zremrangebyrank", self.POPULARITY_KEY, 0, -self.POPULARITY_MAX_VIDEOS - 1)
+
+    async def popular_videos(self, limit: int, min_requests: int) -> List[str]:
+        ranked = await redis_cache.call("zrevrangebyscore", self.POPULARITY_KEY, "+inf", min_requests, start=0, num=limit)
+        if ranked is not None:
+            return list(ranked)
+        return [video_id for video_id, count in self._popularity.most_common(limit) if count >= min_requests]
+
+    def stats(self) -> dict:
+        lookups = self.counters["local_hits"] + self.counters["redis_hits"] + self.counters["misses"]
+        hits = lookups - self.counters["misses"]
+        return {
+            "version": self.version,
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "local": self._local.stats(),
+            "tracked_videos": len(self._popularity),
+        }
+
+explanation_cache = ExplanationCache(
+    config.EXPLAIN_CACHE_TTL_SECONDS,
+    config.EXPLAIN_CACHE_LOCAL_ENTRIES,
+    config.TRANSCRIPT_UNAVAILABLE_TTL_SECONDS,
+)
+explanation_flights = SingleFlight("explain_video", config.SINGLEFLIGHT_LOCK_SECONDS, config.SINGLEFLIGHT_WAIT_SECONDS)
+
+async def _generate(video_id: str, user_query: Optional[str], key: str) -> str:
+    transcript = await transcript_store.get(video_id)
+    explanation = await video_summarizer.explain(video_id, transcript, user_query)
+    await explanation_cache.set(key, explanation, transcript_available=transcript is not None)
+    return explanation
+
+async def explain_video_cached(video_id: str, user_query: Optional[str] = None) -> str:
+    """explain-video answer from the cache, or generated once for all concurrent callers."""
+    await explanation_cache.record_request(video_id)
+    key = explanation_cache.key(video_id, user_query)
+    explanation = await explanation_cache.get(key)
+    if explanation is not None:
+        return explanation
+    return await explanation_flights.do(
+        key,
+        lambda: _generate(video_id, user_query, key),
+        lambda: explanation_cache.get(key, record=False),
+    )
+
+async def precompute_popular_summaries(interval_seconds: int, limit: int, min_requests: int):
+    """Keeps the default summary of the most requested videos generated, one video at a time."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            for video_id in await explanation_cache.popular_videos(limit, min_requests):
+                key = explanation_cache.key(video_id, None)
+                if await explanation_cache.get(key, record=False) is not None:
+                    continue
+                if await transcript_store.get(video_id) is None:
+                    continue
+                await explanation_flights.do(
+                    key,
+                    lambda: _generate(video_id, None, key),
+                    lambda: explanation_cache.get(key, record=False),
+                )
+                explanation_cache.counters["precomputed"] += 1
+        except Exception as e:
+            logger.warning(f"Precomputing popular video summaries failed: {e}")
+
+register_provider("explain_video_cache", explanation_cache.stats)
+register_provider("singleflight_explain_video", explanation_flights.stats)
@@ -0,0 +1,72 @@
+import json
+from typing import List
+
+class TopicStreamParser:
+    """
+    Incremental scanner for a streamed roadmap JSON document.
+
+    Text is fed in arbitrary chunks; every time an element of the top-level
+    "topics" array is complete it is parsed and returned from feed(). Anything
+    before the first "{" (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._pending_key = None
+        self._topics_depth = None
+        self._topics_done = False
+        self._element_start = None
+        self.emitted = 0
+
+    def feed(self, chunk: str) -> List[dict]:
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:i]
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char == ":":
+                if self._depth == 1:
+                    self._pending_key = self._last_string
+            elif char == ",":
+                if self._depth == 1:
+                    self._pending_key = None
+            elif char in "{[":
+                self._depth += 1
+                if (char == "[" and self._depth == 2 and self._pending_key == "topics"
+                        and self._topics_depth is None):
+                    self._topics_depth = self._depth
+                elif (char == "{" and self._topics_depth is not None and not self._topics_done
+                        and self._depth == self._topics_depth + 1):
+                    self._element_start = i
+            elif char in "}]":
+                if (char == "}" and self._element_start is not None
+                        and self._depth == self._topics_depth + 1):
+                    try:
+                        completed.append(json.loads(text[self._element_start:i + 1]))
+                        self.emitted += 1
+                    except json.JSONDecodeError:
+                        pass  # left for the final full-document parse to report
+                    self._element_start = None
+                elif char == "]" and self._depth == self._topics_depth:
+                    self._topics_done = True
+                self._depth -= 1
+        self._pos = len(text)
+        return completed
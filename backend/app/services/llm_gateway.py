@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+
+from app.core import config
+from app.core.metrics import LatencyStats, register_provider
+from app.core.redis_client import redis_cache
+
+logger = logging.getLogger(__name__)
+
+class LLMCapacityError(Exception):
+    """Raised when a call would wait longer than LLM_MAX_QUEUE_WAIT_SECONDS for capacity."""
+    pass
+
+# Refills the bucket from the elapsed server time, then takes `amount` if available.
+# Returns 0 when taken, otherwise the milliseconds until enough tokens will be there.
+_TAKE_TOKENS = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tokens = tonumber(redis.call("HGET", KEYS[1], "tokens"))
+local ts = tonumber(redis.call("HGET", KEYS[1], "ts"))
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + (now - ts) * rate / 1000)
+local wait = 0
+if tokens >= amount then
+    tokens = tokens - amount
+else
+    wait = math.ceil((amount - tokens) * 1000 / rate)
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+# Gives back tokens taken for a call that was not made; a bucket that expired is full anyway
+_REFUND_TOKENS = """
+if redis.call("HEXISTS", KEYS[1], "tokens") == 1 then
+    redis.call("HINCRBYFLOAT", KEYS[1], "tokens", ARGV[1])
+end
+return 0
+"""
+
+class TokenBucket:
+    """Per-minute budget shared by all workers through Redis, with an in-process bucket as fallback."""
+
+    def __init__(self, name: str, per_minute: int):
+        self.key = f"llm_bucket:{name}"
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _take_local(self, amount: float) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= amount:
+            self._tokens -= amount
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+    async def take(self, amount: float) -> float:
+        """Takes `amount` and returns 0, or returns the seconds to wait before trying again."""
+        amount = min(amount, self.capacity)
+        wait_ms = await redis_cache.call("eval", _TAKE_TOKENS, 1, self.key, self.capacity, self.rate, amount)
+        if wait_ms is None:
+            return self._take_local(amount)
+        return int(wait_ms) / 1000.0
+
+    async def refund(self, amount: float):
+        amount = min(amount, self.capacity)
+        if await redis_cache.call("eval", _REFUND_TOKENS, 1, self.key, amount) is None:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+_RETRY_HINTS = [
+    re.compile(r"retry[_ ]delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+    re.compile(r"retry (?:in|after) ([\d.]+)\s*s", re.IGNORECASE),
+]
+
+def is_quota_error(exc: BaseException) -> bool:
+    text = str(exc)
+    return (
+        type(exc).__name__ in ("ResourceExhausted", "RateLimitError", "TooManyRequests")
+        or "429" in text
+        or "quota" in text.lower()
+    )
+
+def is_retryable(exc: BaseException) -> bool:
+    """Quota and transient provider errors; bad requests and our own rejections are not retried."""
+    if isinstance(exc, LLMCapacityError):
+        return False
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return is_quota_error(exc) or type(exc).__name__ in (
+        "ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "ServerError",
+    )
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """Backoff hint carried by a provider quota error, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+    for pattern in _RETRY_HINTS:
+        match = pattern.search(str(exc))
+        if match:
+            return float(match.group(1))
+    return None
+
+class LLMGateway:
+    """
+    Single entry point for model calls: caps concurrent calls per process, keeps the
+    cluster under the requests-per-minute and tokens-per-minute budgets, and pauses
+    all callers when the provider answers with a quota backoff hint.
+    """
+
+    BACKOFF_KEY = "llm_backoff_until"
+
+    def __init__(self, max_concurrency: int, requests_per_minute: int, tokens_per_minute: int, max_wait_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.max_wait_seconds = max_wait_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._requests = TokenBucket("requests", requests_per_minute)
+        self._tokens = TokenBucket("tokens", tokens_per_minute)
+        self._backoff_until = 0.0
+        self.in_flight = 0
+        self.queue_wait = LatencyStats()
+        self.counters = {"calls": 0, "rejected": 0, "quota_errors": 0, "errors": 0}
+
+    async def _backoff_remaining(self) -> float:
+        remaining = self._backoff_until - time.time()
+        shared = await redis_cache.get(self.BACKOFF_KEY)
+        if shared:
+            remaining = max(remaining, float(shared) - time.time())
+        return max(remaining, 0.0)
+
+    async def backoff(self, seconds: float):
+        until = time.time() + seconds
+        self._backoff_until = max(self._backoff_until, until)
+        await redis_cache.call("set", self.BACKOFF_KEY, str(until), px=int(seconds * 1000) + 1)
+        logger.warning(f"LLM quota backoff for {seconds:.1f}s")
+
+    async def _wait(self, seconds: float, deadline: float):
+        if time.monotonic() + seconds > deadline:
+            self.counters["rejected"] += 1
+            raise LLMCapacityError("LLM capacity exhausted, please retry shortly")
+        await asyncio.sleep(seconds)
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        started = time.monotonic()
+        deadline = started + self.max_wait_seconds
+        while (remaining := await self._backoff_remaining()) > 0:
+            await self._wait(remaining, deadline)
+        # The concurrency slot comes first, so budget is only taken for a call that can run
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self.counters["rejected"] += 1
+            raise LLMCapacityError("LLM capacity exhausted, please retry shortly")
+        taken = []
+        try:
+            for bucket, amount in ((self._requests, 1), (self._tokens, estimated_tokens)):
+                while (wait := await bucket.take(amount)) > 0:
+                    await self._wait(wait, deadline)
+                taken.append((bucket, amount))
+        except BaseException:
+            # Rejected or cancelled before the call: give back the slot and the budget
+            self._semaphore.release()
+            for bucket, amount in taken:
+                await bucket.refund(amount)
+            raise
+        self.queue_wait.observe(time.monotonic() - started)
+        self.in_flight += 1
+        self.counters["calls"] += 1
+        try:
+            yield
+        except Exception as e:
+            self.counters["errors"] += 1
+            if is_quota_error(e):
+                self.counters["quota_errors"] += 1
+                hint = retry_after_seconds(e)
+                if hint:
+                    await self.backoff(hint)
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "backoff_seconds": round(max(self._backoff_until - time.time(), 0.0), 1),
+            "queue_wait": self.queue_wait.summary(),
+            **self.counters,
+        }
+
+def estimate_tokens(messages: list) -> int:
+    # Rough prompt size (~4 characters per token) plus a typical completion
+    return sum(len(msg["content"]) for msg in messages) // 4 + config.LLM_EXPECTED_COMPLETION_TOKENS
+
+llm_gateway = LLMGateway(
+    config.LLM_MAX_CONCURRENCY,
+    config.LLM_REQUESTS_PER_MINUTE,
+    config.LLM_TOKENS_PER_MINUTE,
+    config.LLM_MAX_QUEUE_WAIT_SECONDS,
+)
+
+register_provider("llm_gateway", llm_gateway.stats)
@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+from typing import AsyncIterator, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+
+from app.core import config
+from app.core.metrics import register_provider
+
+class LLMConfigurationError(Exception):
+    """Raised when the selected provider is missing its credentials or settings."""
+    pass
+
+class FakeProviderError(Exception):
+    """Failure injected by the fake provider; worded like a provider quota error."""
+    pass
+
+def to_langchain_messages(messages: list) -> list:
+    # Convert dict messages to Langchain message objects
+    langchain_messages = []
+    for msg in messages:
+        if msg["role"] == "system":
+            langchain_messages.append(SystemMessage(content=msg["content"]))
+        elif msg["role"] == "user":
+            langchain_messages.append(HumanMessage(content=msg["content"]))
+        # Add other roles if necessary (e.g., AIMessage for assistant)
+    return langchain_messages
+
+class LLMProvider:
+    """
+    A chat model behind _call_ai_model. Messages are {"role", "content"} dicts;
+    responses are LangChain AI messages (chunks when streaming) so usage metadata
+    and chunk merging work the same for every provider. `response_schema` asks for
+    JSON matching the schema where the provider supports it.
+    """
+
+    model_name = ""
+
+    async def ainvoke(self, messages: list, response_schema: Optional[dict] = None) -> AIMessage:
+        raise NotImplementedError
+
+    def astream(self, messages: list, response_schema: Optional[dict] = None) -> AsyncIterator[AIMessageChunk]:
+        raise NotImplementedError
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini through langchain_google_genai, with clients created on first use."""
+
+    def __init__(self, api_key: Optional[str], model: str, temperature: float, max_output_tokens: int):
+        self.api_key = api_key
+        self.model_name = model
+        self.temperature = temperature
+        self.max_output_tokens = max_output_tokens
+        self._clients = {}
+
+    def _client(self, response_schema: Optional[dict]):
+        key = json.dumps(response_schema, sort_keys=True) if response_schema else None
+        client = self._clients.get(key)
+        if client is None:
+            if not self.api_key:
+                raise LLMConfigurationError("GOOGLE_API_KEY not set in environment variables.")
+            from langchain_google_genai import ChatGoogleGenerativeAI
+
+            options = {"response_mime_type": "application/json", "response_schema": response_schema} if response_schema else {}
+            client = ChatGoogleGenerativeAI(
+                google_api_key=self.api_key,
+                model=self.model_name,
+                temperature=self.temperature,
+                max_output_tokens=self.max_output_tokens,
+                **options
+            )
+            self._clients[key] = client
+        return client
+
+    async def ainvoke(self, messages: list, response_schema: Optional[dict] = None) -> AIMessage:
+        return await self._client(response_schema).ainvoke(to_langchain_messages(messages))
+
+    async def astream(self, messages: list, response_schema: Optional[dict] = None) -> AsyncIterator[AIMessageChunk]:
+        async for chunk in self._client(response_schema).astream(to_langchain_messages(messages)):
+            yield chunk
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic local model for offline benchmarks and load tests. The same prompt
+    always gets the same answer: a roadmap document when a response schema is
+    requested or the prompt asks for a roadmap, an echo otherwise. Output arrives
+    after `latency` seconds and then at `chunks_per_second` chunks of `chunk_chars`
+    characters. A seeded generator injects quota errors at `failure_rate` and
+    truncated output at `malformed_rate`.
+    """
+
+    _ROADMAP_GOAL = re.compile(r"roadmap for:\s*(.+)", re.IGNORECASE)
+
+    def __init__(self, latency: float = 0.5, chunks_per_second: float = 50, chunk_chars: int = 40,
+                 failure_rate: float = 0.0, malformed_rate: float = 0.0, seed: int = 0):
+        self.model_name = f"fake-{seed}"
+        self.latency = latency
+        self.chunks_per_second = chunks_per_second
+        self.chunk_chars = chunk_chars
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self._random = random.Random(seed)
+        self.active = 0
+        self.counters = {"calls": 0, "failures": 0, "malformed": 0, "peak_concurrency": 0}
+
+    def _roadmap(self, goal: str) -> dict:
+        digest = hashlib.sha256(goal.encode()).digest()
+        return {
+            "title": f"{goal} Roadmap",
+            "description": f"Step-by-step roadmap for {goal}",
+            "topics": [{
+                "name": f"{goal} topic {t + 1}",
+                "subtopics": [{
+                    "name": f"{goal} subtopic {t + 1}.{s + 1}",
+                    "skills": [{
+                        "name": f"{goal} skill {t + 1}.{s + 1}.{k + 1}",
+                        "description": "Generated by the fake provider.",
+                        "estimated_hours": 1 + digest[(t * 9 + s * 3 + k) % len(digest)] % 8,
+                        "difficulty": ["Beginner", "Intermediate", "Advanced"][min(t, 2)],
+                    } for k in range(3)],
+                } for s in range(3)],
+            } for t in range(4)],
+        }
+
+    def _respond(self, messages: list, response_schema: Optional[dict]) -> str:
+        prompt = "\n".join(msg["content"] for msg in messages if msg["role"] == "user")
+        match = self._ROADMAP_GOAL.search(prompt)
+        if response_schema is not None or match:
+            text = json.dumps(self._roadmap(match.group(1).strip() if match else prompt[:40]), indent=2)
+        else:
+            text = f"Echo: {prompt}"
+        if self._random.random() < self.malformed_rate:
+            self.counters["malformed"] += 1
+            text = text[:int(len(text) * self._random.uniform(0.5, 0.95))]
+        return text
+
+    def _begin(self):
+        self.counters["calls"] += 1
+        if self._random.random() < self.failure_rate:
+            self.counters["failures"] += 1
+            raise FakeProviderError("429 Resource has been exhausted (fake provider). Please retry in 1s.")
+        self.active += 1
+        self.counters["peak_concurrency"] = max(self.counters["peak_concurrency"], self.active)
+
+    def _usage(self, messages: list, text: str) -> dict:
+        prompt_tokens = sum(len(msg["content"]) for msg in messages) // 4
+        completion_tokens = len(text) // 4
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+    async def ainvoke(self, messages: list, response_schema: Optional[dict] = None) -> AIMessage:
+        self._begin()
+        try:
+            text = self._respond(messages, response_schema)
+            chunks = -(-len(text) // self.chunk_chars)
+            await asyncio.sleep(self.latency + chunks / self.chunks_per_second)
+            return AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        finally:
+            self.active -= 1
+
+    async def astream(self, messages: list, response_schema: Optional[dict] = None) -> AsyncIterator[AIMessageChunk]:
+        self._begin()
+        try:
+            text = self._respond(messages, response_schema)
+            await asyncio.sleep(self.latency)
+            for i in range(0, len(text), self.chunk_chars):
+                await asyncio.sleep(1 / self.chunks_per_second)
+                yield AIMessageChunk(content=text[i:i + self.chunk_chars])
+            # Usage arrives with the final chunk, as with real providers
+            yield AIMessageChunk(content="", usage_metadata=self._usage(messages, text))
+        finally:
+            self.active -= 1
+
+    def stats(self) -> dict:
+        return {"active": self.active, **self.counters}
+
+def create_provider(name: str) -> LLMProvider:
+    if name == "gemini":
+        return GeminiProvider(config.GOOGLE_API_KEY, config.LLM_MODEL, config.LLM_TEMPERATURE, config.LLM_MAX_OUTPUT_TOKENS)
+    if name == "fake":
+        return FakeProvider(
+            latency=config.FAKE_LLM_LATENCY_SECONDS,
+            chunks_per_second=config.FAKE_LLM_CHUNKS_PER_SECOND,
+            chunk_chars=config.FAKE_LLM_CHUNK_CHARS,
+            failure_rate=config.FAKE_LLM_FAILURE_RATE,
+            malformed_rate=config.FAKE_LLM_MALFORMED_RATE,
+            seed=config.FAKE_LLM_SEED,
+        )
+    raise LLMConfigurationError(f"Unknown LLM_PROVIDER: {name}")
+
+provider = create_provider(config.LLM_PROVIDER)
+
+if isinstance(provider, FakeProvider):
+    register_provider("fake_llm", provider.stats)
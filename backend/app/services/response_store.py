@@ -0,0 +1,127 @@
+import logging
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core import config
+from app.core.metrics import register_provider
+from app.core.redis_client import redis_cache
+from app.database import AsyncSessionLocal
+from app.models import LLMResponse
+
+logger = logging.getLogger(__name__)
+
+class ResponseStore:
+    """
+    Content-addressed store for generated LLM responses. The llm_responses table is the
+    durable copy, so a Redis flush or restart does not cost new model calls; Redis keeps
+    recently used responses hot. Once the table holds more than `max_bytes` of responses
+    the least recently used rows are evicted.
+    """
+
+    EVICT_EVERY = 50  # writes between eviction checks
+    EVICT_BATCH = 1000
+
+    def __init__(self, hot_ttl_seconds: int, max_bytes: int):
+        self.hot_ttl_seconds = hot_ttl_seconds
+        self.max_bytes = max_bytes
+        self._writes_since_evict = 0
+        self.counters = {"hot_hits": 0, "db_hits": 0, "misses": 0, "stored": 0, "evicted": 0, "db_errors": 0}
+
+    async def get(self, key: str) -> Optional[str]:
+        cached = await redis_cache.get(key)
+        if cached:
+            self.counters["hot_hits"] += 1
+            return cached
+        try:
+            async with AsyncSessionLocal() as db:
+                row = await db.get(LLMResponse, key)
+                if row is None:
+                    self.counters["misses"] += 1
+                    return None
+                row.hits += 1
+                row.last_used_at = datetime.utcnow()
+                response = row.response
+                await db.commit()
+        except SQLAlchemyError as e:
+            self.counters["db_errors"] += 1
+            logger.warning(f"LLM response store lookup failed: {e}")
+            return None
+        self.counters["db_hits"] += 1
+        await redis_cache.setex(key, self.hot_ttl_seconds, response)
+        return response
+
+    async def put(self, key: str, model: str, normalized_prompt: str, response: str):
+        await redis_cache.setex(key, self.hot_ttl_seconds, response)
+        await self.put_many([{"key": key, "model": model, "normalized_prompt": normalized_prompt, "response": response}], overwrite=True)
+
+    async def put_many(self, entries: Iterable[dict], overwrite: bool = False) -> int:
+        """Writes entries to the table, replacing existing keys only when `overwrite` is set."""
+        entries = {entry["key"]: entry for entry in entries}
+        if not entries:
+            return 0
+        written = 0
+        try:
+            async with AsyncSessionLocal() as db:
+                existing = {
+                    row.key: row for row in
+                    (await db.execute(select(LLMResponse).where(LLMResponse.key.in_(list(entries))))).scalars()
+                }
+                for key, entry in entries.items():
+                    size = len(entry["response"].encode())
+                    row = existing.get(key)
+                    if row is None:
+                        db.add(LLMResponse(**entry, size_bytes=size, hits=0))
+                    elif overwrite:
+                        row.response = entry["response"]
+                        row.size_bytes = size
+                        row.last_used_at = datetime.utcnow()
+                    else:
+                        continue
+                    written += 1
+                await db.commit()
+                self.counters["stored"] += written
+                self._writes_since_evict += written
+                if self._writes_since_evict >= self.EVICT_EVERY:
+                    self._writes_since_evict = 0
+                    await self.evict(db)
+        except SQLAlchemyError as e:
+            # Includes a concurrent insert of the same key from another worker
+            self.counters["db_errors"] += 1
+            logger.warning(f"LLM response store write failed: {e}")
+            return 0
+        return written
+
+    async def evict(self, db) -> int:
+        total = await db.scalar(select(func.coalesce(func.sum(LLMResponse.size_bytes), 0)))
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return 0
+        victims = []
+        rows = await db.execute(
+            select(LLMResponse.key, LLMResponse.size_bytes)
+            .order_by(LLMResponse.last_used_at.asc())
+            .limit(self.EVICT_BATCH)
+        )
+        for key, size in rows:
+            if excess <= 0:
+                break
+            victims.append(key)
+            excess -= size
+        if not victims:
+            return 0
+        await db.execute(delete(LLMResponse).where(LLMResponse.key.in_(victims)))
+        await db.commit()
+        await redis_cache.call("delete", *victims)
+        self.counters["evicted"] += len(victims)
+        logger.info(f"Evicted {len(victims)} stored LLM responses")
+        return len(victims)
+
+    def stats(self) -> dict:
+        return {"max_bytes": self.max_bytes, **self.counters}
+
+response_store = ResponseStore(config.LLM_RESPONSE_HOT_TTL_SECONDS, config.LLM_RESPONSE_STORE_MAX_BYTES)
+
+register_provider("llm_response_store", response_store.stats)
@@ -0,0 +1,157 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from app.core import config
+from app.core.metrics import register_provider
+from app.core.redis_client import redis_cache
+
+# Leading phrases that do not change which roadmap a user wants:
+# "I want to become a Python developer" and "python developer" are the same request.
+_LEADING_STOP_PHRASES = [
+    "i want to become", "i want to be", "i would like to become", "i would like to be",
+    "how do i become", "how to become", "how to be", "help me become",
+    "become a", "become an", "become", "be a", "be an",
+    "roadmap for", "roadmap to", "learning path for", "career in", "career as",
+    "learn to be", "learn",
+]
+# Dropped only before a real word, so "a.i. engineer" is not cut down to "i engineer"
+_LEADING_ARTICLES = re.compile(r"(?:a|an|the) (?=[\w+#]{2,}(?: |$))")
+_TRAILING_STOP_PHRASES = ["roadmap", "learning path", "career", "path"]
+_PUNCTUATION = re.compile(r"[^\w\s+#]")  # keep "c++" and "c#"
+_ABBREVIATION = re.compile(r"\b(?:[^\W\d_]\.){2,}")  # "a.i." and "u.x." are the words "ai" and "ux"
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_goal(goal: str) -> str:
+    text = unicodedata.normalize("NFKC", goal).casefold()
+    text = _ABBREVIATION.sub(lambda m: m.group().replace(".", ""), text)
+    text = _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text)).strip()
+    changed = True
+    while changed and text:
+        changed = False
+        for phrase in _LEADING_STOP_PHRASES:
+            if text == phrase:
+                break
+            if text.startswith(phrase + " "):
+                text = text[len(phrase) + 1:]
+                changed = True
+        article = _LEADING_ARTICLES.match(text)
+        if article:
+            text = text[article.end():]
+            changed = True
+        for phrase in _TRAILING_STOP_PHRASES:
+            if text.endswith(" " + phrase):
+                text = text[: -len(phrase) - 1]
+                changed = True
+    return text or goal.strip().casefold()
+
+def roadmap_cache_key(normalized_goal: str, model: str, prompt: str, temperature: float) -> str:
+    # Changing the model, sampling temperature or prompt text starts a new key space instead of serving stale output
+    version = hashlib.sha256(f"{model}\n{temperature}\n{prompt}".encode()).hexdigest()[:12]
+    digest = hashlib.sha256(normalized_goal.encode()).hexdigest()
+    return f"roadmap:{version}:{digest}"
+
+def _shingles(text: str, n: int = 3) -> frozenset:
+    padded = f" {text} "
+    return frozenset(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+
+def similarity(a: str, b: str) -> float:
+    """Jaccard similarity of character trigrams."""
+    sa, sb = _shingles(a), _shingles(b)
+    return len(sa & sb) / len(sa | sb) if sa or sb else 1.0
+
+class GoalSimilarityIndex:
+    """
+    Normalized goals that already have a cached roadmap, for near-duplicate lookup.
+    Shared across workers through a Redis sorted set scored by last use and trimmed to
+    the `max_goals` most recent, and mirrored in a per-process LRU of the same size,
+    so goals that stop being asked for make room for new ones.
+    """
+
+    REFRESH_SECONDS = 60
+
+    def __init__(self, redis_key: str, max_goals: int = 5000):
+        self.redis_key = redis_key
+        self.max_goals = max_goals
+        self._goals = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshed_at = 0.0
+
+    async def _refresh(self):
+        if time.monotonic() - self._refreshed_at < self.REFRESH_SECONDS:
+            return
+        self._refreshed_at = time.monotonic()
+        members = await redis_cache.call("zrevrange", self.redis_key, 0, self.max_goals - 1)
+        for goal in reversed(members or []):  # least recently used first, so it is evicted first
+            self._remember(goal)
+
+    def _remember(self, goal: str):
+        with self._lock:
+            if goal in self._goals:
+                self._goals.move_to_end(goal)
+                return
+            self._goals[goal] = _shingles(goal)
+            while len(self._goals) > self.max_goals:
+                self._goals.popitem(last=False)
+
+    async def add(self, normalized_goal: str):
+        """Adds a goal, or marks it as just used."""
+        self._remember(normalized_goal)
+        if await redis_cache.call("zadd", self.redis_key, {normalized_goal: time.time()}) is not None:
+            await redis_cache.call("zremrangebyrank", self.redis_key, 0, -self.max_goals - 1)
+
+    async def most_similar(self, normalized_goal: str) -> tuple[Optional[str], float]:
+        await self._refresh()
+        target = _shingles(normalized_goal)
+        best, best_score = None, 0.0
+        with self._lock:
+            candidates = list(self._goals.items())
+        for goal, shingles in candidates:
+            if goal == normalized_goal:
+                continue
+            score = len(target & shingles) / len(target | shingles)
+            if score > best_score:
+                best, best_score = goal, score
+        return best, best_score
+
+    def stats(self) -> dict:
+        return {"goals": len(self._goals), "max_goals": self.max_goals}
+
+class RoadmapCacheMetrics:
+    """Exact/near/miss counts plus a histogram of the best similarity seen on lookups that
+    missed the exact key, which shows how many misses a lower ROADMAP_SIMILARITY_THRESHOLD
+    would turn into hits."""
+
+    BUCKETS = [0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1.0]
+
+    def __init__(self):
+        self.counts = {"exact_hits": 0, "near_hits": 0, "misses": 0}
+        self.best_similarity = {f">={b}": 0 for b in self.BUCKETS}
+
+    def record(self, outcome: str, best_score: float = 0.0):
+        self.counts[outcome] += 1
+        for bucket in reversed(self.BUCKETS):
+            if best_score >= bucket:
+                self.best_similarity[f">={bucket}"] += 1
+                break
+
+    def snapshot(self) -> dict:
+        lookups = sum(self.counts.values())
+        hits = self.counts["exact_hits"] + self.counts["near_hits"]
+        return {
+            **self.counts,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "similarity_threshold": config.ROADMAP_SIMILARITY_THRESHOLD,
+            "best_similarity": dict(self.best_similarity),
+        }
+
+# A sorted set under a new key: the earlier unbounded "roadmap_goals" set is no longer read
+goal_index = GoalSimilarityIndex("roadmap_goals_by_use")
+cache_metrics = RoadmapCacheMetrics()
+
+register_provider("roadmap_cache", cache_metrics.snapshot)
+register_provider("roadmap_goal_index", goal_index.stats)
@@ -0,0 +1,310 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+
+from app.core import config
+from app.core.metrics import register_provider
+from app.core.redis_client import redis_cache
+from app.database import AsyncSessionLocal
+import app.crud_async as crud_async
+import app.schemas as schemas
+from app.services.ai_service_updated import generate_roadmap_from_goal
+
+logger = logging.getLogger(__name__)
+
+# Moves the next job from the queue to the running set with a lease, so a job is never
+# claimed twice and never lost between the two sets
+_CLAIM_JOB = """
+local claimed = redis.call("zpopmin", KEYS[1])
+if claimed[1] == nil then
+    return false
+end
+redis.call("zadd", KEYS[2], ARGV[1], claimed[1])
+return claimed[1]
+"""
+
+class JobQueueFullError(Exception):
+    """Raised when too many roadmap jobs are already queued."""
+    pass
+
+class JobStore:
+    """Job state in Redis so any worker can report status, mirrored in process for when Redis is down."""
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._local = {}
+
+    async def save(self, job: dict):
+        self._local[job["id"]] = job
+        await redis_cache.call("set", f"roadmap_job:{job['id']}", json.dumps(job), ex=self.ttl_seconds)
+
+    async def get(self, job_id: str) -> dict | None:
+        stored = await redis_cache.call("get", f"roadmap_job:{job_id}")
+        if stored:
+            return json.loads(stored)
+        return self._local.get(job_id)
+
+    def forget(self, job_id: str):
+        self._local.pop(job_id, None)
+
+class RoadmapJobManager:
+    """
+    Runs roadmap generation outside the request: submit() returns at once and a fixed
+    number of worker tasks per process take jobs in priority order (higher first, FIFO
+    within a priority).
+
+    The queue is a Redis sorted set shared by all workers, so a job submitted to one
+    worker can run on any other and survives a restart. A claimed job moves to a
+    running set with a lease that its worker renews; a job whose lease runs out (its
+    worker died) or that was queued in process while Redis was down is put back in the
+    queue at startup or by the periodic check, up to MAX_ATTEMPTS runs, then failed.
+    While Redis is unavailable jobs are queued in process.
+
+    Cancelling a queued job removes it; cancelling a running job cancels its task, also
+    when requested from another worker, which stops the model call.
+    """
+
+    QUEUE_KEY = "roadmap_jobs:queue"
+    RUNNING_KEY = "roadmap_jobs:running"
+    POLL_SECONDS = 1.0
+    LEASE_SECONDS = 60
+    MAX_ATTEMPTS = 2
+
+    def __init__(self, concurrency: int, max_queued: int, store: JobStore):
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.store = store
+        self._local_queue = asyncio.PriorityQueue()
+        self._wakeup = asyncio.Event()
+        self._workers = []
+        self._running = {}
+        self._sequence = itertools.count()
+        self.counters = {"submitted": 0, "succeeded": 0, "failed": 0, "cancelled": 0, "rejected": 0, "recovered": 0}
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._workers.append(asyncio.create_task(self._recover_periodically()))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @staticmethod
+    def _score(priority: int) -> float:
+        # Lower scores are claimed first: priority, then submission time in milliseconds
+        return -priority * 1e13 + time.time() * 1000
+
+    async def _enqueue(self, job: dict):
+        if await redis_cache.call("zadd", self.QUEUE_KEY, {job["id"]: self._score(job["priority"])}) is None:
+            self._local_queue.put_nowait((-job["priority"], next(self._sequence), job["id"]))
+        self._wakeup.set()
+
+    async def queued(self) -> int:
+        shared = await redis_cache.call("zcard", self.QUEUE_KEY)
+        return (shared or 0) + self._local_queue.qsize()
+
+    async def submit(self, user_id: int, goal: str, priority: int = 0) -> dict:
+        if await self.queued() >= self.max_queued:
+            self.counters["rejected"] += 1
+            raise JobQueueFullError("Too many roadmap jobs queued, please retry shortly")
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "goal": goal,
+            "priority": priority,
+            "status": "queued",
+            "roadmap_id": None,
+            "error": None,
+            "attempts": 0,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        await self.store.save(job)
+        await self._enqueue(job)
+        self.counters["submitted"] += 1
+        return job
+
+    async def get(self, job_id: str, user_id: int) -> dict | None:
+        job = await self.store.get(job_id)
+        if job is None or job["user_id"] != user_id:
+            return None
+        return job
+
+    async def cancel(self, job_id: str, user_id: int) -> dict | None:
+        job = await self.get(job_id, user_id)
+        if job is None or job["status"] not in ("queued", "running"):
+            return job
+        job["status"] = "cancelled"
+        job["finished_at"] = datetime.utcnow().isoformat()
+        await self.store.save(job)
+        await redis_cache.call("zrem", self.QUEUE_KEY, job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+        return job
+
+    async def _claim(self) -> str | None:
+        job_id = await redis_cache.call("eval", _CLAIM_JOB, 2, self.QUEUE_KEY, self.RUNNING_KEY, time.time() + self.LEASE_SECONDS)
+        if job_id is not None:
+            return job_id
+        try:
+            return self._local_queue.get_nowait()[2]
+        except asyncio.QueueEmpty:
+            return None
+
+    async def _worker(self):
+        while True:
+            job_id = await self._claim()
+            if job_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                logger.error(f"Roadmap job {job_id} crashed: {e}", exc_info=True)
+            finally:
+                await redis_cache.call("zrem", self.RUNNING_KEY, job_id)
+
+    async def _process(self, job_id: str):
+        job = await self.store.get(job_id)
+        if job is None or job["status"] != "queued":
+            self.store.forget(job_id)
+            return
+        # A job taken from the in-process queue needs a lease too, or recovery would take it back
+        await redis_cache.call("zadd", self.RUNNING_KEY, {job_id: time.time() + self.LEASE_SECONDS})
+        job["status"] = "running"
+        job["attempts"] = job.get("attempts", 0) + 1
+        job["started_at"] = datetime.utcnow().isoformat()
+        await self.store.save(job)
+
+        task = asyncio.create_task(self._generate(job))
+        self._running[job_id] = task
+        watcher = asyncio.create_task(self._watch(job_id, task))
+        try:
+            job["roadmap_id"] = await task
+            job["status"] = "succeeded"
+            self.counters["succeeded"] += 1
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                # The worker itself is shutting down: hand the job to another worker
+                task.cancel()
+                await self._requeue(job)
+                raise
+            job["status"] = "cancelled"
+            self.counters["cancelled"] += 1
+        except Exception as e:
+            # The job is returned to the user, so it only gets a fixed message
+            logger.error(f"Roadmap job {job_id} failed: {e}", exc_info=True)
+            job["status"] = "failed"
+            job["error"] = "Failed to generate roadmap from AI."
+            self.counters["failed"] += 1
+        finally:
+            watcher.cancel()
+            self._running.pop(job_id, None)
+        job["finished_at"] = datetime.utcnow().isoformat()
+        await self.store.save(job)
+        self.store.forget(job_id)
+
+    async def _watch(self, job_id: str, task: asyncio.Task):
+        # Renews the lease, and a DELETE handled by another worker only reaches us through the store
+        while not task.done():
+            await asyncio.sleep(self.POLL_SECONDS)
+            await redis_cache.call("zadd", self.RUNNING_KEY, {job_id: time.time() + self.LEASE_SECONDS})
+            job = await self.store.get(job_id)
+            if job is not None and job["status"] == "cancelled":
+                task.cancel()
+
+    async def _requeue(self, job: dict):
+        if job.get("attempts", 0) >= self.MAX_ATTEMPTS:
+            job["status"] = "failed"
+            job["error"] = "Roadmap generation was interrupted, please submit the goal again"
+            job["finished_at"] = datetime.utcnow().isoformat()
+            await self.store.save(job)
+            self.counters["failed"] += 1
+            return
+        job["status"] = "queued"
+        job["started_at"] = None
+        await self.store.save(job)
+        await self._enqueue(job)
+        self.counters["recovered"] += 1
+
+    async def recover(self, scan_jobs: bool = False):
+        """
+        Puts back jobs whose worker stopped without finishing them: running jobs whose
+        lease expired and, with `scan_jobs`, queued or running jobs missing from both sets
+        (queued in process, or claimed when their worker stopped).
+        """
+        orphans = set(await redis_cache.call("zrangebyscore", self.RUNNING_KEY, "-inf", time.time()) or [])
+        if scan_jobs and (client := redis_cache.client()) is not None:
+            try:
+                async for key in client.scan_iter(match="roadmap_job:*", count=500):
+                    orphans.add(key.split(":", 1)[1])
+            except Exception as e:
+                logger.warning(f"Scanning roadmap jobs failed: {e}")
+        for job_id in orphans:
+            if job_id in self._running:
+                continue
+            if await redis_cache.call("zscore", self.QUEUE_KEY, job_id) is not None:
+                continue
+            lease = await redis_cache.call("zscore", self.RUNNING_KEY, job_id)
+            if lease is not None and lease > time.time():
+                continue
+            # Only the worker that removes the lease recovers the job
+            if lease is not None and not await redis_cache.call("zrem", self.RUNNING_KEY, job_id):
+                continue
+            job = await self.store.get(job_id)
+            if job is None or job["status"] not in ("queued", "running"):
+                continue
+            logger.warning(f"Recovering roadmap job {job_id} left {job['status']} by a stopped worker")
+            await self._requeue(job)
+
+    async def _recover_periodically(self):
+        scan_jobs = True  # at startup, also jobs a stopped worker had queued in process
+        while True:
+            try:
+                await self.recover(scan_jobs)
+            except Exception as e:
+                logger.warning(f"Recovering roadmap jobs failed: {e}")
+            scan_jobs = False
+            await asyncio.sleep(self.LEASE_SECONDS)
+
+    async def _generate(self, job: dict) -> int:
+        ai_generated_roadmap_data = await generate_roadmap_from_goal(job["goal"])
+        if not ai_generated_roadmap_data or "title" not in ai_generated_roadmap_data:
+            raise RuntimeError("Failed to generate roadmap from AI.")
+        async with AsyncSessionLocal() as db:
+            db_roadmap = await crud_async.create_full_roadmap_from_ai(
+                db=db,
+                ai_roadmap_data=schemas.AIGeneratedRoadmap(**ai_generated_roadmap_data),
+                user_id=job["user_id"],
+                goal=job["goal"],
+                ai_generated_content=json.dumps(ai_generated_roadmap_data)
+            )
+            return db_roadmap.id
+
+    def stats(self) -> dict:
+        return {
+            "queued_local": self._local_queue.qsize(),
+            "running": len(self._running),
+            "concurrency": self.concurrency,
+            **self.counters,
+        }
+
+roadmap_jobs = RoadmapJobManager(
+    config.ROADMAP_JOB_CONCURRENCY,
+    config.ROADMAP_JOB_MAX_QUEUED,
+    JobStore(config.ROADMAP_JOB_TTL_SECONDS),
+)
+
+register_provider("roadmap_jobs", roadmap_jobs.stats)
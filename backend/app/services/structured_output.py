@@ -0,0 +1,140 @@
+import json
+from typing import Any, Callable, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from app.core.metrics import register_provider
+
+def response_schema(model: Type[BaseModel]) -> dict:
+    """
+    JSON schema for a model's JSON mode, built from a pydantic model. Gemini accepts an
+    OpenAPI subset only, so $refs are inlined, Optional[X] becomes a nullable X and
+    titles/defaults are dropped.
+    """
+    schema = model.model_json_schema()
+    definitions = schema.pop("$defs", {})
+
+    def convert(node: dict) -> dict:
+        if "$ref" in node:
+            return convert(definitions[node["$ref"].rsplit("/", 1)[-1]])
+        if "anyOf" in node:
+            options = [option for option in node["anyOf"] if option.get("type") != "null"]
+            converted = convert(options[0])
+            if len(options) < len(node["anyOf"]):
+                converted["nullable"] = True
+            return converted
+        converted = {"type": node["type"]}
+        if node["type"] == "object":
+            converted["properties"] = {name: convert(prop) for name, prop in node.get("properties", {}).items()}
+            converted["required"] = node.get("required", [])
+        elif node["type"] == "array":
+            converted["items"] = convert(node["items"])
+        return converted
+
+    return convert(schema)
+
+def _strip_fences(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
+def _repair_candidates(text: str) -> list:
+    """
+    Rewrites of a damaged JSON object as (text, truncated) pairs, most faithful first:
+    prose before the first "{" and after the matching "}" is dropped, trailing commas
+    are removed, and a truncated document is closed either as-is or after a complete
+    element. `truncated` marks rewrites that had to close open brackets, which may
+    have lost content.
+    """
+    start = text.find("{")
+    if start < 0:
+        return []
+    out = []
+    stack = []
+    in_string = escape = False
+    safe_points = {}  # nesting depth -> (length of out, open containers) after its last complete element
+    pending_comma = None
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char.isspace():
+            if pending_comma is None:
+                out.append(char)
+            continue
+        if char in "}]":
+            pending_comma = None  # a comma right before a closer is a trailing comma
+            if not stack:
+                break
+            out.append(stack.pop())
+            safe_points[len(stack)] = (len(out), list(stack))
+            if not stack:
+                return [("".join(out), False)]
+            continue
+        if pending_comma is not None:
+            out.append(",")
+            pending_comma = None
+        if char == ",":
+            safe_points[len(stack)] = (len(out), list(stack))
+            pending_comma = True
+            continue
+        out.append(char)
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+
+    # Truncated: close what is open, keeping the unfinished element, or else cut back to
+    # the last complete element, then to the last complete element of each enclosing level
+    candidates = [("".join(out) + ('"' if in_string else "") + "".join(reversed(stack)), True)]
+    for length, open_containers in sorted(safe_points.values(), key=lambda point: point[0], reverse=True):
+        candidates.append(("".join(out[:length]) + "".join(reversed(open_containers)), True))
+    return candidates
+
+class RepairStats:
+    def __init__(self):
+        self.counts = {"clean": 0, "repaired": 0, "truncated": 0, "failed": 0}
+
+    def snapshot(self) -> dict:
+        total = sum(self.counts.values())
+        return {**self.counts, "repair_rate": round(self.counts["repaired"] / total, 4) if total else 0.0}
+
+repair_stats = RepairStats()
+
+def loads_tolerant(text: str, coerce: Optional[Callable[[Any], Any]] = None) -> Tuple[Any, Optional[str]]:
+    """
+    Parses model output as JSON, repairing common defects locally. `coerce` may convert
+    and validate the parsed value, raising ValueError to reject it; the next repair
+    candidate is then tried. Returns (value, repair), where repair is None for clean
+    output, "syntax" for fences, prose or trailing commas, and "truncated" when open
+    brackets had to be closed (the value may be missing content); raises the error of
+    the unrepaired text when nothing parses.
+    """
+    cleaned = _strip_fences(text)
+    first_error = None
+    for attempt, (candidate, truncated) in enumerate([(cleaned, False)] + _repair_candidates(cleaned)):
+        try:
+            value = json.loads(candidate)
+            if coerce is not None:
+                value = coerce(value)
+        except ValueError as e:  # includes json.JSONDecodeError and pydantic's ValidationError
+            first_error = first_error or e
+            continue
+        if truncated:
+            repair_stats.counts["truncated"] += 1
+            return value, "truncated"
+        repair_stats.counts["repaired" if attempt else "clean"] += 1
+        return value, "syntax" if attempt else None
+    repair_stats.counts["failed"] += 1
+    raise first_error
+
+register_provider("llm_json_repair", repair_stats.snapshot)
@@ -0,0 +1,62 @@
+import threading
+
+from app.core.metrics import register_provider
+
+def estimate_text_tokens(text: str) -> int:
+    # ~4 characters per token for English text and JSON
+    return len(text) // 4
+
+class TokenUsage:
+    """
+    Prompt and completion tokens per call purpose. Calls made to recover from a bad
+    response (self-heal re-prompts, regeneration after an invalid stream) are also
+    counted under retry_*, so their share of the spend is visible. Counts come from
+    the provider's usage metadata when present and are estimated otherwise.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_purpose = {}
+
+    def record(self, purpose: str, prompt_tokens: int, completion_tokens: int, retry: bool = False, estimated: bool = False):
+        with self._lock:
+            row = self.by_purpose.setdefault(purpose, {
+                "calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "retry_calls": 0, "retry_prompt_tokens": 0, "retry_completion_tokens": 0,
+                "estimated_calls": 0,
+            })
+            row["calls"] += 1
+            row["prompt_tokens"] += prompt_tokens
+            row["completion_tokens"] += completion_tokens
+            if retry:
+                row["retry_calls"] += 1
+                row["retry_prompt_tokens"] += prompt_tokens
+                row["retry_completion_tokens"] += completion_tokens
+            if estimated:
+                row["estimated_calls"] += 1
+
+    def record_response(self, purpose: str, messages: list, response, retry: bool = False):
+        """Records a LangChain AI message, falling back to estimates without usage metadata."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            self.record(purpose, usage.get("input_tokens", 0), usage.get("output_tokens", 0), retry)
+        else:
+            self.record(
+                purpose,
+                sum(estimate_text_tokens(msg["content"]) for msg in messages),
+                estimate_text_tokens(response.content if isinstance(response.content, str) else str(response.content)),
+                retry,
+                estimated=True,
+            )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            rows = {purpose: dict(row) for purpose, row in self.by_purpose.items()}
+        for row in rows.values():
+            row["avg_prompt_tokens"] = round(row["prompt_tokens"] / row["calls"], 1)
+            row["avg_completion_tokens"] = round(row["completion_tokens"] / row["calls"], 1)
+        return rows
+
+token_usage = TokenUsage()
+
+register_provider("llm_tokens", token_usage.snapshot)
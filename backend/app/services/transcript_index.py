@@ -0,0 +1,108 @@
+import asyncio
+import math
+import re
+from collections import Counter
+from typing import List
+
+from app.core import config
+from app.core.cache import TTLCache
+from app.core.metrics import LatencyStats, register_provider
+from app.services.token_usage import estimate_text_tokens
+
+_TOKEN = re.compile(r"\w+")
+_STOP_WORDS = frozenset(
+    "a an and are as at be but by can do does for from how i if in into is it its of on or so "
+    "that the their then there these this to was we what when where which who why will with you your".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.casefold()) if token not in _STOP_WORDS]
+
+def transcript_windows(segments: List[dict], window_tokens: int) -> List[dict]:
+    """
+    Overlapping windows of about `window_tokens` over the transcript, on caption
+    boundaries; each window starts halfway through the previous one, so a passage
+    that straddles a boundary is still whole in one window.
+    """
+    segments = [s for s in segments if s["text"].strip()]
+    sizes = [estimate_text_tokens(s["text"]) + 1 for s in segments]
+    windows = []
+    first = 0
+    while first < len(segments):
+        last, tokens, half = first, 0, None
+        while last < len(segments) and (tokens == 0 or tokens + sizes[last] <= window_tokens):
+            tokens += sizes[last]
+            if half is None and tokens >= window_tokens // 2:
+                half = last + 1
+            last += 1
+        end = segments[last - 1]
+        windows.append({
+            "start": segments[first]["start"],
+            "end": end["start"] + end.get("duration", 0),
+            "text": " ".join(s["text"].strip() for s in segments[first:last]),
+        })
+        if last == len(segments):
+            break
+        first = half if half is not None and first < half < last else last
+    return windows
+
+class BM25Index:
+    """Okapi BM25 over transcript windows, built once per video."""
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, windows: List[dict]):
+        self.windows = windows
+        self._terms = [Counter(tokenize(w["text"])) for w in windows]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        document_frequency = Counter(term for terms in self._terms for term in terms)
+        n = len(windows)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def search(self, query: str, k: int) -> List[dict]:
+        """The `k` best matching windows, in transcript order; empty when nothing matches."""
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        if not terms:
+            return []
+        scored = []
+        for i, (tf, length) in enumerate(zip(self._terms, self._lengths)):
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    norm = freq + self.K1 * (1 - self.B + self.B * length / self._avg_length)
+                    score += self._idf[term] * freq * (self.K1 + 1) / norm
+            if score > 0:
+                scored.append((score, i))
+        best = sorted(scored, reverse=True)[:k]
+        return [self.windows[i] for _, i in sorted(best, key=lambda item: item[1])]
+
+class TranscriptIndexes:
+    """Per-process LRU of BM25 indexes by video id; indexes are built off the event loop."""
+
+    def __init__(self, window_tokens: int, max_entries: int):
+        self.window_tokens = window_tokens
+        self._cache = TTLCache(max_entries, float("inf"))
+        self._build_latency = LatencyStats()
+
+    def _build(self, segments: List[dict]) -> BM25Index:
+        return BM25Index(transcript_windows(segments, self.window_tokens))
+
+    async def get(self, video_id: str, segments: List[dict]) -> BM25Index:
+        index = self._cache.get(video_id)
+        if index is None:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            index = await asyncio.to_thread(self._build, segments)
+            self._build_latency.observe(loop.time() - started)
+            self._cache.set(video_id, index)
+        return index
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "build_latency": self._build_latency.summary()}
+
+transcript_indexes = TranscriptIndexes(config.VIDEO_INDEX_WINDOW_TOKENS, config.VIDEO_INDEX_CACHE_ENTRIES)
+
+register_provider("video_transcript_index", transcript_indexes.stats)
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from app.core import config
+from app.core.cache import TTLCache
+from app.core.metrics import LatencyStats, register_provider
+from app.core.singleflight import SingleFlight
+from app.database import AsyncSessionLocal
+from app.models import VideoTranscript
+
+logger = logging.getLogger(__name__)
+
+def compress_segments(segments: List[dict]) -> bytes:
+    return zlib.compress(json.dumps(segments, separators=(",", ":")).encode(), 6)
+
+def decompress_segments(data: bytes) -> List[dict]:
+    return json.loads(zlib.decompress(data))
+
+class TranscriptStore:
+    """
+    Transcripts by YouTube video id. Lookups go through a per-process LRU of decoded
+    segments, then the video_transcripts table (zlib-compressed JSON), and only then to
+    YouTube. The blocking transcript API runs on its own small thread pool, and
+    concurrent misses for one video (across workers too) share a single fetch.
+    A video without a transcript is remembered in memory for `unavailable_ttl` seconds.
+    """
+
+    EVICT_EVERY = 20  # stored transcripts between eviction checks
+    EVICT_BATCH = 500
+
+    def __init__(self, fetcher: Callable[[str], List[dict]], workers: int, max_bytes: int,
+                 memory_entries: int, memory_ttl: int, unavailable_ttl: int):
+        self.fetcher = fetcher
+        self.max_bytes = max_bytes
+        self.unavailable_ttl = unavailable_ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="transcript-fetch")
+        self._memory = TTLCache(memory_entries, memory_ttl)
+        self._flights = SingleFlight("transcript", config.SINGLEFLIGHT_LOCK_SECONDS, config.SINGLEFLIGHT_WAIT_SECONDS)
+        self._writes_since_evict = 0
+        self._fetch_latency = LatencyStats()
+        self.counters = {"db_hits": 0, "fetches": 0, "unavailable": 0, "stored": 0, "evicted": 0, "db_errors": 0}
+
+    async def get(self, video_id: str) -> Optional[List[dict]]:
+        """The transcript's {text, start, duration} segments, or None when the video has none."""
+        segments = self._memory.get(video_id)
+        if segments is None:
+            segments = await self._flights.do(video_id, lambda: self._load_or_fetch(video_id), lambda: self._load(video_id))
+            self._memory.set(video_id, segments, None if segments else self.unavailable_ttl)
+        return segments or None
+
+    async def _load_or_fetch(self, video_id: str) -> List[dict]:
+        segments = await self._load(video_id)
+        if segments is not None:
+            return segments
+        segments = await self._fetch(video_id)
+        if segments:
+            await self._store(video_id, segments)
+        return segments
+
+    async def _fetch(self, video_id: str) -> List[dict]:
+        self.counters["fetches"] += 1
+        started = time.perf_counter()
+        try:
+            raw = await asyncio.get_running_loop().run_in_executor(self._executor, self.fetcher, video_id)
+        except Exception as e:
+            # Disabled/missing transcripts and network failures alike
+            self.counters["unavailable"] += 1
+            logger.info(f"Transcript for video {video_id} not available: {e}")
+            return []
+        finally:
+            self._fetch_latency.observe(time.perf_counter() - started)
+        return [{"text": t["text"], "start": t["start"], "duration": t["duration"]} for t in raw]
+
+    async def _load(self, video_id: str) -> Optional[List[dict]]:
+        try:
+            async with AsyncSessionLocal() as db:
+                row = await db.get(VideoTranscript, video_id)
+                if row is None:
+                    return None
+                row.last_used_at = datetime.utcnow()
+                data = row.data
+                await db.commit()
+        except SQLAlchemyError as e:
+            self.counters["db_errors"] += 1
+            logger.warning(f"Transcript store lookup failed: {e}")
+            return None
+        self.counters["db_hits"] += 1
+        return decompress_segments(data)
+
+    async def _store(self, video_id: str, segments: List[dict]):
+        data = compress_segments(segments)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.merge(VideoTranscript(video_id=video_id, data=data, size_bytes=len(data), segments=len(segments),
+                                               last_used_at=datetime.utcnow()))
+                await db.commit()
+                self.counters["stored"] += 1
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= self.EVICT_EVERY:
+                    self._writes_since_evict = 0
+                    await self.evict(db)
+        except SQLAlchemyError as e:
+            self.counters["db_errors"] += 1
+            logger.warning(f"Transcript store write failed: {e}")
+
+    async def evict(self, db) -> int:
+        total = await db.scalar(select(func.coalesce(func.sum(VideoTranscript.size_bytes), 0)))
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return 0
+        victims = []
+        rows = await db.execute(
+            select(VideoTranscript.video_id, VideoTranscript.size_bytes)
+            .order_by(VideoTranscript.last_used_at.asc())
+            .limit(self.EVICT_BATCH)
+        )
+        for video_id, size in rows:
+            if excess <= 0:
+                break
+            victims.append(video_id)
+            excess -= size
+        if not victims:
+            return 0
+        await db.execute(delete(VideoTranscript).where(VideoTranscript.video_id.in_(victims)))
+        await db.commit()
+        self.counters["evicted"] += len(victims)
+        logger.info(f"Evicted {len(victims)} stored transcripts")
+        return len(victims)
+
+    def stats(self) -> dict:
+        return {
+            "max_bytes": self.max_bytes,
+            "memory": self._memory.stats(),
+            "fetch_latency": self._fetch_latency.summary(),
+            "singleflight": self._flights.stats(),
+            **self.counters,
+        }
+
+transcript_store = TranscriptStore(
+    YouTubeTranscriptApi.get_transcript,
+    config.TRANSCRIPT_FETCH_WORKERS,
+    config.TRANSCRIPT_STORE_MAX_BYTES,
+    config.TRANSCRIPT_MEMORY_CACHE_ENTRIES,
+    config.TRANSCRIPT_MEMORY_CACHE_TTL_SECONDS,
+    config.TRANSCRIPT_UNAVAILABLE_TTL_SECONDS,
+)
+
+register_provider("video_transcripts", transcript_store.stats)
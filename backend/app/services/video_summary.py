@@ -0,0 +1,216 @@
+import asyncio
+import hashlib
+import logging
+from typing import List, Optional
+
+from app.core import config
+from app.core.metrics import register_provider
+from app.services.ai_service_updated import LLM_MODEL, _call_ai_model
+from app.services.response_store import response_store
+from app.services.transcript_index import transcript_indexes
+from app.services.token_usage import estimate_text_tokens
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN_SYSTEM_PROMPT = "You are an AI assistant that explains educational videos. Summarize the provided transcript and answer any specific user questions."
+
+CHUNK_SYSTEM_PROMPT = (
+    "You summarize one part of an educational video transcript. Keep the concepts, "
+    "definitions, examples and steps it covers, in the order they appear, as concise "
+    "bullet points. Do not add anything that is not in the transcript."
+)
+
+REDUCE_SYSTEM_PROMPT = (
+    "You are an AI assistant that explains educational videos. You are given summaries "
+    "of consecutive parts of one video, with their timestamps. Combine them into one "
+    "explanation of the whole video and answer any specific user questions."
+)
+
+ANSWER_SYSTEM_PROMPT = (
+    "You are an AI assistant that answers questions about educational videos. You are "
+    "given the parts of the video's transcript most relevant to the question, with their "
+    "timestamps, and sometimes an overview of the whole video. Answer from them and "
+    "mention the timestamps the answer comes from."
+)
+
+DEFAULT_QUESTION = "Summarize the key points."
+
+def format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def chunk_transcript(segments: List[dict], max_tokens: int) -> List[dict]:
+    """
+    Groups consecutive transcript segments into chunks of at most `max_tokens`, so every
+    chunk starts and ends on a caption boundary and keeps its time range. A single
+    segment longer than `max_tokens` becomes a chunk of its own.
+    """
+    chunks = []
+    texts, tokens, start = [], 0, None
+    for segment in segments:
+        text = segment["text"].strip()
+        if not text:
+            continue
+        size = estimate_text_tokens(text) + 1
+        if texts and tokens + size > max_tokens:
+            chunks.append({"start": start, "end": segment["start"], "text": " ".join(texts)})
+            texts, tokens, start = [], 0, None
+        if start is None:
+            start = segment["start"]
+        texts.append(text)
+        tokens += size
+    if texts:
+        last = segments[-1]
+        chunks.append({"start": start, "end": last["start"] + last.get("duration", 0), "text": " ".join(texts)})
+    for index, chunk in enumerate(chunks):
+        chunk["index"] = index
+    return chunks
+
+def _format_parts(parts: List[dict], field: str) -> str:
+    return "\n\n".join(f"[{format_timestamp(p['start'])} - {format_timestamp(p['end'])}]\n{p[field]}" for p in parts)
+
+def _chunk_summary_key(video_id: str, chunk: dict) -> str:
+    # Summaries depend on the chunk text, the model and the prompt only, so they are shared by every question
+    version = hashlib.sha256(f"{LLM_MODEL}\n{CHUNK_SYSTEM_PROMPT}".encode()).hexdigest()[:12]
+    digest = hashlib.sha256(chunk["text"].encode()).hexdigest()
+    return f"video_chunk:{version}:{video_id}:{chunk['index']}:{digest}"
+
+class VideoSummarizer:
+    """
+    Map-reduce explanation of long transcripts: the transcript is split into chunks of
+    about `chunk_tokens`, each chunk is summarized and the partial summaries are combined
+    with the user's question, with at most `concurrency` model calls at a time per request.
+    Chunk summaries do not depend on the question and are kept in the response store.
+    A specific question is answered from the `top_k` best matching transcript windows
+    of the video's BM25 index instead, with the chunk summaries as an overview when the
+    video has already been summarized. Transcripts that fit in one chunk keep the
+    single-prompt path.
+    """
+
+    def __init__(self, chunk_tokens: int, concurrency: int, reduce_max_tokens: int, top_k: int):
+        self.chunk_tokens = chunk_tokens
+        self.concurrency = concurrency
+        self.reduce_max_tokens = reduce_max_tokens
+        self.top_k = top_k
+        self.counters = {
+            "single_shot": 0, "map_reduce": 0, "retrieval": 0, "retrieval_no_match": 0,
+            "chunks_summarized": 0, "chunk_cache_hits": 0, "reduce_rounds": 0,
+        }
+
+    async def explain(self, video_id: str, segments: Optional[List[dict]], user_query: Optional[str] = None) -> str:
+        question = user_query or DEFAULT_QUESTION
+        chunks = chunk_transcript(segments or [], self.chunk_tokens)
+        if len(chunks) <= 1:
+            self.counters["single_shot"] += 1
+            transcript_text = chunks[0]["text"] if chunks else "Transcript not available."
+            return await _call_ai_model(self.single_shot_messages(transcript_text, question), purpose="explain_video")
+        if user_query:
+            excerpts = (await transcript_indexes.get(video_id, segments)).search(user_query, self.top_k)
+            if excerpts:
+                self.counters["retrieval"] += 1
+                overview = await self.cached_chunk_summaries(video_id, chunks)
+                return await _call_ai_model(self.answer_messages(excerpts, overview, user_query), purpose="explain_video_answer")
+            # Nothing in the transcript shares a term with the question
+            self.counters["retrieval_no_match"] += 1
+        self.counters["map_reduce"] += 1
+        summaries = await self.summarize_chunks(video_id, chunks)
+        return await self.reduce(summaries, question)
+
+    def answer_messages(self, excerpts: List[dict], overview: Optional[List[dict]], question: str) -> list:
+        parts = []
+        if overview:
+            parts.append("Overview of the whole video:\n\n" + _format_parts(overview, "summary"))
+        parts.append("Relevant transcript excerpts:\n\n" + _format_parts(excerpts, "text"))
+        return [
+            {"role": "system", "content": ANSWER_SYSTEM_PROMPT},
+            {"role": "user", "content": "\n\n".join(parts) + f"\n\nUser asked: {question}"},
+        ]
+
+    async def cached_chunk_summaries(self, video_id: str, chunks: List[dict]) -> Optional[List[dict]]:
+        """The stored chunk summaries when every chunk has one and they fit the reduce budget, else None."""
+        summaries = []
+        for chunk in chunks:
+            summary = await response_store.get(_chunk_summary_key(video_id, chunk))
+            if summary is None:
+                return None
+            summaries.append({"start": chunk["start"], "end": chunk["end"], "summary": summary})
+        if sum(estimate_text_tokens(s["summary"]) for s in summaries) > self.reduce_max_tokens:
+            return None
+        return summaries
+
+    @staticmethod
+    def single_shot_messages(transcript_text: str, question: str) -> list:
+        return [
+            {"role": "system", "content": EXPLAIN_SYSTEM_PROMPT},
+            {"role": "user", "content": f"""
+        Summarize this YouTube video tutorial transcript:
+        {transcript_text}
+
+        User asked: {question}
+        """}
+        ]
+
+    async def summarize_chunks(self, video_id: str, chunks: List[dict]) -> List[dict]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def summarize(chunk):
+            key = _chunk_summary_key(video_id, chunk)
+            summary = await response_store.get(key)
+            if summary is not None:
+                self.counters["chunk_cache_hits"] += 1
+            else:
+                async with semaphore:
+                    summary = await _call_ai_model([
+                        {"role": "system", "content": CHUNK_SYSTEM_PROMPT},
+                        {"role": "user", "content": chunk["text"]},
+                    ], purpose="explain_video_chunk")
+                self.counters["chunks_summarized"] += 1
+                await response_store.put(key, LLM_MODEL, f"{video_id} chunk {chunk['index']}", summary)
+            return {"start": chunk["start"], "end": chunk["end"], "summary": summary}
+
+        return await asyncio.gather(*(summarize(chunk) for chunk in chunks))
+
+    async def reduce(self, summaries: List[dict], question: str) -> str:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def combine(group):
+            async with semaphore:
+                return await self._combine(group, DEFAULT_QUESTION)
+
+        # Partial summaries that still do not fit are combined in groups first
+        while len(summaries) > 1 and sum(estimate_text_tokens(s["summary"]) for s in summaries) > self.reduce_max_tokens:
+            self.counters["reduce_rounds"] += 1
+            groups, group, tokens = [], [], 0
+            for summary in summaries:
+                size = estimate_text_tokens(summary["summary"])
+                if group and tokens + size > self.reduce_max_tokens:
+                    groups.append(group)
+                    group, tokens = [], 0
+                group.append(summary)
+                tokens += size
+            groups.append(group)
+            if len(groups) == len(summaries):
+                break
+            combined = await asyncio.gather(*(combine(group) for group in groups))
+            summaries = [{"start": g[0]["start"], "end": g[-1]["end"], "summary": text} for g, text in zip(groups, combined)]
+        return await self._combine(summaries, question)
+
+    async def _combine(self, summaries: List[dict], question: str) -> str:
+        parts = _format_parts(summaries, "summary")
+        return await _call_ai_model([
+            {"role": "system", "content": REDUCE_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Summaries of the video, in order:\n\n{parts}\n\nUser asked: {question}"},
+        ], purpose="explain_video_reduce")
+
+    def stats(self) -> dict:
+        return dict(self.counters)
+
+video_summarizer = VideoSummarizer(
+    config.VIDEO_CHUNK_TOKENS,
+    config.VIDEO_SUMMARY_CONCURRENCY,
+    config.VIDEO_REDUCE_MAX_TOKENS,
+    config.VIDEO_INDEX_TOP_K,
+)
+
+register_provider("video_summary", video_summarizer.stats)
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import re
+import time
+import unicodedata
+from typing import Optional
+
+import httpx
+
+from app.core import config
+from app.core.cache import TTLCache
+from app.core.http_client import SharedHTTPClient, http_client
+from app.core.metrics import register_provider
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(query: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", query).casefold()).strip()
+
+class YouTubeSearch:
+    """
+    YouTube Data API search through the shared HTTP client. Results (including "no
+    videos found") are cached per normalized query; a cached result older than
+    `refresh_after` is still served while one background request refreshes it.
+    """
+
+    def __init__(self, http: SharedHTTPClient, base_url: str, api_key: Optional[str],
+                 ttl_seconds: int, refresh_after_seconds: int, max_entries: int):
+        self.http = http
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.refresh_after_seconds = refresh_after_seconds
+        self._cache = TTLCache(max_entries, ttl_seconds)
+        self._refreshing = {}
+        self.counters = {"requests": 0, "errors": 0, "stale_served": 0, "refreshes": 0}
+
+    async def _fetch(self, query: str) -> Optional[dict]:
+        self.counters["requests"] += 1
+        try:
+            res = await self.http.client().get(f"{self.base_url}/search", params={
+                "part": "snippet", "type": "video", "order": "relevance", "videoDuration": "long",
+                "maxResults": 5, "q": query, "key": self.api_key,
+            })
+            res.raise_for_status()
+        except httpx.HTTPError:
+            self.counters["errors"] += 1
+            raise
+        data = res.json()
+        if not data.get("items"):
+            return None
+        # Basic ranking: pick first result
+        best_video = data["items"][0]
+        return {
+            "videoId": best_video["id"]["videoId"],
+            "title": best_video["snippet"]["title"],
+            "description": best_video["snippet"]["description"],
+        }
+
+    def describe_error(self, error: httpx.HTTPError) -> str:
+        """The error for logs, with the API key (sent in the query string) masked."""
+        text = f"{type(error).__name__}: {error}"
+        return text.replace(self.api_key, "***") if self.api_key else text
+
+    async def search(self, query: str) -> Optional[dict]:
+        """First matching video for `query`, or None; raises httpx.HTTPError on a cache miss the API fails."""
+        key = normalize_query(query)
+        cached = self._cache.get(key)
+        if cached is not None:
+            fetched_at, result = cached
+            if time.monotonic() - fetched_at > self.refresh_after_seconds:
+                self.counters["stale_served"] += 1
+                self._refresh_in_background(key, query)
+            return result
+        result = await self._fetch(query)
+        self._cache.set(key, (time.monotonic(), result))
+        return result
+
+    def _refresh_in_background(self, key: str, query: str):
+        if key in self._refreshing:
+            return
+        self._refreshing[key] = asyncio.create_task(self._refresh(key, query))
+
+    async def _refresh(self, key: str, query: str):
+        try:
+            self._cache.set(key, (time.monotonic(), await self._fetch(query)))
+            self.counters["refreshes"] += 1
+        except httpx.HTTPError as e:
+            logger.warning(f"Background refresh of YouTube search '{key}' failed, keeping cached result: {self.describe_error(e)}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), **self.counters, "refreshing": len(self._refreshing)}
+
+youtube_search = YouTubeSearch(
+    http_client,
+    config.YOUTUBE_API_BASE_URL,
+    config.YOUTUBE_API_KEY,
+    config.YOUTUBE_SEARCH_CACHE_TTL_SECONDS,
+    config.YOUTUBE_SEARCH_REFRESH_AFTER_SECONDS,
+    config.YOUTUBE_SEARCH_CACHE_MAX_ENTRIES,
+)
+
+register_provider("youtube_search", youtube_search.stats)
@@ -0,0 +1,96 @@
+"""
+Microbenchmark of the auth dependency (dependencies.get_current_user).
+
+Measures per-call latency and database statements with and without the
+in-process JTI blocklist index, against a token_blocklist table holding
+--blocklisted revoked tokens, and with the principal cache on top. Tokens
+carrying a "uid" claim are compared with legacy email-only tokens, which pay
+for the email hash, the email_hash index lookup and the Fernet decrypt.
+
+Usage (from backend/):
+    python -m benchmarks.bench_auth_dependency
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_auth_dependency.db')}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ENCRYPTION_KEY", "_6Jym9Yk7tV0_-2gwCOiWsSKIk3t9z0nEkhEs8rHVV4=")
+
+from sqlalchemy import event
+
+import app.models as models
+from app.core.blocklist import BlocklistIndex
+from app.core.principal_cache import principal_cache
+from app.core.security import create_access_token
+from app.database import engine, SessionLocal
+import app.crud as crud
+from app.dependencies import get_current_user
+
+
+def setup(blocklisted: int):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = models.User(username="bench", email="bench@example.com", hashed_password="x", is_email_verified=True)
+        db.add(user)
+        db.add_all(models.TokenBlocklist(jti=str(uuid.uuid4())) for _ in range(blocklisted))
+        db.commit()
+        user_id = user.id
+    expires = timedelta(minutes=30)
+    legacy = create_access_token(data={"sub": "bench@example.com"}, expires_delta=expires)
+    with_uid = create_access_token(data={"sub": "bench@example.com", "uid": user_id}, expires_delta=expires)
+    return legacy, with_uid
+
+
+def measure(token: str, iterations: int, counter: dict, use_principal_cache: bool = False):
+    timings = []
+    counter["n"] = 0
+    with SessionLocal() as db:
+        for _ in range(iterations):
+            if not use_principal_cache:
+                principal_cache._principals.clear()
+            started = time.perf_counter()
+            get_current_user(token=token, db=db)
+            timings.append((time.perf_counter() - started) * 1e6)
+            db.expunge_all()
+    return statistics.median(timings), sorted(timings)[int(len(timings) * 0.99)], counter["n"] / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--blocklisted", type=int, default=50_000)
+    args = parser.parse_args()
+
+    legacy_token, uid_token = setup(args.blocklisted)
+    counter = {"n": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statements(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+
+    def report(label, token, use_principal_cache=False):
+        p50, p99, queries = measure(token, args.iterations, counter, use_principal_cache)
+        print(f"{label:<34}{p50:>10.1f}{p99:>10.1f}{queries:>14.2f}")
+
+    print(f"{'mode':<34}{'p50 us':>10}{'p99 us':>10}{'queries/call':>14}")
+    crud.blocklist_index = BlocklistIndex()  # not loaded: every lookup goes to the database
+    report("email token, without index", legacy_token)
+
+    crud.blocklist_index = BlocklistIndex()
+    with SessionLocal() as db:
+        crud.blocklist_index.load(db)
+    report("email token, with index", legacy_token)
+    report("uid token, with index", uid_token)
+    report("uid token, index + principal cache", uid_token, use_principal_cache=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+explain-video result cache under a skewed request mix.
+
+Swaps in a fake transcript fetcher and a fake LLM (--latency seconds per call),
+then sends --requests explain-video requests in waves of --concurrency. Videos are
+picked with a Zipf-like skew over --videos videos; a --question-share of requests
+ask one of a few phrasings of the same questions (different case and punctuation),
+the rest ask for the default summary. Before the measured run, one precompute pass
+generates the default summary of the videos seen in a short warm-up.
+
+Reports model calls, cache hit rate (local/Redis split; without Redis everything is
+served from the in-process fallback) and request latency percentiles.
+
+Usage (from backend/):
+    python -m benchmarks.bench_explain_cache --requests 500 --videos 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_explain_cache.db')}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ENCRYPTION_KEY", "_6Jym9Yk7tV0_-2gwCOiWsSKIk3t9z0nEkhEs8rHVV4=")
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "100000")
+
+import app.models as models
+import app.services.ai_service_updated as ai_service
+import app.services.explanation_cache as explanation_cache_module
+from app.database import engine
+from app.services.explanation_cache import explain_video_cached, explanation_cache
+from app.services.llm_providers import FakeProvider
+from app.services.transcripts import transcript_store
+
+WORDS = "python function variable loop class object module import error test data list dict value".split()
+QUESTIONS = [
+    ["How do I handle import errors?", "how do i handle IMPORT errors", "How do I handle import errors ?!"],
+    ["What is a dict?", "what is a dict", "What is a DICT?"],
+]
+
+
+def fake_fetcher(video_id):
+    rng = random.Random(video_id)
+    return [
+        {"text": " ".join(rng.choice(WORDS) for _ in range(12)), "start": i * 4.0, "duration": 4.0}
+        for i in range(20 * 15)
+    ]
+
+
+def pick_video(rng, videos):
+    # Zipf-like: video i is requested about 1/(i+1) as often as video 0
+    return f"video-{min(int(rng.paretovariate(1.0)) - 1, videos - 1)}"
+
+
+async def run(rng, args, count):
+    timings = []
+
+    async def one():
+        video_id = pick_video(rng, args.videos)
+        question = rng.choice(rng.choice(QUESTIONS)) if rng.random() < args.question_share else None
+        started = time.perf_counter()
+        await explain_video_cached(video_id, question)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    for _ in range(0, count, args.concurrency):
+        await asyncio.gather(*(one() for _ in range(args.concurrency)))
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--videos", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--question-share", type=float, default=0.3)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    tables = [models.LLMResponse.__table__, models.VideoTranscript.__table__]
+    models.Base.metadata.drop_all(bind=engine, tables=tables)
+    models.Base.metadata.create_all(bind=engine, tables=tables)
+    fake = FakeProvider(latency=args.latency, chunks_per_second=1e6)
+    ai_service.provider = fake
+    transcript_store.fetcher = fake_fetcher
+
+    # Warm-up traffic only feeds the popularity counts; its answers are dropped
+    for _ in range(50):
+        await explanation_cache.record_request(pick_video(rng, args.videos))
+    precompute = asyncio.create_task(explanation_cache_module.precompute_popular_summaries(0, 20, 2))
+    while explanation_cache.counters["precomputed"] < len(await explanation_cache.popular_videos(20, 2)):
+        await asyncio.sleep(0.05)
+    precompute.cancel()
+    precomputed_calls = fake.counters["calls"]
+    print(f"precomputed {explanation_cache.counters['precomputed']} default summaries with {precomputed_calls} model calls")
+
+    started = time.perf_counter()
+    timings = sorted(await run(rng, args, args.requests))
+    elapsed = time.perf_counter() - started
+    stats = explanation_cache.stats()
+    print(f"{'requests':>9}{'model calls':>13}{'hit rate':>10}{'local':>7}{'redis':>7}{'p50 ms':>9}{'p95 ms':>9}{'wall s':>8}")
+    print(f"{len(timings):>9}{fake.counters['calls'] - precomputed_calls:>13}{stats['hit_rate']:>10.2%}{stats['local_hits']:>7}"
+          f"{stats['redis_hits']:>7}{statistics.median(timings):>9.2f}{timings[int(len(timings) * 0.95)]:>9.2f}{elapsed:>8.2f}")
+    print(stats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
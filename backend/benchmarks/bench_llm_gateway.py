@@ -0,0 +1,61 @@
+"""
+LLM gateway check: a burst of model calls against a fake LLM that returns 429s.
+
+Swaps in the fake provider: calls take --latency seconds and, with probability
+--quota-error-rate, fail with a 429 quota error carrying a "retry in 1s" hint.
+Fires --calls concurrent _call_ai_model calls and reports how many upstream
+attempts were made, the peak upstream concurrency (bounded by LLM_MAX_CONCURRENCY),
+how many calls succeeded, failed or were rejected by the gateway, and the gateway's
+queue wait percentiles.
+
+Usage (from backend/):
+    LLM_MAX_CONCURRENCY=4 LLM_REQUESTS_PER_MINUTE=600 python -m benchmarks.bench_llm_gateway --calls 100
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+import app.services.ai_service_updated as ai_service
+from app.services.llm_gateway import LLMCapacityError, llm_gateway
+from app.services.llm_providers import FakeProvider
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--quota-error-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    fake = FakeProvider(latency=args.latency, chunks_per_second=1e6, failure_rate=args.quota_error_rate, seed=args.seed)
+    ai_service.provider = fake
+    messages = ai_service._roadmap_prompt_messages("Python Developer")
+
+    outcomes = {"ok": 0, "failed": 0, "rejected": 0}
+
+    async def one():
+        try:
+            await ai_service._call_ai_model(messages)
+            outcomes["ok"] += 1
+        except LLMCapacityError:
+            outcomes["rejected"] += 1
+        except Exception:
+            outcomes["failed"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.calls)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{'calls':>8} {'attempts':>9} {'429s':>6} {'peak':>6} {'ok':>6} {'failed':>7} {'rejected':>9} {'elapsed':>9}")
+    print(f"{args.calls:>8} {fake.counters['calls']:>9} {fake.counters['failures']:>6} {fake.counters['peak_concurrency']:>6} {outcomes['ok']:>6} "
+          f"{outcomes['failed']:>7} {outcomes['rejected']:>9} {elapsed:>8.2f}s")
+    print(llm_gateway.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""
+Single-flight check: N concurrent roadmap requests for one goal with a stubbed LLM.
+
+Replaces the model call with a stub that sleeps and counts invocations, then fires
+--concurrency simultaneous generate_roadmap_from_goal calls for the same goal (in
+several spellings that normalize to the same key) and reports how many model calls
+were made. With single-flight coalescing this is exactly one.
+
+Usage (from backend/):
+    python -m benchmarks.bench_singleflight --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+import app.services.ai_service_updated as ai_service
+
+ROADMAP = {
+    "title": "Python Developer Roadmap",
+    "description": "Stub roadmap",
+    "topics": [{"name": "Basics", "subtopics": [{"name": "Syntax", "skills": [
+        {"name": "Variables", "description": "Stub", "estimated_hours": 1, "difficulty": "Beginner"}
+    ]}]}],
+}
+GOALS = ["Python Developer", "python developer ", "Become a Python developer", "I want to become a python developer"]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM latency in seconds")
+    args = parser.parse_args()
+
+    calls = 0
+
+    async def stub_call_ai_model(messages):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(args.latency)
+        return json.dumps(ROADMAP)
+
+    ai_service._call_ai_model = stub_call_ai_model
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        ai_service.generate_roadmap_from_goal(GOALS[i % len(GOALS)]) for i in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    assert all(r["title"] == ROADMAP["title"] for r in results)
+    print(f"requests={args.concurrency} model_calls={calls} elapsed={elapsed:.2f}s")
+    print(ai_service.roadmap_flights.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+Time-to-first-topic for the streaming roadmap path against a fake streaming LLM.
+
+The fake model emits a generated roadmap document in fixed-size chunks at a fixed
+rate. The script reports when stream_roadmap_from_goal yields its first topic, and
+when the whole roadmap is available (which is all the non-streaming endpoint can
+return).
+
+Usage (from backend/):
+    python -m benchmarks.bench_stream_first_topic --topics 8 --chunk-chars 40 --chunks-per-second 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+import app.services.ai_service_updated as ai_service
+from app.services.llm_providers import FakeProvider
+
+
+def build_roadmap(topics: int) -> dict:
+    return {
+        "title": "Benchmark Roadmap",
+        "description": "Generated for benchmarking",
+        "topics": [
+            {
+                "name": f"Topic {t}",
+                "subtopics": [
+                    {
+                        "name": f"Subtopic {t}.{s}",
+                        "skills": [
+                            {"name": f"Skill {t}.{s}.{k}", "description": "Benchmark skill", "estimated_hours": 2, "difficulty": "Beginner"}
+                            for k in range(4)
+                        ],
+                    }
+                    for s in range(4)
+                ],
+            }
+            for t in range(topics)
+        ],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=8)
+    parser.add_argument("--chunk-chars", type=int, default=40)
+    parser.add_argument("--chunks-per-second", type=float, default=50)
+    args = parser.parse_args()
+
+    text = "```json\n" + json.dumps(build_roadmap(args.topics), indent=2) + "\n```"
+    fake = FakeProvider(latency=0, chunks_per_second=args.chunks_per_second, chunk_chars=args.chunk_chars)
+    fake._respond = lambda messages, response_schema: text
+    ai_service.provider = fake
+
+    started = time.perf_counter()
+    first_topic = None
+    topics = 0
+    async for event, _ in ai_service.stream_roadmap_from_goal(f"benchmark goal {time.time()}"):
+        if event == "topic":
+            topics += 1
+            if first_topic is None:
+                first_topic = time.perf_counter() - started
+    total = time.perf_counter() - started
+    print(f"document={len(text)} chars topics={topics}")
+    print(f"time to first topic: {first_topic:.2f}s")
+    print(f"time to full roadmap: {total:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
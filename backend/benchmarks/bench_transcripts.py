@@ -0,0 +1,117 @@
+"""
+Transcript store check: a burst of explain-video style lookups for a few videos.
+
+Swaps the YouTube transcript API for a fake that blocks its thread for --latency
+seconds and returns a --minutes long transcript, then fires --requests concurrent
+transcript_store.get calls spread over --videos videos (the first video gets half
+of them). Reports how many upstream fetches were made (one per video), the worst
+event-loop stall seen while the fetches ran (the blocking call is on the fetch
+pool, so this stays near the ticker interval), the compression ratio of the stored
+rows, and the latency of a second round served from memory and from the table
+alone (after clearing the in-process LRU).
+
+Usage (from backend/):
+    python -m benchmarks.bench_transcripts --requests 200 --videos 5 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_transcripts.db')}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ENCRYPTION_KEY", "_6Jym9Yk7tV0_-2gwCOiWsSKIk3t9z0nEkhEs8rHVV4=")
+
+from sqlalchemy import func, select
+
+import app.models as models
+from app.core import config
+from app.database import SessionLocal, engine
+from app.services.transcripts import TranscriptStore
+
+WORDS = "python function variable loop class object module import error test data list dict value".split()
+
+
+def fake_fetcher(latency: float, minutes: int):
+    def fetch(video_id):
+        time.sleep(latency)  # the real API blocks on HTTP
+        rng = random.Random(video_id)
+        return [
+            {"text": " ".join(rng.choice(WORDS) for _ in range(12)), "start": i * 4.0, "duration": 4.0}
+            for i in range(minutes * 15)
+        ]
+    return fetch
+
+
+async def max_loop_stall(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def timed_round(store, video_ids):
+    timings = []
+
+    async def one(video_id):
+        started = time.perf_counter()
+        await store.get(video_id)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(video_id) for video_id in video_ids))
+    return statistics.median(timings), max(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--videos", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=1.0, help="fake transcript API latency in seconds")
+    parser.add_argument("--minutes", type=int, default=60, help="length of each fake transcript")
+    args = parser.parse_args()
+
+    models.Base.metadata.drop_all(bind=engine, tables=[models.VideoTranscript.__table__])
+    models.Base.metadata.create_all(bind=engine, tables=[models.VideoTranscript.__table__])
+    store = TranscriptStore(
+        fake_fetcher(args.latency, args.minutes), config.TRANSCRIPT_FETCH_WORKERS, config.TRANSCRIPT_STORE_MAX_BYTES,
+        config.TRANSCRIPT_MEMORY_CACHE_ENTRIES, config.TRANSCRIPT_MEMORY_CACHE_TTL_SECONDS, config.TRANSCRIPT_UNAVAILABLE_TTL_SECONDS,
+    )
+    video_ids = [f"video-{i}" for i in range(args.videos)]
+    calls = [video_ids[0]] * (args.requests // 2) + [random.choice(video_ids) for _ in range(args.requests - args.requests // 2)]
+    random.shuffle(calls)
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(max_loop_stall(stop))
+    started = time.perf_counter()
+    cold_p50, cold_max = await timed_round(store, calls)
+    cold_wall = time.perf_counter() - started
+    stop.set()
+    stall = await ticker
+
+    memory_p50, memory_max = await timed_round(store, calls)
+    store._memory.clear()
+    db_p50, db_max = await timed_round(store, calls)
+
+    with SessionLocal() as db:
+        compressed = db.scalar(select(func.sum(models.VideoTranscript.size_bytes)))
+    fetch = fake_fetcher(0, args.minutes)
+    raw = sum(len(json.dumps(fetch(video_id), separators=(",", ":"))) for video_id in video_ids)
+
+    print(f"requests={args.requests} videos={args.videos} fetch latency={args.latency}s transcript={args.minutes} min")
+    print(f"upstream fetches: {store.counters['fetches']}  worst event-loop stall: {stall * 1000:.1f} ms  cold wall: {cold_wall:.2f}s")
+    print(f"stored {compressed} bytes compressed from {raw} bytes JSON ({raw / compressed:.1f}x)")
+    print(f"{'round':<8}{'p50 ms':>10}{'max ms':>10}")
+    for name, p50, worst in [("cold", cold_p50, cold_max), ("memory", memory_p50, memory_max), ("table", db_p50, db_max)]:
+        print(f"{name:<8}{p50:>10.2f}{worst:>10.2f}")
+    print(store.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
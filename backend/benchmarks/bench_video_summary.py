@@ -0,0 +1,126 @@
+"""
+explain-video latency on long transcripts: single prompt vs map-reduce.
+
+Uses a fake LLM whose latency grows with the prompt (--prefill-tps tokens/s) and
+the answer (--decode-tps tokens/s, answers of --output-tokens), which is how real
+models behave on long inputs. For a --minutes long fake transcript it times:
+
+  single      the previous path: the whole transcript in one prompt
+  question    a question about a video that has not been summarized: answered
+              from the top VIDEO_INDEX_TOP_K windows of its BM25 index
+  map-reduce  the default summary, cold: every chunk summarized
+              (VIDEO_SUMMARY_CONCURRENCY at a time), then reduced
+  follow-up   another question about the same video: top windows plus the stored
+              chunk summaries as an overview
+
+and reports model calls and prompt tokens per path.
+
+Usage (from backend/):
+    python -m benchmarks.bench_video_summary --minutes 120
+    VIDEO_CHUNK_TOKENS=2000 VIDEO_SUMMARY_CONCURRENCY=8 python -m benchmarks.bench_video_summary
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_video_summary.db')}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ENCRYPTION_KEY", "_6Jym9Yk7tV0_-2gwCOiWsSKIk3t9z0nEkhEs8rHVV4=")
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "100000")
+
+from langchain_core.messages import AIMessage
+
+import app.models as models
+import app.services.ai_service_updated as ai_service
+from app.core import config
+from app.database import engine
+from app.services.llm_providers import FakeProvider
+from app.services.token_usage import estimate_text_tokens
+from app.services.transcript_index import transcript_indexes
+from app.services.video_summary import VideoSummarizer, chunk_transcript
+
+WORDS = "python function variable loop class object module import error test data list dict value".split()
+
+
+class ScaledFakeProvider(FakeProvider):
+    """Fake model whose latency is proportional to prompt and answer length."""
+
+    def __init__(self, base_latency: float, prefill_tps: float, decode_tps: float, output_tokens: int):
+        super().__init__(latency=base_latency)
+        self.prefill_tps = prefill_tps
+        self.decode_tps = decode_tps
+        self.output_tokens = output_tokens
+        self.prompt_tokens = 0
+
+    def _respond(self, messages, response_schema):
+        prompt = messages[-1]["content"]
+        return ("- " + prompt[:200] + "\n") * max(1, self.output_tokens * 4 // 203)
+
+    async def ainvoke(self, messages, response_schema=None):
+        self._begin()
+        try:
+            text = self._respond(messages, response_schema)
+            prompt_tokens = sum(estimate_text_tokens(msg["content"]) for msg in messages)
+            self.prompt_tokens += prompt_tokens
+            await asyncio.sleep(self.latency + prompt_tokens / self.prefill_tps + estimate_text_tokens(text) / self.decode_tps)
+            return AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        finally:
+            self.active -= 1
+
+
+def fake_transcript(minutes: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        {"text": " ".join(rng.choice(WORDS) for _ in range(12)), "start": i * 4.0, "duration": 4.0}
+        for i in range(minutes * 15)
+    ]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=120)
+    parser.add_argument("--latency", type=float, default=0.3, help="fixed per-call latency in seconds")
+    parser.add_argument("--prefill-tps", type=float, default=5000)
+    parser.add_argument("--decode-tps", type=float, default=100)
+    parser.add_argument("--output-tokens", type=int, default=300)
+    args = parser.parse_args()
+
+    models.Base.metadata.drop_all(bind=engine, tables=[models.LLMResponse.__table__])
+    models.Base.metadata.create_all(bind=engine, tables=[models.LLMResponse.__table__])
+    fake = ScaledFakeProvider(args.latency, args.prefill_tps, args.decode_tps, args.output_tokens)
+    ai_service.provider = fake
+
+    segments = fake_transcript(args.minutes)
+    summarizer = VideoSummarizer(config.VIDEO_CHUNK_TOKENS, config.VIDEO_SUMMARY_CONCURRENCY, config.VIDEO_REDUCE_MAX_TOKENS, config.VIDEO_INDEX_TOP_K)
+    chunks = chunk_transcript(segments, config.VIDEO_CHUNK_TOKENS)
+    transcript_tokens = estimate_text_tokens(" ".join(s["text"] for s in segments))
+    print(f"transcript: {args.minutes} min, ~{transcript_tokens} tokens, {len(chunks)} chunks of <= {config.VIDEO_CHUNK_TOKENS} tokens")
+
+    async def single():
+        text = " ".join(s["text"] for s in segments)
+        return await ai_service._call_ai_model(summarizer.single_shot_messages(text, "How are dict values tested?"))
+
+    paths = [
+        ("single", single),
+        ("question", lambda: summarizer.explain("bench-video", segments, "How are dict values tested?")),
+        ("map-reduce", lambda: summarizer.explain("bench-video", segments)),
+        ("follow-up", lambda: summarizer.explain("bench-video", segments, "What is said about module import errors?")),
+    ]
+    print(f"{'path':<12}{'seconds':>9}{'calls':>7}{'prompt tokens':>15}")
+    for name, fn in paths:
+        calls, prompt_tokens = fake.counters["calls"], fake.prompt_tokens
+        started = time.perf_counter()
+        await fn()
+        elapsed = time.perf_counter() - started
+        print(f"{name:<12}{elapsed:>9.2f}{fake.counters['calls'] - calls:>7}{fake.prompt_tokens - prompt_tokens:>15}")
+    print(summarizer.stats())
+    print(transcript_indexes.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
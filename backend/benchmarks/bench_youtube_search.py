@@ -0,0 +1,111 @@
+"""
+YouTube search check against a local stub of the YouTube Data API.
+
+Starts a small FastAPI app on 127.0.0.1:--port that answers /search after
+--latency seconds, points YOUTUBE_API_BASE_URL at it and then, through the
+/search-video route:
+
+  cold       --queries distinct queries, each a cache miss (one upstream request)
+  cached     the same queries again with different case/spacing (no upstream requests)
+  stale      after YOUTUBE_SEARCH_REFRESH_AFTER_SECONDS (1 here): served from cache immediately while
+             one background request per query refreshes it
+  burst      --burst concurrent calls for one cached query (still one or zero
+             upstream requests)
+
+and reports latency percentiles and the number of requests the stub received.
+
+Usage (from backend/):
+    python -m benchmarks.bench_youtube_search --queries 20 --latency 0.3
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_youtube_search.db')}")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("ENCRYPTION_KEY", "_6Jym9Yk7tV0_-2gwCOiWsSKIk3t9z0nEkhEs8rHVV4=")
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+os.environ.setdefault("YOUTUBE_API_KEY", "stub-key")
+os.environ.setdefault("YOUTUBE_SEARCH_REFRESH_AFTER_SECONDS", "1")
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--queries", type=int, default=20)
+parser.add_argument("--burst", type=int, default=100)
+parser.add_argument("--latency", type=float, default=0.3, help="stub API latency in seconds")
+parser.add_argument("--port", type=int, default=8765)
+args = parser.parse_args()
+os.environ.setdefault("YOUTUBE_API_BASE_URL", f"http://127.0.0.1:{args.port}")
+
+import uvicorn
+from fastapi import FastAPI
+
+from app.core import config
+from app.core.http_client import http_client
+from app.services.ai_learning import search_video
+from app.services.youtube_search import youtube_search
+
+stub = FastAPI()
+stub_requests = {"count": 0}
+
+
+@stub.get("/search")
+async def stub_search(q: str, key: str):
+    stub_requests["count"] += 1
+    await asyncio.sleep(args.latency)
+    return {"items": [{
+        "id": {"videoId": f"vid-{abs(hash(q.lower())) % 10**8}"},
+        "snippet": {"title": f"{q} explained", "description": f"A long video about {q}"},
+    }]}
+
+
+async def timed(calls):
+    before = stub_requests["count"]
+    timings = []
+
+    async def one(query):
+        started = time.perf_counter()
+        await search_video(query)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(query) for query in calls))
+    return statistics.median(timings), max(timings), stub_requests["count"] - before, time.perf_counter() - started
+
+
+async def main():
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=args.port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    queries = [f"Python Topic {i}" for i in range(args.queries)]
+    print(f"stub at {config.YOUTUBE_API_BASE_URL}, latency {args.latency}s, refresh after {config.YOUTUBE_SEARCH_REFRESH_AFTER_SECONDS}s")
+    print(f"{'phase':<8}{'calls':>7}{'p50 ms':>10}{'max ms':>10}{'upstream':>10}{'wall s':>8}")
+    try:
+        phases = [
+            ("cold", lambda: queries),
+            ("cached", lambda: [f"  {q.upper()} " for q in queries]),
+            ("stale", lambda: queries),
+            ("burst", lambda: [queries[0]] * args.burst),
+        ]
+        for name, calls in phases:
+            if name == "stale":
+                await asyncio.sleep(config.YOUTUBE_SEARCH_REFRESH_AFTER_SECONDS + 0.1)
+            calls = calls()
+            p50, worst, upstream, wall = await timed(calls)
+            print(f"{name:<8}{len(calls):>7}{p50:>10.2f}{worst:>10.2f}{upstream:>10}{wall:>8.2f}")
+        await asyncio.sleep(args.latency + 0.2)
+        print(f"background refresh requests received by stub: {stub_requests['count'] - args.queries}")
+        print(youtube_search.stats())
+    finally:
+        await http_client.close()
+        server.should_exit = True
+        await serving
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+"""
+Local repair rate of the roadmap response parser on a corpus of malformed outputs.
+
+Builds a corpus by injecting the defects seen in real model output into a valid
+roadmap document: code fences, prose around the JSON, trailing commas, stringly-typed
+estimated_hours ("3 hours", "2-4") and truncation at a random point. Each sample is
+run through _parse_roadmap_content; a sample counts as repaired when it parses into a
+complete, valid roadmap without a re-prompt. Truncated samples must not count as
+repaired: the parser flags them so generation asks the model again, and they are
+reported under "re-prompt" (a sample that cannot be parsed at all is re-prompted too).
+
+Usage (from backend/):
+    python -m benchmarks.eval_json_repair --samples 500
+"""
+
+import argparse
+import json
+import os
+import random
+from collections import defaultdict
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+import app.services.ai_service_updated as ai_service
+
+
+def build_roadmap(topics=4, subtopics=3, skills=4):
+    return {
+        "title": "Python Developer Roadmap",
+        "description": "Step-by-step roadmap to learn Python development",
+        "topics": [{
+            "name": f"Topic {t}",
+            "subtopics": [{
+                "name": f"Subtopic {t}.{s}",
+                "skills": [{
+                    "name": f"Skill {t}.{s}.{k}, with \"quotes\" and [brackets]",
+                    "description": "Practice it until it sticks.",
+                    "estimated_hours": random.randint(1, 8),
+                    "difficulty": random.choice(["Beginner", "Intermediate", "Advanced"]),
+                } for k in range(skills)],
+            } for s in range(subtopics)],
+        } for t in range(topics)],
+    }
+
+
+def fences(text):
+    return f"```json\n{text}\n```"
+
+
+def prose(text):
+    return f"Sure! Here is the roadmap you asked for:\n\n{text}\n\nLet me know if you want more detail."
+
+
+def trailing_commas(text):
+    return text.replace("}\n", "},\n").replace("]\n", "],\n").replace('"\n', '",\n')
+
+
+def string_hours(text):
+    data = json.loads(text)
+    for skill in ai_service._iter_skills(data):
+        skill["estimated_hours"] = random.choice([f"{skill['estimated_hours']} hours", f"{skill['estimated_hours']}-{skill['estimated_hours'] + 2}", str(skill["estimated_hours"] + 0.5)])
+    return json.dumps(data, indent=2)
+
+
+def truncate(text):
+    return text[:int(len(text) * random.uniform(0.5, 0.98))]
+
+
+DEFECTS = {"fences": fences, "prose": prose, "trailing_commas": trailing_commas, "string_hours": string_hours, "truncate": truncate}
+ORDER = ["string_hours", "trailing_commas", "truncate", "prose", "fences"]  # structural edits before wrapping
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    results = defaultdict(lambda: {"samples": 0, "repaired": 0, "reprompt": 0})
+    for _ in range(args.samples):
+        roadmap = build_roadmap()
+        defects = random.sample(list(DEFECTS), random.randint(1, 3))
+        text = json.dumps(roadmap, indent=2)
+        for name in ORDER:
+            if name in defects:
+                text = DEFECTS[name](text)
+        row = results["+".join(sorted(defects))]
+        row["samples"] += 1
+        try:
+            parsed, truncated = ai_service._parse_roadmap_content(text, "Python Developer")
+        except ValueError:
+            row["reprompt"] += 1
+            continue
+        if truncated:
+            row["reprompt"] += 1
+            continue
+        assert parsed == ai_service._validate_roadmap(roadmap, "Python Developer") or "string_hours" in defects, name
+        row["repaired"] += 1
+
+    print(f"{'defects':<48} {'samples':>8} {'repaired':>9} {'re-prompt':>10} {'rate':>7}")
+    totals = {"samples": 0, "repaired": 0, "reprompt": 0}
+    for name, row in sorted(results.items()):
+        for key in totals:
+            totals[key] += row[key]
+        print(f"{name:<48} {row['samples']:>8} {row['repaired']:>9} {row['reprompt']:>10} {row['repaired'] / row['samples']:>7.1%}")
+    print(f"{'total':<48} {totals['samples']:>8} {totals['repaired']:>9} {totals['reprompt']:>10} {totals['repaired'] / totals['samples']:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
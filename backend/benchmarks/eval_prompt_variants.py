@@ -0,0 +1,116 @@
+"""
+Offline comparison of roadmap prompt variants on recorded model responses.
+
+  record    calls the live model once per goal and prompt variant and appends the raw
+            responses, with the provider's token usage, to a JSONL file
+  evaluate  replays a recordings file without any model calls and reports, per
+            variant, how many responses were valid as returned, how many were valid
+            after local repair, and the prompt/completion tokens spent per valid roadmap
+
+Prompt tokens fall back to an estimate (~4 characters per token) for recordings
+without usage metadata.
+
+Usage (from backend/):
+    GOOGLE_API_KEY=... python -m benchmarks.eval_prompt_variants record --out recordings.jsonl
+    python -m benchmarks.eval_prompt_variants evaluate recordings.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from collections import defaultdict
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+
+import app.services.ai_service_updated as ai_service
+from app.services.token_usage import estimate_text_tokens
+
+DEFAULT_GOALS = [
+    "Python developer", "Frontend developer with React", "Data scientist", "DevOps engineer",
+    "Android developer", "Machine learning engineer", "Cloud architect on AWS", "Game developer with Unity",
+    "Embedded systems engineer", "Cybersecurity analyst",
+]
+
+
+async def record(args):
+    goals = DEFAULT_GOALS
+    if args.goals:
+        with open(args.goals) as f:
+            goals = [line.strip() for line in f if line.strip()]
+    with open(args.out, "a") as out:
+        for goal in goals:
+            for variant in args.variants:
+                messages = ai_service._roadmap_prompt_messages(goal, ai_service.ROADMAP_SYSTEM_PROMPTS[variant])
+                response = await ai_service.provider.ainvoke(messages, ai_service.ROADMAP_RESPONSE_SCHEMA)
+                usage = getattr(response, "usage_metadata", None) or {}
+                out.write(json.dumps({
+                    "variant": variant,
+                    "goal": goal,
+                    "response": response.content,
+                    "input_tokens": usage.get("input_tokens"),
+                    "output_tokens": usage.get("output_tokens"),
+                }) + "\n")
+                print(f"recorded {variant:<8} {goal}")
+
+
+def evaluate(args):
+    rows = defaultdict(lambda: {"responses": 0, "valid": 0, "repaired": 0, "prompt_tokens": 0, "completion_tokens": 0})
+    with open(args.recordings) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            row = rows[rec["variant"]]
+            row["responses"] += 1
+            prompt_tokens = rec.get("input_tokens")
+            if prompt_tokens is None:
+                system_prompt = ai_service.ROADMAP_SYSTEM_PROMPTS[rec["variant"]]
+                prompt_tokens = sum(estimate_text_tokens(m["content"]) for m in ai_service._roadmap_prompt_messages(rec["goal"], system_prompt))
+            completion_tokens = rec.get("output_tokens")
+            if completion_tokens is None:
+                completion_tokens = estimate_text_tokens(rec["response"])
+            row["prompt_tokens"] += prompt_tokens
+            row["completion_tokens"] += completion_tokens
+            try:
+                ai_service._validate_roadmap(json.loads(rec["response"]), rec["goal"])
+                row["valid"] += 1
+                continue
+            except ValueError:
+                pass
+            try:
+                _, truncated = ai_service._parse_roadmap_content(rec["response"], rec["goal"])
+                if not truncated:  # a cut-off response is asked for again, not used
+                    row["repaired"] += 1
+            except ValueError:
+                pass
+
+    print(f"{'variant':<10} {'responses':>9} {'valid':>7} {'+repair':>8} {'avg prompt':>11} {'avg compl.':>11} {'tokens/valid':>13}")
+    for variant, row in sorted(rows.items()):
+        n = row["responses"]
+        usable = row["valid"] + row["repaired"]
+        per_valid = (row["prompt_tokens"] + row["completion_tokens"]) / usable if usable else float("inf")
+        print(f"{variant:<10} {n:>9} {row['valid'] / n:>7.1%} {usable / n:>8.1%} "
+              f"{row['prompt_tokens'] / n:>11.0f} {row['completion_tokens'] / n:>11.0f} {per_valid:>13.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record")
+    record_parser.add_argument("--out", default="recordings.jsonl")
+    record_parser.add_argument("--goals", help="file with one goal per line")
+    record_parser.add_argument("--variants", nargs="+", default=list(ai_service.ROADMAP_SYSTEM_PROMPTS),
+                               choices=list(ai_service.ROADMAP_SYSTEM_PROMPTS))
+    evaluate_parser = commands.add_parser("evaluate")
+    evaluate_parser.add_argument("recordings")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(record(args))
+    else:
+        evaluate(args)
+
+
+if __name__ == "__main__":
+    main()
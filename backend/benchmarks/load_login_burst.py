@@ -0,0 +1,89 @@
+"""
+Load test: latency of a non-auth endpoint during a burst of logins.
+
+Compares bcrypt verification run inline inside an ``async def`` route with
+verification on the bounded password hashing pool (security.verify_password_async).
+Requests rejected because the hashing queue is full are counted as 503s.
+
+Usage (from backend/):
+    python -m benchmarks.load_login_burst --logins 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.core.security import (
+    PasswordHasherBusyError, get_password_hash, verify_password, verify_password_async
+)
+
+PASSWORD = "Benchmark#Password1"
+HASHED = get_password_hash(PASSWORD)
+
+app = FastAPI()
+
+
+@app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+
+@app.post("/login-inline")
+async def login_inline():
+    return {"ok": verify_password(PASSWORD, HASHED)}
+
+
+@app.post("/login-pooled")
+async def login_pooled():
+    try:
+        return {"ok": await verify_password_async(PASSWORD, HASHED)}
+    except PasswordHasherBusyError:
+        raise HTTPException(status_code=503, detail="busy")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def scenario(client: httpx.AsyncClient, login_path: str, logins: int):
+    latencies = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await client.get("/ping")
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.01)
+
+    probe_task = asyncio.create_task(probe())
+    responses = await asyncio.gather(*(client.post(login_path) for _ in range(logins)))
+    done.set()
+    await probe_task
+    rejected = sum(1 for r in responses if r.status_code == 503)
+    return statistics.median(latencies), percentile(latencies, 99), rejected
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        print(f"{'mode':<10}{'ping p50 ms':>14}{'ping p99 ms':>14}{'503s':>8}")
+        for name, path in (("inline", "/login-inline"), ("pooled", "/login-pooled")):
+            p50, p99, rejected = await scenario(client, path, args.logins)
+            print(f"{name:<10}{p50:>14.2f}{p99:>14.2f}{rejected:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings the app reads at import time; the suite runs offline against SQLite. The
+# database is dropped and recreated by the fixtures, so never take DATABASE_URL here.
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'careerforge_tests.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ENCRYPTION_KEY", "_6Jym9Yk7tV0_-2gwCOiWsSKIk3t9z0nEkhEs8rHVV4=")
+os.environ.setdefault("GOOGLE_API_KEY", "offline-tests")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+
+@pytest.fixture
+def db():
+    import app.models as models
+    from app.database import SessionLocal, engine
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as session:
+        session.add(models.User(id=1, username="test", email="test@example.com", hashed_password="x", is_email_verified=True))
+        session.commit()
+        yield session
+
+
+@pytest.fixture
+def fake_redis():
+    """The shared Redis client pointed at an in-memory fakeredis server."""
+    import fakeredis
+    from app.core.redis_client import redis_cache
+
+    redis_cache._client = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    redis_cache.breaker.record_success()
+    yield redis_cache._client
+    redis_cache._client = None
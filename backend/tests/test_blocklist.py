@@ -0,0 +1,70 @@
+import threading
+import time
+
+import fakeredis
+
+import app.models as models
+from app.core.blocklist import BlocklistIndex, BlocklistSync
+
+
+def revoke(db, jti):
+    # Written to the database only, as when the broadcast to other workers is lost
+    db.add(models.TokenBlocklist(jti=jti))
+    db.commit()
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_subscribed_worker_still_polls_for_missed_revocations(db):
+    index = BlocklistIndex()
+    index.load(db)
+    sync = BlocklistSync(index, "token_blocklist", poll_seconds=0.05)
+    sync._redis = fakeredis.FakeStrictRedis(decode_responses=True)
+    sync._thread = threading.Thread(target=sync._run, daemon=True)
+    sync._thread.start()
+    try:
+        assert wait_until(lambda: sync._redis.pubsub_numsub("token_blocklist")[0][1] == 1)
+        time.sleep(0.1)  # past the catch-up poll done on subscribing
+        revoke(db, "missed-jti")
+        assert wait_until(lambda: index.contains("missed-jti") is True)
+    finally:
+        sync.stop()
+
+
+def test_broadcast_revocations_arrive_through_pubsub(db):
+    index = BlocklistIndex()
+    index.load(db)
+    server = fakeredis.FakeServer()
+    listener = BlocklistSync(index, "token_blocklist", poll_seconds=60)
+    listener._redis = fakeredis.FakeStrictRedis(server=server, decode_responses=True)
+    listener._thread = threading.Thread(target=listener._run, daemon=True)
+    listener._thread.start()
+    publisher = BlocklistSync(BlocklistIndex(), "token_blocklist", poll_seconds=60)
+    publisher._redis = fakeredis.FakeStrictRedis(server=server, decode_responses=True)
+    try:
+        assert wait_until(lambda: publisher._redis.pubsub_numsub("token_blocklist")[0][1] == 1)
+        publisher.publish("jti", "broadcast-jti")
+        assert wait_until(lambda: index.contains("broadcast-jti") is True)
+    finally:
+        listener.stop()
+
+
+def test_stale_index_does_not_trust_negative_answers(db, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.blocklist.time.monotonic", lambda: now[0])
+    index = BlocklistIndex(stale_after_seconds=15)
+    revoke(db, "known-jti")
+    index.load(db)
+    assert index.contains("other-jti") is False
+    now[0] += 16  # polling has been failing since
+    assert index.contains("other-jti") is None
+    assert index.contains("known-jti") is True
+    index.poll(db)
+    assert index.contains("other-jti") is False
@@ -0,0 +1,94 @@
+from sqlalchemy import event
+
+import app.crud as crud
+import app.models as models
+import app.schemas as schemas
+from app.database import SessionLocal, engine
+
+
+def build_tree(topics, subtopics, skills, subtopic_name=lambda t, s: f"Subtopic {t}.{s}"):
+    return schemas.AIGeneratedRoadmap(
+        title="Roadmap",
+        description="d",
+        topics=[
+            schemas.AIGeneratedTopic(name=f"Topic {t}", subtopics=[
+                schemas.AIGeneratedSubtopic(name=subtopic_name(t, s), description=f"{t}.{s}", skills=[
+                    schemas.AIGeneratedSkill(name=f"Skill {t}.{s}.{k}", estimated_hours=1, difficulty="Beginner")
+                    for k in range(skills)
+                ])
+                for s in range(subtopics)
+            ])
+            for t in range(topics)
+        ],
+    )
+
+
+def count_statements(fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(statements)
+
+
+def test_children_are_attached_to_their_parents(db):
+    # Same subtopic name under every topic and repeated within a topic
+    tree = build_tree(3, 3, 2, subtopic_name=lambda t, s: "Basics")
+    roadmap = crud.create_full_roadmap_from_ai(db, tree, 1, "goal", "{}")
+    assert roadmap.total_skills == 18
+    for t, topic in enumerate(sorted(roadmap.topics, key=lambda topic: topic.id)):
+        assert topic.name == f"Topic {t}"
+        for s, subtopic in enumerate(sorted(topic.subtopics, key=lambda subtopic: subtopic.id)):
+            assert subtopic.description == f"{t}.{s}"
+            assert sorted(skill.name for skill in subtopic.skills) == [f"Skill {t}.{s}.{k}" for k in range(2)]
+
+
+def test_statement_count_does_not_grow_with_the_tree(db):
+    counts = {
+        size: count_statements(lambda: crud.create_full_roadmap_from_ai(db, build_tree(*size), 1, "goal", "{}"))
+        for size in [(1, 1, 1), (4, 4, 5), (12, 8, 8)]
+    }
+    assert len(set(counts.values())) == 1, counts
+
+
+def test_racing_status_changes_count_once(db):
+    roadmap = crud.create_full_roadmap_from_ai(db, build_tree(1, 1, 2), 1, "goal", "{}")
+    skill_id = roadmap.topics[0].subtopics[0].skills[0].id
+    # This request read the skill before the other one completed it
+    assert crud.get_skill(db, skill_id).status == "not_started"
+    with SessionLocal() as other:
+        crud.update_skill_status(other, skill_id, "completed")
+    crud.update_skill_status(db, skill_id, "completed")
+
+    db.expire_all()
+    roadmap = db.get(models.Roadmap, roadmap.id)
+    assert (roadmap.completed_skills, roadmap.in_progress_skills) == (1, 0)
+    crud.update_skill_status(db, skill_id, "in_progress")
+    db.expire_all()
+    assert (roadmap.completed_skills, roadmap.in_progress_skills) == (0, 1)
+
+
+def test_racing_deletes_count_once(db, monkeypatch):
+    roadmap = crud.create_full_roadmap_from_ai(db, build_tree(1, 1, 2), 1, "goal", "{}")
+    skill_id = roadmap.topics[0].subtopics[0].skills[0].id
+    get_skill = crud.get_skill
+
+    def read_then_lose_the_race(session, skill_id):
+        # This request reads the skill, then the other one deletes it
+        db_skill = get_skill(session, skill_id)
+        if session is db:
+            with SessionLocal() as other:
+                assert get_skill(other, skill_id) is not None
+                monkeypatch.setattr(crud, "get_skill", get_skill)
+                assert crud.delete_skill(other, skill_id).id == skill_id
+        return db_skill
+
+    monkeypatch.setattr(crud, "get_skill", read_then_lose_the_race)
+    assert crud.delete_skill(db, skill_id) is None
+
+    db.expire_all()
+    roadmap = db.get(models.Roadmap, roadmap.id)
+    assert roadmap.total_skills == 1
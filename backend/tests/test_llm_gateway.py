@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from tenacity import wait_none
+
+import app.services.ai_service_updated as ai_service
+from app.core import config
+from app.services.llm_gateway import LLMCapacityError, LLMGateway
+from app.services.llm_providers import FakeProvider, FakeProviderError
+
+
+def gateway(max_concurrency=1, requests_per_minute=10, tokens_per_minute=1000, max_wait_seconds=0.05):
+    return LLMGateway(max_concurrency, requests_per_minute, tokens_per_minute, max_wait_seconds)
+
+
+async def bucket_tokens(fake_redis, bucket):
+    return float(await fake_redis.hget(bucket.key, "tokens"))
+
+
+def test_rejection_at_the_concurrency_cap_takes_no_budget(fake_redis):
+    llm = gateway()
+
+    async def scenario():
+        async with llm.slot(100):
+            before = await bucket_tokens(fake_redis, llm._requests), await bucket_tokens(fake_redis, llm._tokens)
+            with pytest.raises(LLMCapacityError):
+                async with llm.slot(100):
+                    pass
+            after = await bucket_tokens(fake_redis, llm._requests), await bucket_tokens(fake_redis, llm._tokens)
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert after == pytest.approx(before, abs=0.01)
+    assert llm.counters["rejected"] == 1
+    assert llm._semaphore._value == 1
+
+
+def test_rejection_by_the_token_budget_refunds_the_request(fake_redis):
+    llm = gateway(max_concurrency=2, tokens_per_minute=150)
+
+    async def scenario():
+        async with llm.slot(100):
+            pass
+        requests_before = await bucket_tokens(fake_redis, llm._requests)
+        with pytest.raises(LLMCapacityError):
+            async with llm.slot(100):  # only ~50 tokens left, refilling far too slowly
+                pass
+        return requests_before, await bucket_tokens(fake_redis, llm._requests)
+
+    requests_before, requests_after = asyncio.run(scenario())
+    assert requests_after == pytest.approx(requests_before, abs=0.01)
+    assert llm._semaphore._value == 2
+
+
+def test_max_retries_counts_retries_after_the_first_attempt(monkeypatch):
+    provider = FakeProvider(latency=0, failure_rate=1.0)
+    monkeypatch.setattr(ai_service, "provider", provider)
+    monkeypatch.setattr(ai_service._call_ai_model.retry, "wait", wait_none())
+
+    with pytest.raises(FakeProviderError):
+        asyncio.run(ai_service._call_ai_model([{"role": "user", "content": "hello"}]))
+    assert provider.counters["calls"] == config.LLM_MAX_RETRIES + 1
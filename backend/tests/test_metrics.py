@@ -0,0 +1,24 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import config
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_metrics_are_disabled_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_TOKEN", "operator-token")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer operator-token"})
+    assert response.status_code == 200
+    assert "llm_gateway" in response.json()
@@ -0,0 +1,92 @@
+import asyncio
+
+import fakeredis
+import pytest
+
+from app.core.redis_client import AsyncRedisCache, CircuitBreaker
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(server, monkeypatch):
+    cache = AsyncRedisCache()
+    cache.breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0.05)
+
+    def fake_pool(**kwargs):
+        return fakeredis.FakeAsyncRedis(server=server, decode_responses=True).connection_pool
+
+    monkeypatch.setattr("app.core.redis_client.aioredis.ConnectionPool", fake_pool)
+    return cache
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_success()  # a success resets the count
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_half_open_admits_a_single_probe(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.redis_client.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    now[0] += 10
+    assert breaker.state == "half_open"
+    assert [breaker.allow() for _ in range(5)] == [True, False, False, False, False]
+
+    breaker.record_failure()  # the probe failed: open for another full period
+    assert breaker.state == "open"
+    now[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert all(breaker.allow() for _ in range(5))
+
+
+def test_lost_probe_is_replaced_after_reset_period(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.redis_client.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10)
+    breaker.record_failure()
+    now[0] += 10
+    assert breaker.allow()
+    now[0] += 5
+    assert not breaker.allow()
+    now[0] += 5
+    assert breaker.allow()
+
+
+def test_outage_skips_calls_then_reconnects_lazily(cache, server):
+    async def scenario():
+        assert cache._client is None  # nothing connects until the first call
+        assert await cache.setex("key", 60, "value")
+        assert await cache.get("key") == "value"
+
+        server.connected = False
+        results = [await cache.get("key") for _ in range(5)]
+        errors = cache.counters["errors"]
+        server.connected = True
+        # open: calls are skipped without reaching Redis, even though it is back
+        skipped_while_open = await cache.get("key")
+
+        await asyncio.sleep(cache.breaker.reset_seconds)
+        probes = await asyncio.gather(*(cache.get("key") for _ in range(5)))
+        return results, errors, skipped_while_open, probes
+
+    results, errors, skipped_while_open, probes = asyncio.run(scenario())
+    assert results == [None] * 5
+    assert errors == 3  # the breaker opened after failure_threshold errors
+    assert skipped_while_open is None
+    # concurrent callers are skipped while the single probe is out
+    assert probes == ["value", None, None, None, None]
+    assert cache.breaker.state == "closed"
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.services.roadmap_cache import GoalSimilarityIndex, normalize_goal
+
+
+@pytest.mark.parametrize("goal, normalized", [
+    ("I want to become a Python developer", "python developer"),
+    ("python developer roadmap", "python developer"),
+    ("The Data Engineer career", "data engineer"),
+    ("an UX designer", "ux designer"),
+    ("a C# developer", "c# developer"),
+    ("C++ programmer", "c++ programmer"),
+])
+def test_normalize_goal(goal, normalized):
+    assert normalize_goal(goal) == normalized
+
+
+@pytest.mark.parametrize("goal", ["A.I. engineer", "a.i. engineer", "Become an A.I. engineer", "AI engineer"])
+def test_dotted_abbreviations_are_kept_whole(goal):
+    assert normalize_goal(goal) == "ai engineer"
+
+
+def test_article_is_kept_before_a_single_letter():
+    # "a" is not an article here; dropping it would collide with unrelated goals
+    assert normalize_goal("a i engineer") == "a i engineer"
+    assert normalize_goal("A.I. engineer") != normalize_goal("I engineer")
+
+
+def test_goal_index_keeps_the_most_recently_used_goals(fake_redis):
+    index = GoalSimilarityIndex("test_goals", max_goals=3)
+
+    async def scenario():
+        for goal in ["python developer", "data engineer", "ux designer"]:
+            await index.add(goal)
+        await index.add("python developer")  # used again
+        await index.add("devops engineer")  # evicts the least recently used goal
+        return await fake_redis.zrevrange("test_goals", 0, -1)
+
+    shared = asyncio.run(scenario())
+    assert shared == ["devops engineer", "python developer", "ux designer"]
+    assert list(index._goals) == ["ux designer", "python developer", "devops engineer"]
+
+
+def test_goal_index_loads_new_goals_from_other_workers_when_full(fake_redis):
+    index = GoalSimilarityIndex("test_goals", max_goals=2)
+    other_worker = GoalSimilarityIndex("test_goals", max_goals=2)
+
+    async def scenario():
+        await index.add("python developer")
+        await index.add("data engineer")
+        await other_worker.add("data engineering manager")
+        index._refreshed_at = 0.0
+        return await index.most_similar("data engineering managers")
+
+    assert asyncio.run(scenario())[0] == "data engineering manager"
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+
+from app.core.singleflight import roadmap_flights
+from app.services.roadmap_jobs import JobStore, RoadmapJobManager
+
+
+class FakeJobs(RoadmapJobManager):
+    POLL_SECONDS = 0.01
+    LEASE_SECONDS = 0.2
+
+    def __init__(self, generate=None):
+        super().__init__(concurrency=1, max_queued=10, store=JobStore(60))
+        self.generated = []
+        self.generate = generate
+
+    async def _generate(self, job):
+        if self.generate is not None:
+            return await self.generate(job)
+        self.generated.append(job["goal"])
+        return len(self.generated)
+
+
+async def wait_for_status(jobs, job_id, status):
+    for _ in range(500):
+        job = await jobs.store.get(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {job['status']}, expected {status}")
+
+
+def test_job_submitted_on_one_worker_runs_on_another_in_priority_order(fake_redis):
+    async def scenario():
+        submitter, runner = FakeJobs(), FakeJobs()
+        submitter.start()
+        await submitter.stop()  # a worker that only accepts requests
+        low = await submitter.submit(1, "low", priority=0)
+        high = await submitter.submit(1, "high", priority=5)
+        runner.start()
+        try:
+            await wait_for_status(runner, low["id"], "succeeded")
+            await wait_for_status(runner, high["id"], "succeeded")
+        finally:
+            await runner.stop()
+        return runner.generated
+
+    assert asyncio.run(scenario()) == ["high", "low"]
+
+
+def test_jobs_left_by_a_stopped_worker_are_recovered_at_startup(fake_redis):
+    async def scenario():
+        store = JobStore(60)
+        base = {"user_id": 1, "priority": 0, "roadmap_id": None, "error": None, "attempts": 1,
+                "created_at": "2026-01-01T00:00:00", "started_at": None, "finished_at": None}
+        # claimed by a worker that died: its lease has run out
+        await store.save({**base, "id": "running", "goal": "running", "status": "running"})
+        await fake_redis.zadd(RoadmapJobManager.RUNNING_KEY, {"running": time.time() - 1})
+        # queued in process on a worker that was restarted
+        await store.save({**base, "id": "queued", "goal": "queued", "status": "queued", "attempts": 0})
+        # interrupted too often
+        await store.save({**base, "id": "retried", "goal": "retried", "status": "running", "attempts": 2})
+        store._local.clear()
+
+        jobs = FakeJobs()
+        jobs.start()
+        try:
+            await wait_for_status(jobs, "running", "succeeded")
+            await wait_for_status(jobs, "queued", "succeeded")
+            failed = await wait_for_status(jobs, "retried", "failed")
+        finally:
+            await jobs.stop()
+        return sorted(jobs.generated), failed
+
+    generated, failed = asyncio.run(scenario())
+    assert generated == ["queued", "running"]
+    assert failed["attempts"] == 2
+
+
+def test_cancelling_a_running_job_stops_the_model_call(fake_redis):
+    started, stopped = asyncio.Event(), []
+
+    async def slow_model_call():
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            stopped.append(True)
+            raise
+        return {"title": "never"}
+
+    async def generate(job):
+        return await roadmap_flights.do(job["goal"], slow_model_call)
+
+    async def scenario():
+        # The DELETE arrives on another worker and only reaches the runner through Redis
+        runner, other = FakeJobs(generate), FakeJobs()
+        job = await runner.submit(1, "cancelled goal")
+        runner.start()
+        try:
+            await asyncio.wait_for(started.wait(), 5)
+            await other.cancel(job["id"], 1)
+            await asyncio.sleep(runner.POLL_SECONDS * 10)
+            return json.loads(await fake_redis.get(f"roadmap_job:{job['id']}")), list(stopped)
+        finally:
+            await runner.stop()
+
+    job, stopped_before_shutdown = asyncio.run(scenario())
+    assert job["status"] == "cancelled"
+    assert stopped_before_shutdown == [True]
+
+
+def test_failed_job_reports_a_fixed_message(fake_redis, caplog):
+    async def generate(job):
+        raise RuntimeError("connection to db-internal:5432 refused")
+
+    async def scenario():
+        jobs = FakeJobs(generate)
+        job = await jobs.submit(1, "failing goal")
+        jobs.start()
+        try:
+            return await wait_for_status(jobs, job["id"], "failed")
+        finally:
+            await jobs.stop()
+
+    job = asyncio.run(scenario())
+    assert job["error"] == "Failed to generate roadmap from AI."
+    assert "db-internal" in caplog.text
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+import app.services.ai_service_updated as ai_service
+from app.services.ai_service_updated import AIResponseMalformedError
+
+
+def roadmap(topics=3, subtopics=2, skills=3):
+    return {
+        "title": "Python",
+        "description": "d",
+        "topics": [{
+            "name": f"Topic {t}",
+            "subtopics": [{
+                "name": f"Subtopic {t}.{s}",
+                "skills": [
+                    {"name": f"Skill {t}.{s}.{k}", "description": "x", "estimated_hours": 2, "difficulty": "Beginner"}
+                    for k in range(skills)
+                ],
+            } for s in range(subtopics)],
+        } for t in range(topics)],
+    }
+
+
+def test_clean_response_is_not_truncated():
+    parsed, truncated = ai_service._parse_roadmap_content(json.dumps(roadmap()), "Python")
+    assert not truncated
+    assert len(parsed["topics"]) == 3
+
+
+def test_syntax_repairs_are_not_flagged_as_truncated():
+    text = "Here you go:\n```json\n" + json.dumps(roadmap(), indent=2).replace("}\n", "},\n") + "\n```"
+    parsed, truncated = ai_service._parse_roadmap_content(text, "Python")
+    assert not truncated
+    assert parsed == ai_service._validate_roadmap(roadmap(), "Python")
+
+
+def test_document_cut_before_topics_is_rejected():
+    with pytest.raises(ValueError):
+        ai_service._parse_roadmap_content('{"title": "Python", "description": "d", "topics": [', "Python")
+
+
+@pytest.mark.parametrize("share", [0.3, 0.5, 0.65, 0.72, 0.78, 0.9, 0.98])
+def test_truncated_document_is_never_returned_as_complete(share):
+    text = json.dumps(roadmap(), indent=2)
+    text = text[:int(len(text) * share)]
+    try:
+        parsed, truncated = ai_service._parse_roadmap_content(text, "Python")
+    except ValueError:
+        return
+    assert truncated
+    ai_service._check_complete(parsed)
+
+
+@pytest.mark.parametrize("empty", [
+    {"title": "t", "topics": []},
+    {"title": "t", "topics": [{"name": "a", "subtopics": []}]},
+    {"title": "t", "topics": [{"name": "a", "subtopics": [{"name": "b", "skills": []}]}]},
+])
+def test_roadmaps_with_childless_nodes_are_rejected(empty):
+    with pytest.raises(AIResponseMalformedError):
+        ai_service._validate_roadmap(empty, "Python")
+
+
+@pytest.mark.parametrize("value,expected", [("3", 3), ("3 hours", 3), ("3h", 3), ("2-4 hrs", 2), ("2.5", 2), (4.6, 5), (7, 7)])
+def test_hour_strings_are_coerced(value, expected):
+    assert ai_service._coerce_hours(value) == expected
+
+
+@pytest.mark.parametrize("value", ["2 weeks", "3 days", "a few", "1 month"])
+def test_hours_with_other_units_are_rejected(value):
+    data = roadmap(1, 1, 1)
+    data["topics"][0]["subtopics"][0]["skills"][0]["estimated_hours"] = value
+    with pytest.raises(AIResponseMalformedError):
+        ai_service._validate_roadmap(data, "Python")
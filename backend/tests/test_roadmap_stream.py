@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+import app.services.ai_service_updated as ai_service
+
+
+def topic(name):
+    return {"name": name, "subtopics": [{"name": f"{name} basics", "skills": [{"name": f"{name} skill"}]}]}
+
+
+@pytest.fixture
+def stream_stub(monkeypatch, fake_redis):
+    async def no_cached(*args):
+        return None
+
+    calls = []
+
+    def stub(streamed, final):
+        async def stream_roadmap(career_goal, normalized_goal, cache_key, on_topic):
+            calls.append(career_goal)
+            for name in streamed:
+                on_topic(topic(name))
+                await asyncio.sleep(0.01)
+            return {"title": career_goal, "topics": [topic(name) for name in final]}
+        monkeypatch.setattr(ai_service, "_stream_roadmap", stream_roadmap)
+        return calls
+
+    monkeypatch.setattr(ai_service, "_get_cached_roadmap", no_cached)
+    monkeypatch.setattr(ai_service, "_load_roadmap", no_cached)
+    return stub
+
+
+async def collect(goal):
+    return [(event, data["name"] if event == "topic" else data and data["title"])
+            async for event, data in ai_service.stream_roadmap_from_goal(goal)]
+
+
+def test_topics_are_streamed_before_the_roadmap(stream_stub):
+    stream_stub(["A", "B"], ["A", "B"])
+    events = asyncio.run(collect("Data engineer"))
+    assert events == [("topic", "A"), ("topic", "B"), ("roadmap", "Data engineer")]
+
+
+def test_regenerated_roadmap_resets_the_streamed_topics(stream_stub):
+    # the streamed document was invalid and the fallback produced other topics
+    stream_stub(["A", "B"], ["C"])
+    events = asyncio.run(collect("Data engineer"))
+    assert events == [("topic", "A"), ("topic", "B"), ("reset", None), ("topic", "C"), ("roadmap", "Data engineer")]
+
+
+def test_concurrent_streams_for_one_goal_share_one_generation(stream_stub):
+    calls = stream_stub(["A", "B"], ["A", "B"])
+
+    async def scenario():
+        return await asyncio.gather(*(collect("Data engineer") for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert calls == ["Data engineer"]
+    assert all(events == [("topic", "A"), ("topic", "B"), ("roadmap", "Data engineer")] for events in results)
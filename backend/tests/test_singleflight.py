@@ -0,0 +1,116 @@
+import asyncio
+
+from app.core.singleflight import SingleFlight, SingleFlightError
+
+
+class StubCall:
+    """A slow call that counts how often it actually ran."""
+
+    def __init__(self, result="roadmap", error=None, delay=0.05):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def workers(count):
+    # One SingleFlight per simulated worker process, coordinating through Redis only
+    return [SingleFlight("test", lock_seconds=10, wait_seconds=5) for _ in range(count)]
+
+
+def test_concurrent_calls_in_one_worker_run_once(fake_redis):
+    stub = StubCall()
+    flights = SingleFlight("test", lock_seconds=10, wait_seconds=5)
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("goal", stub) for _ in range(20)))
+
+    assert asyncio.run(scenario()) == ["roadmap"] * 20
+    assert stub.calls == 1
+    assert flights.counters["coalesced_local"] == 19
+
+
+def test_concurrent_calls_across_workers_run_once(fake_redis):
+    stub = StubCall()
+    flights = workers(5)
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("goal", stub) for flight in flights for _ in range(4)))
+
+    assert asyncio.run(scenario()) == ["roadmap"] * 20
+    assert stub.calls == 1
+    assert sum(flight.counters["coalesced_remote"] for flight in flights) == 4
+
+
+def test_leader_failure_is_raised_to_waiters_without_retrying(fake_redis):
+    stub = StubCall(error=RuntimeError("model unavailable"))
+    flights = workers(5)
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("goal", stub) for flight in flights), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert stub.calls == 1
+    assert sum(isinstance(result, RuntimeError) for result in results) == 1
+    assert sum(isinstance(result, SingleFlightError) for result in results) == 4
+
+
+def test_cancelled_leader_hands_the_call_to_one_waiter(fake_redis):
+    stub = StubCall()
+    leader, *others = workers(4)
+
+    async def scenario():
+        leading = asyncio.create_task(leader.do("goal", stub))
+        await asyncio.sleep(0.01)
+        waiting = [asyncio.create_task(flight.do("goal", stub)) for flight in others]
+        await asyncio.sleep(0.01)
+        leading.cancel()
+        return await asyncio.gather(*waiting)
+
+    assert asyncio.run(scenario()) == ["roadmap"] * 3
+    assert stub.calls == 2
+
+
+def test_without_redis_concurrent_calls_still_run_once(monkeypatch):
+    monkeypatch.setattr("app.core.singleflight.redis_cache.client", lambda: None)
+    stub = StubCall()
+    flights = SingleFlight("test", lock_seconds=10, wait_seconds=5)
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("goal", stub) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == ["roadmap"] * 10
+    assert stub.calls == 1
+
+
+def test_many_waiters_of_a_cancelled_leader_make_one_more_call(fake_redis):
+    stub = StubCall()
+    leader, *others = workers(9)
+
+    async def scenario():
+        leading = asyncio.create_task(leader.do("goal", stub))
+        await asyncio.sleep(0.01)
+        waiting = [asyncio.create_task(flight.do("goal", stub)) for flight in others]
+        await asyncio.sleep(0.02)
+        leading.cancel()
+        return await asyncio.gather(*waiting)
+
+    assert asyncio.run(scenario()) == ["roadmap"] * 8
+    assert stub.calls == 2
+
+
+def test_waiter_retries_the_lock_when_the_leader_is_gone(fake_redis):
+    flight = SingleFlight("test", lock_seconds=10, wait_seconds=5)
+
+    async def scenario():
+        # The lock was released between our failed SET NX and the check
+        return await flight._wait_for_leader(fake_redis, "singleflight:test:lock:goal", "singleflight:test:done:goal", None)
+
+    assert asyncio.run(scenario()) == {"retry": True}
@@ -0,0 +1,25 @@
+import asyncio
+
+import app.services.video_summary as video_summary
+from app.services.video_summary import VideoSummarizer
+
+
+def test_reduce_rounds_respect_the_concurrency(monkeypatch):
+    calls = {"running": 0, "peak": 0, "total": 0}
+
+    async def fake_model(messages, purpose):
+        calls["running"] += 1
+        calls["total"] += 1
+        calls["peak"] = max(calls["peak"], calls["running"])
+        await asyncio.sleep(0.01)
+        calls["running"] -= 1
+        return "combined"
+
+    monkeypatch.setattr(video_summary, "_call_ai_model", fake_model)
+    # Every pair of summaries fills the reduce budget, so the first round has 16 groups
+    summarizer = VideoSummarizer(chunk_tokens=100, concurrency=3, reduce_max_tokens=20, top_k=3)
+    summaries = [{"start": i, "end": i + 1, "summary": "word " * 8} for i in range(32)]
+
+    assert asyncio.run(summarizer.reduce(summaries, "question")) == "combined"
+    assert calls["total"] > 16
+    assert calls["peak"] == 3
@@ -0,0 +1,105 @@
+import asyncio
+import socket
+import time
+
+import pytest
+import uvicorn
+from fastapi import FastAPI, HTTPException, Response
+
+import app.services.ai_learning as ai_learning
+from app.core.http_client import SharedHTTPClient
+from app.services.youtube_search import YouTubeSearch
+
+API_KEY = "stub-secret-key"
+
+
+class StubYouTube:
+    """A local stand-in for the YouTube Data API /search endpoint, run with uvicorn."""
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.requests = 0
+        self.failing = False
+        self.app = FastAPI()
+        self.app.get("/search")(self.search)
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning"))
+
+    async def search(self, q: str, key: str):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if self.failing:
+            return Response(status_code=500)
+        return {"items": [{
+            "id": {"videoId": f"vid-{q.lower()}"},
+            "snippet": {"title": f"{q} explained", "description": f"A long video about {q}"},
+        }]}
+
+    async def __aenter__(self):
+        self.serving = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.should_exit = True
+        await self.serving
+
+
+def run_with_stub(scenario, refresh_after_seconds=3600, latency=0.05):
+    async def main():
+        async with StubYouTube(latency) as stub:
+            http = SharedHTTPClient(1.0, 2.0, 10, 10)
+            search = YouTubeSearch(http, f"http://127.0.0.1:{stub.port}", API_KEY, 60, refresh_after_seconds, 100)
+            try:
+                return await scenario(stub, search)
+            finally:
+                await http.close()
+
+    return asyncio.run(main())
+
+
+def test_normalized_queries_share_one_upstream_request():
+    async def scenario(stub, search):
+        first = await search.search("Python Decorators")
+        again = await asyncio.gather(*(search.search("  python   DECORATORS ") for _ in range(10)))
+        return first, again, stub.requests
+
+    first, again, requests = run_with_stub(scenario)
+    assert first["videoId"] == "vid-python decorators"
+    assert again == [first] * 10
+    assert requests == 1
+
+
+def test_stale_result_is_served_while_one_refresh_runs():
+    async def scenario(stub, search):
+        await search.search("python")
+        await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        served = await asyncio.gather(*(search.search("python") for _ in range(5)))
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(stub.latency * 4)
+        return served, elapsed, stub.requests, search.counters["refreshes"]
+
+    served, elapsed, requests, refreshes = run_with_stub(scenario, refresh_after_seconds=0, latency=0.5)
+    assert all(video["videoId"] == "vid-python" for video in served)
+    assert elapsed < 0.25  # not waiting for the upstream API
+    assert (requests, refreshes) == (2, 1)
+
+
+def test_upstream_failure_returns_generic_503_without_the_api_key(monkeypatch, caplog):
+    async def scenario(stub, search):
+        stub.failing = True
+        monkeypatch.setattr(ai_learning, "youtube_search", search)
+        monkeypatch.setattr(ai_learning.config, "YOUTUBE_API_KEY", API_KEY)
+        with pytest.raises(HTTPException) as error:
+            await ai_learning.search_video("python")
+        return error.value
+
+    error = run_with_stub(scenario)
+    assert error.status_code == 503
+    assert error.detail == "Could not connect to YouTube API."
+    assert "YouTube search failed" in caplog.text
+    assert API_KEY not in caplog.text